@@ -0,0 +1,105 @@
+"""Common availability across many attendees.
+
+Gives each of --attendees people a seeded calendar over --days (up to
+--per-day meetings a day, in one of several working-hours profiles) and times
+find_common_availability, whose k-way heap merge walks the sorted busy
+lists once, against concatenating every busy and off-hours interval and
+sorting them. Both must agree on the common free time.
+
+Usage: python benchmarks/bench_common_availability.py [--attendees 50] [--days 90] [--per-day 1]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import time as clock, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic import BASE_DATE, DURATIONS
+from src.tools import Participant, SchedulingTools
+
+# (work_start, work_end, preferred)
+PROFILES = ((clock(9), clock(17), None), (clock(8), clock(16), (clock(9), clock(11))),
+            (clock(10), clock(18), (clock(14), clock(17))), (clock(7), clock(15), None))
+
+
+def make_attendees(count: int, days: int, per_day: int, seed: int) -> list:
+    rng = random.Random(seed)
+    attendees = []
+    for i in range(count):
+        busy = []
+        for day in range(days):
+            for _ in range(rng.randrange(per_day + 1)):
+                start = BASE_DATE + timedelta(days=day, minutes=7 * 60 + 15 * rng.randrange(44))
+                busy.append((start, start + timedelta(minutes=rng.choice(DURATIONS))))
+        work_start, work_end, preferred = PROFILES[i % len(PROFILES)]
+        attendees.append(Participant(f"Attendee {i}", busy=sorted(busy), work_start=work_start,
+                                     work_end=work_end, preferred=preferred))
+    return attendees
+
+
+def sorted_gaps(attendees: list, window_start, window_end) -> list:
+    """Baseline: every interval in one list, sorted, then swept"""
+    intervals = []
+    for attendee in attendees:
+        intervals.extend(attendee.busy_between(window_start, window_end))
+        intervals.extend(SchedulingTools.off_hours(window_start, window_end, attendee.work_start,
+                                                   attendee.work_end, attendee.workdays))
+    gaps = []
+    cursor = window_start
+    for start, end in SchedulingTools.merge_intervals(intervals):
+        if start >= window_end:
+            break
+        if start > cursor:
+            gaps.append((cursor, start))
+        cursor = max(cursor, end)
+    if cursor < window_end:
+        gaps.append((cursor, window_end))
+    return gaps
+
+
+def timed_ms(fn, runs: int):
+    samples, result = [], None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--attendees", type=int, default=50)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--per-day", type=int, default=1, help="most meetings per attendee per day")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    attendees = make_attendees(args.attendees, args.days, args.per_day, args.seed)
+    window_start = BASE_DATE
+    window_end = BASE_DATE + timedelta(days=args.days)
+    busy = sum(len(attendee.busy) for attendee in attendees)
+    print(f"{args.attendees} attendees, {busy} meetings over {args.days} days, median of {args.runs} runs")
+
+    merge_ms, gaps = timed_ms(lambda: [gap[:2] for gap in SchedulingTools.common_free_gaps(
+        attendees, window_start, window_end)], args.runs)
+    sort_ms, baseline = timed_ms(lambda: sorted_gaps(attendees, window_start, window_end), args.runs)
+    assert gaps == baseline, "k-way merge and sort baseline disagree"
+    print(f"  common free gaps  heap merge {merge_ms:8.2f} ms   concatenate + sort {sort_ms:8.2f} ms   "
+          f"({len(gaps)} gaps)")
+
+    for duration in (0.5, 1, 2):
+        search_ms, slots = timed_ms(lambda: SchedulingTools.find_common_availability(
+            attendees, duration, window_start.isoformat(), days_ahead=args.days, max_slots=10), args.runs)
+        best = slots[0]["start"] if slots else "-"
+        print(f"  top 10 {duration:>3}h slots {search_ms:8.2f} ms   best {best}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Overlap checks on add_event: busy blocks against a linear scan.
+
+For each --sizes N, loads a seeded schedule of N events and times, per
+candidate booking, the check a wrapper around add_event would do (scan
+every event, parsing its times) against ScheduleStore.conflicts, which
+bisects the merged busy blocks, and against nearest_free for the
+suggest policy. The two checks must agree on every booking.
+
+Usage: python benchmarks/bench_conflicts.py [--sizes 1000,10000,100000] [--checks 500]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic import BASE_DATE, write_schedule
+from src.storage import ScheduleStore, open_backend
+from src.storage.migrate import migrate_json_to_sqlite
+
+
+def scan_conflicts(store: ScheduleStore, start: datetime, end: datetime) -> list:
+    """What checking outside the store costs: every event, re-parsed"""
+    return [event for event in store.all_events()
+            if datetime.fromisoformat(event["start_time"]) < end and datetime.fromisoformat(event["end_time"]) > start]
+
+
+def median_us(fn, calls) -> tuple:
+    samples, results = [], []
+    for args in calls:
+        started = time.perf_counter()
+        results.append(fn(*args))
+        samples.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(samples), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--checks", type=int, default=500)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--backend", default="json", choices=("json", "journal", "sqlite"))
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as data_dir:
+        for size in (int(value) for value in args.sizes.split(",")):
+            path = os.path.join(data_dir, f"schedule-{size}.json")
+            write_schedule(path, size, 0, args.seed, args.days)
+            if args.backend == "sqlite":
+                migrate_json_to_sqlite(path, os.path.splitext(path)[0] + ".db")
+            store = ScheduleStore(path, backend=open_backend(path, args.backend))
+            bookings = []
+            for _ in range(args.checks):
+                start = BASE_DATE + timedelta(days=rng.randrange(args.days), hours=rng.randrange(8, 18))
+                bookings.append((start, start + timedelta(hours=1)))
+
+            # The first query builds the busy blocks; time it apart from the steady state
+            started = time.perf_counter()
+            store.conflicts(*bookings[0])
+            build_ms = (time.perf_counter() - started) * 1000
+
+            scan_us, scanned = median_us(lambda s, e: scan_conflicts(store, s, e), bookings)
+            indexed_us, indexed = median_us(store.conflicts, bookings)
+            assert [bool(found) for found in scanned] == [bool(found) for found in indexed], \
+                "linear scan and busy blocks disagree"
+            suggest_us, _ = median_us(store.nearest_free, bookings)
+            busy = sum(1 for found in indexed if found)
+            print(f"{size:>8} events  scan {scan_us:10.1f} us   conflicts {indexed_us:8.1f} us   "
+                  f"nearest_free {suggest_us:8.1f} us   ({busy}/{len(bookings)} busy, first query {build_ms:.1f} ms)")
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
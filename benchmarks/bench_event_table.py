@@ -0,0 +1,109 @@
+"""Memory and query latency of EventTable against the list-of-dicts layout.
+
+Usage: python benchmarks/bench_event_table.py [--events 1000000] [--queries 20]
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.storage import event_table
+from src.storage.event_table import EventTable
+from src.tools import SchedulingTools
+
+
+def make_events(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1)
+    events = []
+    for i in range(1, count + 1):
+        start = base + timedelta(minutes=15 * rng.randrange(0, 4 * 24 * 365))
+        end = start + timedelta(minutes=rng.choice((15, 30, 60, 90, 120)))
+        events.append({
+            "id": i,
+            "title": f"Event {i}",
+            "start_time": start.isoformat(),
+            "end_time": end.isoformat(),
+            "description": "",
+            "location": "",
+            "created_at": base.isoformat(),
+        })
+    return events
+
+
+def measure(build, *args):
+    """Peak traced memory and wall time of build(*args)"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build(*args)
+    elapsed = time.perf_counter() - started
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def timed(fn, repeat: int) -> float:
+    """Mean milliseconds per call"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument("--events", type=int, default=1_000_000)
+    args.add_argument("--queries", type=int, default=20)
+    opts = args.parse_args()
+
+    print(f"numpy: {'yes' if event_table.HAS_NUMPY else 'no (array fallback)'}")
+    # Build the JSON-shaped strings outside the measurement, as a loaded file would
+    raw = make_events(opts.events)
+    dicts, dict_bytes, _ = measure(lambda events: [dict(event) for event in events], raw)
+    table, table_bytes, build_s = measure(EventTable, raw)
+    del raw
+    print(f"{opts.events:,} events")
+    # Both layouts reference the same string objects, so only the containers are counted
+    print(f"  dict list memory   {dict_bytes / 2**20:10.1f} MiB")
+    print(f"  event table memory {table_bytes / 2**20:10.1f} MiB (built in {build_s:.1f}s)")
+
+    window_start = datetime(2026, 3, 2, 9)
+    window_end = window_start + timedelta(days=7)
+    day = window_start.date()
+
+    def dict_date_filter():
+        return [e for e in dicts if datetime.fromisoformat(e["start_time"]).date() == day]
+
+    def dict_overlap():
+        return [e for e in dicts
+                if datetime.fromisoformat(e["start_time"]) < window_end
+                and datetime.fromisoformat(e["end_time"]) > window_start]
+
+    def dict_busy():
+        return SchedulingTools.merge_intervals(SchedulingTools.busy_intervals(dict_overlap()))
+
+    rows = [
+        ("date filter", dict_date_filter, lambda: table.on_date(day)),
+        ("overlap window", dict_overlap, lambda: table.between(window_start, window_end)),
+        ("busy extraction", dict_busy, lambda: table.busy_between(window_start, window_end)),
+        ("has overlap", lambda: bool(dict_overlap()), lambda: table.has_overlap(window_start, window_end)),
+    ]
+    dict_repeat = max(1, opts.queries // 10)
+    print(f"  {'query':<16} {'dict list ms':>14} {'table ms':>10} {'speedup':>8}")
+    for name, dict_fn, table_fn in rows:
+        expected, got = dict_fn(), table_fn()
+        assert expected == got if isinstance(expected, bool) else len(expected) == len(got), name
+        dict_ms = timed(dict_fn, dict_repeat)
+        table_ms = timed(table_fn, opts.queries)
+        print(f"  {name:<16} {dict_ms:14.2f} {table_ms:10.2f} {dict_ms / table_ms:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Cold-start cost: import time and time to the first tool-only reply.
+
+Each case runs in a fresh interpreter --runs times and the median wall
+time is reported, with the bare interpreter start-up listed first for
+reference. The agent cases run without OPENAI_API_KEY, since a
+tool-only turn should never need the OpenAI client. With --offenders,
+the modules with the most own time under `python -X importtime -c "import src.agent"`
+are listed as well.
+
+Usage: python benchmarks/bench_import_time.py [--runs 10] [--offenders 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = [
+    ("interpreter", "pass"),
+    ("import src.tools", "import src.tools"),
+    ("import view_schedule", "import view_schedule"),
+    ("import src.agent", "import src.agent"),
+    ("import src.async_agent", "import src.async_agent"),
+    ("agent + tool-only chat",
+     "from src.agent import SchedulingAgent; SchedulingAgent().chat('add task write the report')"),
+]
+
+HEAVY_MODULES = ("openai", "numpy", "tenacity", "dotenv", "dateutil.parser", "pytz", "asyncio", "concurrent.futures")
+
+
+def child_env() -> dict:
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    env.pop("OPENAI_API_KEY", None)
+    return env
+
+
+def wall_time(code: str, cwd: str) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=cwd, env=child_env(), check=True,
+                   stdout=subprocess.DEVNULL)
+    return (time.perf_counter() - started) * 1000
+
+
+def loaded_heavy_modules(code: str, cwd: str) -> str:
+    probe = f"{code}; import sys; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", probe], cwd=cwd, env=child_env(), check=True,
+                            capture_output=True, text=True)
+    return result.stdout.strip().splitlines()[-1] if result.stdout.strip() else ""
+
+
+def offenders(cwd: str, limit: int):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import src.agent"], cwd=cwd,
+                            env=child_env(), capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(own), int(cumulative), name.strip()))
+    print("\nslowest modules (own time) under `import src.agent`:")
+    for own, cumulative, name in sorted(rows, reverse=True)[:limit]:
+        print(f"  {own / 1000:8.1f} ms  (cumulative {cumulative / 1000:8.1f} ms)  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--offenders", type=int, default=10, help="0 to skip the -X importtime listing")
+    args = parser.parse_args()
+
+    # The chat case writes data/schedule.json relative to the working directory
+    with tempfile.TemporaryDirectory() as cwd:
+        print(f"median of {args.runs} fresh interpreters, OPENAI_API_KEY unset")
+        for label, code in CASES:
+            wall_time(code, cwd)
+            samples = [wall_time(code, cwd) for _ in range(args.runs)]
+            heavy = loaded_heavy_modules(code, cwd) if code != "pass" else ""
+            print(f"  {label:<24} {statistics.median(samples):8.1f} ms   "
+                  f"heavy modules loaded: {heavy or '-'}")
+        if args.offenders:
+            offenders(cwd, args.offenders)
+
+
+if __name__ == "__main__":
+    main()
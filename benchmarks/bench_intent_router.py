@@ -0,0 +1,168 @@
+"""Routing cost of the compiled IntentRouter against the old keyword scans.
+
+The legacy path reproduces SchedulingAgent's previous dispatch: repeated
+lower() calls, any(...) keyword scans in group order and per-turn
+re.search calls with pattern strings.
+
+Before timing, the router is checked against CHECKS, the readme's usage
+examples plus inputs that must not be routed (or must not capture a
+slot); any mismatch is listed and the script exits with status 1.
+
+Usage: python benchmarks/bench_intent_router.py [--rounds 2000] [--check-only]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.router import IntentRouter
+
+CORPUS = [
+    "Schedule a meeting called 'Project Review' at 3 PM today",
+    "Book an appointment for 'Dentist' tomorrow at 2:30 PM",
+    "Create an event called 'Team Lunch' on Friday at noon",
+    "Schedule a meeting with John and Sarah at 3pm tomorrow about the budget for 2 hours",
+    "Add a task called 'Finish report' with high priority",
+    "Create a reminder to 'Call client' due tomorrow",
+    "add task write report",
+    "Show me my events for today",
+    "What tasks do I have pending?",
+    "Display my schedule for this week",
+    "Find available time for a 1-hour meeting tomorrow",
+    "show tasks that are completed",
+    "mark task 3 as done",
+    "what's on tomorrow",
+    "What can you do?",
+    "Thanks, that's all for now",
+]
+
+# (input, expected intent or None for the LLM, slots that must be present with these values);
+# a slot given as None must be absent
+CHECKS = [
+    # Scheduling events (readme)
+    ("Schedule a meeting called 'Project Review' at 3 PM today", "add_event",
+     {"title": "Project Review", "time": "3 PM today"}),
+    ("Book an appointment for 'Dentist' tomorrow at 2:30 PM", "add_event",
+     {"title": "Dentist", "time": "tomorrow 2:30 PM"}),
+    ("Create an event called 'Team Lunch' on Friday at noon", "add_event",
+     {"title": "Team Lunch", "time": "Friday at noon"}),
+    ("Schedule a meeting called 'Standup' at 9am every weekday", "add_event",
+     {"title": "Standup", "time": "9am", "repeat": "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR"}),
+    ("Book a meeting with Sam at 2pm every Monday for 30 minutes", "add_event",
+     {"title": None, "participants": ["Sam"], "time": "2pm", "repeat": "FREQ=WEEKLY;BYDAY=MO", "duration": 0.5}),
+    ("Schedule standup every weekday at 9am", "add_event",
+     {"title": "standup", "time": "9am", "repeat": "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR"}),
+    ("Schedule a meeting with John and Sarah at 3pm tomorrow about the budget for 2 hours", "add_event",
+     {"participants": ["John", "Sarah"], "topic": "the budget", "duration": 2.0}),
+    # Managing tasks (readme)
+    ("Add a task called 'Finish report' with high priority", "add_task",
+     {"title": "Finish report", "priority": "high"}),
+    ("Create a reminder to 'Call client' due tomorrow", "add_task", {"title": "Call client", "time": "tomorrow"}),
+    ("Set a task 'Review code' for next week", "add_task", {"title": "Review code"}),
+    ("mark task 3 as done", "update_task", {"task_id": 3, "status": "completed"}),
+    # Viewing information (readme)
+    ("Show me my events for today", "show_events", {"time": "today"}),
+    ("What tasks do I have pending?", "list_tasks", {"status": "pending"}),
+    ("Show my next 3 tasks", "list_tasks", {"urgent": True, "limit": 3}),
+    ("Show overdue tasks", "list_tasks", {"overdue": "overdue"}),
+    ("Display my schedule for this week", "show_events", {"time": "this week"}),
+    ("Find available time for a 1-hour meeting tomorrow", "find_time", {"duration": 1.0, "time": "tomorrow"}),
+    ("Find available time with Ali and Ahmad tomorrow", "find_time", {"participants": ["Ali", "Ahmad"]}),
+    ("what's on tomorrow", "show_events", {"time": "tomorrow"}),
+    # Not for a tool, or no date to capture
+    ("get me a coffee", None, {}),
+    ("show me the money", None, {}),
+    ("What can you do?", None, {}),
+    ("Thanks, that's all for now", None, {}),
+    ("I have a meeting tomorrow, what is on my calendar?", "show_events", {"time": "tomorrow"}),
+    ("what is on my calendar?", "show_events", {"time": None}),
+]
+
+
+def check(router: IntentRouter) -> list:
+    """CHECKS the router gets wrong, as (input, expected, got) lines"""
+    failures = []
+    for text, name, slots in CHECKS:
+        intent = router.route(text)
+        wrong = intent.name != name or any(intent.slots.get(slot) != value for slot, value in slots.items())
+        if wrong:
+            failures.append((text, (name, slots), (intent.name, intent.slots)))
+    return failures
+
+
+def legacy_route(user_input: str):
+    """The pre-router dispatch, minus the manager calls"""
+    input_lower = user_input.lower()
+    if any(word in input_lower for word in ['schedule', 'meeting', 'appointment', 'event', 'calendar']):
+        title_match = re.search(r'(?:schedule|meeting|appointment|event) (?:called|named|for) ["\']?([^"\']+)["\']?',
+                                user_input, re.IGNORECASE)
+        time_match = re.search(r'(?:at|on) (.*?)(?:\.|$|for|with)', user_input, re.IGNORECASE)
+        re.search(r'(?:for|duration) (\d+) (?:hour|hr|minute|min)', user_input, re.IGNORECASE)
+        if title_match and time_match:
+            return "calendar", title_match.group(1), time_match.group(1)
+        if 'show events' in user_input.lower() or 'view calendar' in user_input.lower():
+            date_match = re.search(r'(?:on|for) (.*?)(?:\.|$|please)', user_input, re.IGNORECASE)
+            return "calendar", date_match.group(1) if date_match else None
+        if 'available time' in user_input.lower() or 'free slot' in user_input.lower():
+            return "calendar", "available"
+        return "calendar", None
+    elif any(word in input_lower for word in ['task', 'todo', 'reminder', 'due']):
+        if 'add task' in user_input.lower() or 'create task' in user_input.lower():
+            task_match = re.search(r'(?:add|create) task ["\']?([^"\']+)["\']?', user_input, re.IGNORECASE)
+            return "task", task_match.group(1) if task_match else None
+        if 'show tasks' in user_input.lower() or 'list tasks' in user_input.lower():
+            status_match = re.search(r'(?:with status|that are) (\w+)', user_input, re.IGNORECASE)
+            return "task", status_match.group(1) if status_match else None
+        return "task", None
+    elif any(word in input_lower for word in ['show', 'view', 'list', 'get', 'what\'s on']):
+        return "view", 'events' in user_input.lower()
+    return None
+
+
+def timed(fn, rounds: int) -> float:
+    """Mean microseconds per routed command"""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for command in CORPUS:
+            fn(command)
+    return (time.perf_counter() - started) / (rounds * len(CORPUS)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=2000)
+    parser.add_argument("--check-only", action="store_true", help="run CHECKS and exit")
+    args = parser.parse_args()
+
+    failures = check(IntentRouter())
+    for text, expected, got in failures:
+        print(f"MISROUTED {text!r}\n  expected {expected}\n  got      {got}")
+    print(f"{len(CHECKS) - len(failures)}/{len(CHECKS)} routing checks passed")
+    if failures:
+        sys.exit(1)
+    if args.check_only:
+        return
+
+    started = time.perf_counter()
+    router = IntentRouter()
+    build_ms = (time.perf_counter() - started) * 1000
+
+    print(f"{len(CORPUS)} commands x {args.rounds} rounds; router compiled in {build_ms:.2f} ms")
+    legacy = timed(legacy_route, args.rounds)
+    classify = timed(router.classify, args.rounds)
+    compiled = timed(router.route, args.rounds)
+    print(f"legacy keyword scans     {legacy:7.2f} us/command")
+    print(f"router, classify only    {classify:7.2f} us/command")
+    print(f"router, with all slots   {compiled:7.2f} us/command")
+
+    print()
+    for command in CORPUS:
+        intent = router.route(command)
+        print(f"{command[:60]:<60} {intent.name or '-':<12} {intent.slots}")
+
+
+if __name__ == "__main__":
+    main()
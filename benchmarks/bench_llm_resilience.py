@@ -0,0 +1,174 @@
+"""Success rate and tail latency of LLM calls under the resilience policies.
+
+Runs a local fake chat-completions server and points a real OpenAI client
+at it. The server fails --error-rate of requests with a 503 and answers
+--slow-rate of them after --slow-ms instead of --base-ms. The same
+request sequence is sent with no policy (one attempt), with retries, and
+with retries plus hedging; then the server goes down for --outage
+requests to show the circuit breaker failing fast and the agent falling
+back to tool-only replies.
+
+Usage: python benchmarks/bench_llm_resilience.py [--requests 200] [--error-rate 0.1] [--slow-rate 0.05]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from openai import OpenAI
+
+from src.agent import SchedulingAgent
+from src.llm_cache import ResponseCache
+from src.storage import ScheduleStore
+from src.utils import CircuitBreaker, LatencyTracker, ResilientCaller
+
+
+class FakeOpenAIServer:
+    """Minimal /v1/chat/completions endpoint with injectable errors and latency"""
+
+    def __init__(self, base_ms: float, slow_ms: float, slow_rate: float, error_rate: float, seed: int = 0):
+        self.base = base_ms / 1000
+        self.slow = slow_ms / 1000
+        self.slow_rate = slow_rate
+        self.error_rate = error_rate
+        self.down = False
+        self.requests = 0
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+
+    def _roll(self):
+        with self._lock:
+            self.requests += 1
+            return self.rng.random(), self.rng.random()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                fail, slow = server._roll()
+                if server.down or fail < server.error_rate:
+                    return self._send(503, {"error": {"message": "overloaded", "type": "server_error"}})
+                time.sleep(server.slow if slow < server.slow_rate else server.base)
+                self._send(200, {
+                    "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()),
+                    "model": "fake",
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": "Sure, here is a plan."}}],
+                })
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def run_policy(label: str, caller: ResilientCaller, client: OpenAI, requests: int):
+    latencies, failures = [], 0
+    for i in range(requests):
+        started = time.perf_counter()
+        try:
+            caller.call(client.chat.completions.create, model="fake",
+                        messages=[{"role": "user", "content": f"plan {i}"}])
+        except Exception:
+            failures += 1
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    latencies.sort()
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+    p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+    stats = caller.stats()
+    print(f"{label:<16} success {100 * (requests - failures) / requests:5.1f}%   "
+          f"p50 {statistics.median(latencies):6.1f} ms   p95 {p95:6.1f} ms   p99 {p99:6.1f} ms   "
+          f"retries {stats['retries']:<4} hedged {stats['hedged']:<4} (won {stats['hedge_wins']})")
+
+
+def run_outage(server: FakeOpenAIServer, client: OpenAI, args, data_dir: str):
+    caller = ResilientCaller(timeout=2, max_attempts=3, backoff_initial=0.01, backoff_max=0.05,
+                             breaker=CircuitBreaker(failure_threshold=5, reset_timeout=60))
+    store = ScheduleStore(os.path.join(data_dir, "schedule.json"))
+    agent = SchedulingAgent(client=client, store=store, llm=caller, response_cache=ResponseCache(max_entries=0))
+
+    server.down = True
+    latencies, fallbacks = [], 0
+    for i in range(args.outage):
+        started = time.perf_counter()
+        reply = agent.chat(f"Any advice for day {i}?")
+        latencies.append((time.perf_counter() - started) * 1000)
+        fallbacks += reply.startswith("I can't reach")
+    server.down = False
+
+    tool_reply = agent.chat("add task write report")
+    store.close()
+    print(f"outage ({args.outage} turns): {fallbacks} fallback replies, breaker {caller.breaker.state} "
+          f"after {caller.breaker.trips} trip(s), {caller.rejected} calls refused")
+    print(f"  first turn {latencies[0]:.1f} ms, median turn {statistics.median(latencies):.2f} ms; "
+          f"tool command still answered: {tool_reply!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--base-ms", type=float, default=20)
+    parser.add_argument("--slow-ms", type=float, default=400)
+    parser.add_argument("--outage", type=int, default=20, help="turns sent while the server is down")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(args.base_ms, args.slow_ms, args.slow_rate, args.error_rate)
+    client = OpenAI(api_key="fake", base_url=server.url, max_retries=0)
+    print(f"{args.requests} requests, {args.error_rate:.0%} 503s, {args.slow_rate:.0%} slow "
+          f"({args.slow_ms:g} ms vs {args.base_ms:g} ms)")
+    try:
+        policies = [
+            ("single attempt", dict(max_attempts=1)),
+            ("retry", dict(max_attempts=4)),
+            ("retry + hedge", dict(max_attempts=4, hedge=True)),
+        ]
+        for label, options in policies:
+            server.rng.seed(0)
+            caller = ResilientCaller(timeout=5, backoff_initial=0.01, backoff_max=0.1,
+                                     breaker=CircuitBreaker(failure_threshold=1000),
+                                     latency=LatencyTracker(min_samples=20), **options)
+            run_policy(label, caller, client, args.requests)
+
+        with tempfile.TemporaryDirectory() as data_dir:
+            run_outage(server, client, args, data_dir)
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
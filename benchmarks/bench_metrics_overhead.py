@@ -0,0 +1,80 @@
+"""Cost of the chat instrumentation, enabled and disabled.
+
+Runs the same tool-only turns (no LLM round trip, so the local work is
+all there is to measure) with a Metrics registry switched on and off,
+and prints the per-turn difference plus the raw cost of one span.
+
+Usage: python benchmarks/bench_metrics_overhead.py [--turns 2000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from src.agent import SchedulingAgent
+from src.metrics import Metrics, default_metrics
+from src.storage import ScheduleStore
+
+COMMANDS = [
+    "Add task write the quarterly report",
+    "Show tasks",
+    "Show events for today please",
+    "List tasks that are pending",
+]
+
+
+def run(enabled: bool, turns: int, data_dir: str):
+    metrics = Metrics(enabled=enabled)
+    # Storage and the time parser report to the process-wide registry
+    default_metrics().enabled = enabled
+    store = ScheduleStore(os.path.join(data_dir, f"schedule-{enabled}.json"), flush_interval=3600)
+    agent = SchedulingAgent(client=SimpleNamespace(), store=store, metrics=metrics)
+
+    samples = []
+    for i in range(turns):
+        started = time.perf_counter()
+        agent.chat(COMMANDS[i % len(COMMANDS)])
+        samples.append((time.perf_counter() - started) * 1e6)
+        # Keep the task list from growing without bound
+        if i % 200 == 199:
+            agent.clear_conversation()
+    store.close()
+    return samples, metrics
+
+
+def span_cost(enabled: bool, rounds: int = 200000) -> float:
+    metrics = Metrics(enabled=enabled)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        with metrics.span("intent"):
+            pass
+    return (time.perf_counter() - started) / rounds * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        results = {}
+        for label, enabled in (("disabled", False), ("enabled", True)):
+            results[label] = run(enabled, args.turns, data_dir)
+            samples = results[label][0]
+            print(f"{label:<9} median turn {statistics.median(samples):8.1f} us   "
+                  f"mean {statistics.fmean(samples):8.1f} us   one span {span_cost(enabled):6.0f} ns")
+
+    metrics = results["enabled"][1].to_dict()
+    print("\nstage means (enabled):")
+    for stage, histogram in sorted(metrics["stages"].items()):
+        print(f"  {stage:<10} {histogram['mean'] * 1e6:8.1f} us over {histogram['count']} spans")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Recurring series against one stored event per occurrence.
+
+Builds the same calendar twice: --series daily and weekly meetings (with
+a few one-off events between them) stored once each with an RRULE, and
+the same meetings materialized as individual events for --days days.
+Prints file size and load time, then day and week queries and the
+free-slot search, run cold (each series expanded) and warm (expansions
+served from the per-series window cache).
+
+Usage: python benchmarks/bench_recurrence.py [--series 20] [--days 365] [--queries 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic import BASE_DATE, make_events
+from src.storage import JsonBackend
+from src.storage.json_backend import write_json_atomic
+from src.storage.recurrence import build_rule
+from src.tools import SchedulingTools
+
+RULES = ("FREQ=DAILY;BYDAY=MO,TU,WE,TH,FR", "FREQ=WEEKLY;BYDAY=MO", "FREQ=WEEKLY;BYDAY=TU,TH",
+         "FREQ=WEEKLY;INTERVAL=2;BYDAY=FR")
+
+
+def make_series(count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    series = []
+    for i in range(count):
+        start = BASE_DATE + timedelta(hours=rng.randrange(9, 17), minutes=rng.choice((0, 30)))
+        series.append({
+            "title": f"Series {i}",
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(minutes=rng.choice((15, 30, 60)))).isoformat(),
+            "rrule": RULES[i % len(RULES)],
+            "exdates": [],
+        })
+    return series
+
+
+def materialize(series: list, days: int) -> list:
+    """The occurrences of each series in the first days days, as one-off events"""
+    until = BASE_DATE + timedelta(days=days)
+    events = []
+    for item in series:
+        length = datetime.fromisoformat(item["end_time"]) - datetime.fromisoformat(item["start_time"])
+        for start in build_rule(item).between(BASE_DATE, until, inc=True):
+            events.append({key: value for key, value in item.items() if key not in ("rrule", "exdates")})
+            events[-1].update(start_time=start.isoformat(), end_time=(start + length).isoformat())
+    return events
+
+
+def write(path: str, events: list) -> int:
+    schedule = {"events": [{"id": i, **event} for i, event in enumerate(events, 1)], "tasks": []}
+    return write_json_atomic(path, schedule, indent=None)
+
+
+def per_call_ms(fn, calls) -> float:
+    samples = []
+    for args in calls:
+        started = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--series", type=int, default=20)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--one-offs", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    series = make_series(args.series, args.seed)
+    one_offs = [{key: value for key, value in event.items() if key != "id"}
+                for event in make_events(args.one_offs, args.seed, args.days)]
+    layouts = {"materialized": one_offs + materialize(series, args.days), "series": one_offs + series}
+
+    rng = random.Random(args.seed)
+    days = [BASE_DATE + timedelta(days=rng.randrange(args.days)) for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        print(f"{args.series} series over {args.days} days, {args.one_offs} one-off events")
+        for label, events in layouts.items():
+            path = os.path.join(data_dir, f"{label}.json")
+            size = write(path, events)
+            started = time.perf_counter()
+            backend = JsonBackend(path)
+            load_ms = (time.perf_counter() - started) * 1000
+            print(f"\n{label}: {len(events)} stored events, {size / 1024:.0f} KiB, load {load_ms:.1f} ms")
+
+            def day_query(day):
+                backend.events_on(day.date())
+
+            def week_busy(day):
+                busy = backend.busy_intervals(day, day + timedelta(days=8))
+                SchedulingTools.find_available_time([], 1, day.isoformat(), busy=busy)
+
+            for name, fn in (("events_on (day)", day_query), ("find_available_time", week_busy)):
+                cold = per_call_ms(fn, [(day,) for day in days])
+                warm = per_call_ms(fn, [(day,) for day in days])
+                print(f"  {name:<22} cold {cold:8.3f} ms   warm {warm:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
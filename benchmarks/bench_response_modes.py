@@ -0,0 +1,89 @@
+"""Per-turn latency of template-rendered tool replies against LLM-polished ones.
+
+The OpenAI client is replaced by an in-process fake that sleeps for
+--llm-ms per completion, so the numbers isolate the extra round trip.
+
+Usage: python benchmarks/bench_response_modes.py [--turns 200] [--llm-ms 400]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from src.agent import SchedulingAgent
+from src.llm_cache import ResponseCache
+from src.storage import ScheduleStore
+
+COMMANDS = [
+    "Schedule a meeting called 'Standup' at 9am tomorrow",
+    "Add task write the quarterly report",
+    "Show tasks",
+    "Show events",
+    "Show events for today please",
+    "List tasks that are pending",
+    "Find available time for a meeting",
+    "Create task review pull requests",
+]
+
+
+class FakeOpenAI:
+    """Stands in for OpenAI(); each completion costs latency seconds"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        message = SimpleNamespace(role="assistant", content="Done! " + kwargs["messages"][-1]["content"][:80])
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")])
+
+
+def run(polish: bool, turns: int, latency: float, data_dir: str):
+    client = FakeOpenAI(latency)
+    store = ScheduleStore(os.path.join(data_dir, f"schedule-{'llm' if polish else 'template'}.json"))
+    # Caching off so every polished turn pays the round trip
+    agent = SchedulingAgent(client=client, store=store, response_cache=ResponseCache(max_entries=0),
+                            polish=polish)
+
+    samples = []
+    for i in range(turns):
+        if i % 20 == 0:
+            agent.clear_conversation()
+        started = time.perf_counter()
+        agent.chat(COMMANDS[i % len(COMMANDS)])
+        samples.append((time.perf_counter() - started) * 1000)
+    store.close()
+    return samples, client.calls
+
+
+def report(label: str, samples, calls: int):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<10} mean {statistics.mean(samples):8.2f} ms   p50 {statistics.median(samples):8.2f} ms   "
+          f"p95 {p95:8.2f} ms   llm calls {calls}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--llm-ms", type=float, default=400, help="simulated completion latency")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        print(f"{args.turns} turns over {len(COMMANDS)} commands, simulated LLM latency {args.llm_ms:.0f} ms")
+        for label, polish in (("template", False), ("polished", True)):
+            samples, calls = run(polish, args.turns, args.llm_ms / 1000, data_dir)
+            report(label, samples, calls)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Time to first token against total latency for chat() and chat_stream().
+
+The OpenAI client is an in-process fake: the first chunk arrives after
+--first-ms and each following chunk --token-ms later, so a non-streaming
+call costs first-ms + tokens * token-ms before anything can be shown.
+
+Usage: python benchmarks/bench_streaming.py [--turns 10] [--tokens 80]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from src.agent import SchedulingAgent
+from src.llm_cache import ResponseCache
+from src.storage import ScheduleStore
+
+# Inputs no tool handles, so every turn reaches the LLM
+PROMPTS = [
+    "What can you help me with?",
+    "How should I plan a busy week?",
+    "Any tips for shorter meetings?",
+]
+
+
+class FakeStreamingOpenAI:
+    """Stands in for OpenAI(); supports both stream=True and plain completions"""
+
+    def __init__(self, first: float, per_token: float, tokens: int):
+        self.first = first
+        self.per_token = per_token
+        self.tokens = tokens
+        self.chat = SimpleNamespace(completions=self)
+
+    def _chunks(self):
+        time.sleep(self.first)
+        for i in range(self.tokens):
+            if i:
+                time.sleep(self.per_token)
+            delta = SimpleNamespace(content=f"word{i} ")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=None)])
+
+    def create(self, stream: bool = False, **kwargs):
+        if stream:
+            return self._chunks()
+        content = "".join(chunk.choices[0].delta.content for chunk in self._chunks())
+        message = SimpleNamespace(role="assistant", content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")])
+
+
+def run(streaming: bool, args, data_dir: str):
+    client = FakeStreamingOpenAI(args.first_ms / 1000, args.token_ms / 1000, args.tokens)
+    store = ScheduleStore(os.path.join(data_dir, "schedule.json"))
+    agent = SchedulingAgent(client=client, store=store, response_cache=ResponseCache(max_entries=0))
+
+    first, total = [], []
+    for i in range(args.turns):
+        prompt = PROMPTS[i % len(PROMPTS)]
+        if streaming:
+            for _ in agent.chat_stream(prompt):
+                pass
+        else:
+            agent.chat(prompt)
+        first.append(agent.last_timing["first_token"] * 1000)
+        total.append(agent.last_timing["total"] * 1000)
+    store.close()
+    return first, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--tokens", type=int, default=80)
+    parser.add_argument("--first-ms", type=float, default=300, help="simulated time to first chunk")
+    parser.add_argument("--token-ms", type=float, default=15, help="simulated gap between chunks")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        print(f"{args.turns} LLM turns, {args.tokens} chunks each")
+        for label, streaming in (("chat", False), ("chat_stream", True)):
+            first, total = run(streaming, args, data_dir)
+            print(f"{label:<12} first token {statistics.median(first):8.1f} ms   "
+                  f"total {statistics.median(total):8.1f} ms   (medians)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Task queries from the TaskIndex against scanning the task list.
+
+For each --sizes N, loads a seeded schedule of N tasks (see synthetic.py)
+and times the status filter, the --top most urgent pending tasks, and
+overdue tasks as of a date mid-window, each answered by the backend's
+indexes and by the scan-and-sort a caller would otherwise do over
+store.tasks(). Both must return the same tasks.
+
+Usage: python benchmarks/bench_task_index.py [--sizes 1000,10000,100000] [--top 10]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic import BASE_DATE, write_schedule
+from src.storage import ScheduleStore, open_backend
+from src.storage.migrate import migrate_json_to_sqlite
+from src.storage.task_index import PRIORITY_RANK
+
+
+def scan_urgent(tasks: list, limit: int) -> list:
+    pending = [task for task in tasks if task["status"] == "pending"]
+    pending.sort(key=lambda task: (PRIORITY_RANK[task["priority"]], task["due_date"] is None,
+                                   datetime.fromisoformat(task["due_date"]) if task["due_date"] else BASE_DATE,
+                                   task["id"]))
+    return pending[:limit]
+
+
+def scan_overdue(tasks: list, as_of: datetime) -> list:
+    overdue = [task for task in tasks if task["status"] != "completed" and task["due_date"]
+               and datetime.fromisoformat(task["due_date"]) < as_of]
+    return sorted(overdue, key=lambda task: (datetime.fromisoformat(task["due_date"]), task["id"]))
+
+
+def median_ms(fn, runs: int) -> tuple:
+    samples, result = [], None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--backend", default="json", choices=("json", "journal", "sqlite"))
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as data_dir:
+        for size in (int(value) for value in args.sizes.split(",")):
+            path = os.path.join(data_dir, f"schedule-{size}.json")
+            write_schedule(path, 0, size, args.seed, args.days)
+            if args.backend == "sqlite":
+                migrate_json_to_sqlite(path, os.path.splitext(path)[0] + ".db")
+            store = ScheduleStore(path, backend=open_backend(path, args.backend))
+            as_of = BASE_DATE + timedelta(days=rng.randrange(args.days // 4, args.days // 2))
+            ids = lambda tasks: [task["id"] for task in tasks]
+
+            print(f"{size} tasks ({args.backend})")
+            cases = [
+                ("status filter", lambda: store.tasks("in_progress"),
+                 lambda: [task for task in store.tasks() if task["status"] == "in_progress"]),
+                (f"top {args.top} urgent", lambda: store.urgent_tasks(args.top),
+                 lambda: scan_urgent(store.tasks(), args.top)),
+                ("overdue", lambda: store.overdue_tasks(as_of), lambda: scan_overdue(store.tasks(), as_of)),
+            ]
+            for label, indexed, scan in cases:
+                indexed_ms, found = median_ms(indexed, args.runs)
+                scan_ms, expected = median_ms(scan, args.runs)
+                assert ids(found) == ids(expected), f"{label}: index and scan disagree"
+                print(f"  {label:<16} index {indexed_ms:9.3f} ms   scan {scan_ms:9.3f} ms   ({len(found)} tasks)")
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
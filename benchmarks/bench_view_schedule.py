@@ -0,0 +1,107 @@
+"""Time to the first screen of view_schedule, streamed or indexed, against loading the whole file.
+
+For each --sizes N, writes a seeded schedule of N events and N tasks (see
+synthetic.py) and times how long the first --page-size events take to
+print in start order: from schedule.json loaded whole (what
+view_schedule used to do), from schedule.json as the backends write it,
+streamed and printed record by record, from the same schedule in id
+order (one pass that keeps only sort keys and file offsets), and from
+the SQLite backend's indexes. The same is timed for a one-week window at the
+end of the schedule. Peak memory is traced for the whole-file load and
+the stream.
+
+Usage: python benchmarks/bench_view_schedule.py [--sizes 1000,10000,100000] [--page-size 20]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic import BASE_DATE, make_schedule, write_schedule
+from src.storage.json_backend import start_ordered, write_json_atomic
+from src.storage.migrate import migrate_json_to_sqlite
+import view_schedule
+
+
+def whole_file_page(path: str, page_size: int, start=None, end=None):
+    """The old viewer: json.load everything, then print the first page in start order"""
+    with open(path, 'r') as f:
+        schedule = json.load(f)
+    events = schedule.get("events", [])
+    if start is not None:
+        events = [event for event in events if event["start_time"] < end.isoformat()
+                  and event["end_time"] > start.isoformat()]
+    events.sort(key=lambda event: (event["start_time"], event["id"]))
+    for event in events[:page_size]:
+        print(view_schedule.format_event(event))
+
+
+def first_page(path: str, backend: str, page_size: int, start=None, end=None):
+    view_schedule.view_schedule(path, start, end, page_size=page_size, backend=backend)
+
+
+def median_ms(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def peak_kib(fn) -> float:
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--page-size", type=int, default=view_schedule.PAGE_SIZE)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    window_start = BASE_DATE + timedelta(days=args.days - 7)
+    window = (window_start, window_start + timedelta(days=7))
+    with tempfile.TemporaryDirectory() as data_dir:
+        for size in (int(value) for value in args.sizes.split(",")):
+            path = os.path.join(data_dir, f"schedule-{size}.json")
+            write_json_atomic(path, start_ordered(make_schedule(size, size, args.seed, args.days)), indent=None)
+            migrate_json_to_sqlite(path, os.path.splitext(path)[0] + ".db")
+            id_order_path = os.path.join(data_dir, f"schedule-{size}-ids.json")
+            write_schedule(id_order_path, size, size, args.seed, args.days)
+
+            print(f"{size} events + {size} tasks, {os.path.getsize(path) / 1024:.0f} KiB")
+            cases = [
+                ("whole file", lambda *w: whole_file_page(path, args.page_size, *w)),
+                ("json stream", lambda *w: first_page(path, "json", args.page_size, *w)),
+                ("json, id order", lambda *w: first_page(id_order_path, "json", args.page_size, *w)),
+                ("sqlite", lambda *w: first_page(path, "sqlite", args.page_size, *w)),
+            ]
+            for label, fn in cases:
+                first_ms = median_ms(fn, args.runs)
+                window_ms = median_ms(lambda: fn(*window), args.runs)
+                memory = f"   peak {peak_kib(fn):9.0f} KiB" if label != "sqlite" else ""
+                print(f"  {label:<14} first page {first_ms:9.3f} ms   last week {window_ms:9.3f} ms{memory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Load test for src/server.py with an in-process fake LLM.
+
+Starts the server on an ephemeral port (unless --url points at a running
+one). Then --clients keep-alive connections each send --requests mixed
+requests: chat turns that hit a tool or the LLM, event and task
+creation, listings and free-slot queries, spread over --users users.
+Reports throughput, latency percentiles per request kind, and status
+counts, including 503s once --max-pending is reached.
+
+Usage: python benchmarks/load_test_server.py [--clients 50] [--requests 40] [--llm-ms 200]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "load-test")
+
+from src.async_agent import AsyncSchedulingAgent
+from src.llm_cache import ResponseCache
+from src.server import SchedulingServer
+from src.sessions import SessionManager
+
+
+class FakeAsyncOpenAI:
+    """Stands in for AsyncOpenAI(); each completion takes latency seconds"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=self)
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        message = SimpleNamespace(role="assistant", content="Happy to help with your schedule.")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")])
+
+
+class Connection:
+    """Minimal keep-alive HTTP/1.1 JSON client"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, payload=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload).encode() if payload is not None else b""
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n")
+        self.writer.write(head.encode() + body)
+        await self.writer.drain()
+
+        lines = (await self.reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+        status = int(lines[0].split()[1])
+        headers = {k.strip().lower(): v.strip() for k, v in (l.split(":", 1) for l in lines[1:] if ":" in l)}
+        data = await self.reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, json.loads(data) if data else None
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+def make_request(rng: random.Random, user: str, i: int):
+    """(kind, method, path, payload) for one randomly chosen operation"""
+    base = f"/users/{user}"
+    roll = rng.random()
+    day = 1 + rng.randrange(28)
+    if roll < 0.15:
+        return "chat_tool", "POST", f"{base}/chat", {"message": f"add task follow up {i}"}
+    if roll < 0.30:
+        return "chat_llm", "POST", f"{base}/chat", {"message": f"Any advice for week {i}?"}
+    if roll < 0.50:
+        hour = 9 + rng.randrange(8)
+        return "create_event", "POST", f"{base}/events", {
+            "title": f"Load {i}", "start_time": f"2030-01-{day:02d}T{hour:02d}:00:00",
+            "end_time": f"2030-01-{day:02d}T{hour:02d}:30:00",
+        }
+    if roll < 0.65:
+        return "create_task", "POST", f"{base}/tasks", {"title": f"Task {i}", "priority": "high"}
+    if roll < 0.85:
+        return "list_events", "GET", f"{base}/events?date=2030-01-{day:02d}", None
+    if roll < 0.95:
+        return "list_tasks", "GET", f"{base}/tasks?status=pending", None
+    return "free_slots", "GET", f"{base}/free-slots?start=2030-01-{day:02d}T09:00:00&days=3", None
+
+
+async def client(host: str, port: int, args, seed: int, latencies, statuses):
+    rng = random.Random(seed)
+    conn = Connection(host, port)
+    try:
+        for i in range(args.requests):
+            user = f"user{rng.randrange(args.users)}"
+            kind, method, path, payload = make_request(rng, user, i)
+            started = time.perf_counter()
+            status, _ = await conn.request(method, path, payload)
+            latencies[kind].append((time.perf_counter() - started) * 1000)
+            statuses[status] += 1
+    finally:
+        conn.close()
+
+
+async def run(args):
+    listener = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        data_dir = tempfile.mkdtemp(prefix="load-test-")
+        fake = FakeAsyncOpenAI(args.llm_ms / 1000)
+        sessions = SessionManager(data_dir, agent_class=AsyncSchedulingAgent, client=fake,
+                                  response_cache=ResponseCache(max_entries=0))
+        server = SchedulingServer(sessions, max_pending=args.max_pending)
+        listener = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+        host, port = listener.sockets[0].getsockname()[:2]
+
+    latencies = defaultdict(list)
+    statuses = Counter()
+    started = time.perf_counter()
+    await asyncio.gather(*(client(host, port, args, seed, latencies, statuses) for seed in range(args.clients)))
+    elapsed = time.perf_counter() - started
+
+    if listener is not None:
+        listener.close()
+        await listener.wait_closed()
+        sessions.close()
+
+    total = sum(statuses.values())
+    print(f"{total} requests from {args.clients} connections in {elapsed:.2f} s "
+          f"({total / elapsed:.0f} req/s); statuses {dict(sorted(statuses.items()))}")
+    for kind in sorted(latencies):
+        samples = sorted(latencies[kind])
+        p95 = samples[max(int(len(samples) * 0.95) - 1, 0)]
+        print(f"  {kind:<13} n={len(samples):<5} p50 {statistics.median(samples):7.1f} ms   "
+              f"p95 {p95:7.1f} ms   max {samples[-1]:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="target a running server instead of starting one")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=40, help="requests per connection")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--llm-ms", type=float, default=200, help="fake LLM latency")
+    parser.add_argument("--max-pending", type=int, default=256)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""Regression benchmarks for the managers, the free-slot search, view_schedule and chat.
+
+run: for each --sizes N, writes a seeded schedule of N events and N
+tasks (see synthetic.py), then times CalendarManager.add_event (plain
+and with the suggest conflict policy), get_events (one day and all),
+remove_event, TaskManager.get_tasks, get_urgent_tasks,
+update_task_status, SchedulingTools.find_available_time, view_schedule
+and end-to-end SchedulingAgent.chat against an in-process fake OpenAI
+client. Mutations go to a store with deferred writes; the final flush
+is timed on its own. Results are written as JSON.
+
+compare: reads two result files and flags operations whose median got
+slower by more than --threshold; the exit status is 1 when any did.
+
+Usage:
+    python benchmarks/suite.py run --sizes 1000,10000,100000 --out results.json
+    python benchmarks/suite.py compare baseline.json results.json [--threshold 0.25]
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Sequence
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from synthetic import BASE_DATE, STATUSES, write_schedule
+from src.agent import SchedulingAgent
+from src.llm_cache import ResponseCache
+from src.storage import ScheduleStore, open_backend
+from src.storage.migrate import migrate_json_to_sqlite
+from src.tools import CalendarManager, SchedulingTools, TaskManager
+import view_schedule as view_schedule_module
+
+CHAT_COMMANDS = [
+    "Schedule a meeting called 'Sync' at 3pm on {day}",
+    "Show events for {day}",
+    "Find available time for a 1-hour meeting on {day}",
+    "Add a task called 'Prep {n}' with high priority",
+    "mark task {task} as completed",
+    "Any tips for a busy week?",
+]
+
+
+class FakeOpenAI:
+    """Stands in for OpenAI(); answers instantly so chat timings are all local work"""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        self.calls += 1
+        message = SimpleNamespace(role="assistant", content="Happy to help with that.")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")])
+
+
+def timed(fn: Callable, calls: Sequence) -> Dict[str, float]:
+    """Per-call latency summary of fn over calls (each a tuple of arguments)"""
+    samples = []
+    for args in calls:
+        started = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "calls": len(samples),
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": statistics.median(samples),
+        "p95_ms": samples[max(int(len(samples) * 0.95) - 1, 0)],
+        "total_s": sum(samples) / 1000,
+    }
+
+
+def open_store(path: str, backend: str) -> ScheduleStore:
+    """Store over the generated schedule with deferred writes"""
+    db_file = os.path.splitext(path)[0] + ".db"
+    if backend == "sqlite" and not os.path.exists(db_file):
+        migrate_json_to_sqlite(path, db_file)
+    return ScheduleStore(path, backend=open_backend(path, backend), flush_interval=3600)
+
+
+def day_string(rng: random.Random, days: int) -> str:
+    return (BASE_DATE + timedelta(days=rng.randrange(days))).strftime("%Y-%m-%d")
+
+
+def run_size(size: int, args, data_dir: str) -> Dict[str, Dict[str, float]]:
+    rng = random.Random(args.seed)
+    path = os.path.join(data_dir, "data", "schedule.json")
+    write_schedule(path, size, size, args.seed, args.days)
+    # Operations that format or write every record run fewer times on big schedules
+    heavy = max(1, min(args.calls, 1_000_000 // size))
+    results = {}
+
+    opened = []
+    results["load"] = timed(lambda: opened.append(open_store(path, args.backend)), [()] * 3)
+    for extra in opened[:-1]:
+        extra.close()
+    store = opened[-1]
+    calendar = CalendarManager(store=store)
+    tasks = TaskManager(store=store)
+
+    days = [(day_string(rng, args.days),) for _ in range(args.calls)]
+    results["get_events_day"] = timed(calendar.get_events, days)
+    results["get_events_all"] = timed(calendar.get_events, [()] * heavy)
+
+    new_events = [(f"Bench {i}", f"{day_string(rng, args.days)}T{rng.randrange(9, 17):02d}:00:00",
+                   None) for i in range(args.calls)]
+    results["add_event"] = timed(calendar.add_event, new_events)
+    checked = [(f"Checked {i}", f"{day_string(rng, args.days)}T{rng.randrange(9, 17):02d}:00:00",
+                None, "", "", "suggest") for i in range(args.calls)]
+    results["add_event_suggest"] = timed(calendar.add_event, checked)
+    removals = [(event_id,) for event_id in rng.sample(range(1, size + 1), min(args.calls, size))]
+    results["remove_event"] = timed(calendar.remove_event, removals)
+
+    results["get_tasks"] = timed(tasks.get_tasks, [(rng.choice(STATUSES),) for _ in range(heavy)])
+    results["get_urgent_tasks"] = timed(tasks.get_urgent_tasks, [(10,)] * args.calls)
+    updates = [(rng.randrange(1, size + 1), rng.choice(STATUSES)) for _ in range(args.calls)]
+    results["update_task_status"] = timed(tasks.update_task_status, updates)
+
+    def find_time(day: str):
+        start = datetime.fromisoformat(day)
+        busy = store.busy_intervals(start, start + timedelta(days=8))
+        SchedulingTools.find_available_time([], duration_hours=1, start_date=day, busy=busy)
+
+    results["find_available_time"] = timed(find_time, days)
+    results["flush"] = timed(store.flush, [()])
+    store.close()
+
+    # view_schedule reads data/schedule.json relative to the working directory
+    cwd = os.getcwd()
+    os.chdir(data_dir)
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            results["view_schedule"] = timed(view_schedule_module.view_schedule, [()] * heavy)
+    finally:
+        os.chdir(cwd)
+
+    store = open_store(path, args.backend)
+    agent = SchedulingAgent(client=FakeOpenAI(), store=store, response_cache=ResponseCache(max_entries=0))
+    turns = [(CHAT_COMMANDS[i % len(CHAT_COMMANDS)].format(
+        day=day_string(rng, args.days), n=i, task=rng.randrange(1, size + 1)),) for i in range(heavy)]
+    results["chat"] = timed(agent.chat, turns)
+    store.close()
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def run(args):
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": args.backend,
+            "seed": args.seed,
+            "calls": args.calls,
+        },
+        "results": {},
+    }
+    for size in [int(size) for size in args.sizes.split(",")]:
+        with tempfile.TemporaryDirectory() as data_dir:
+            results = run_size(size, args, data_dir)
+        report["results"][str(size)] = results
+        print(f"\n{size} events + {size} tasks")
+        for name, result in results.items():
+            print(f"  {name:<20} p50 {result['p50_ms']:10.3f} ms   p95 {result['p95_ms']:10.3f} ms   "
+                  f"n={result['calls']}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.out}")
+
+
+def compare(args) -> int:
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    for key in ("backend", "calls", "python", "platform"):
+        if baseline["meta"].get(key) != current["meta"].get(key):
+            print(f"note: {key} differs ({baseline['meta'].get(key)} vs {current['meta'].get(key)})")
+
+    regressions: List[str] = []
+    print(f"{'size':>8}  {'operation':<20} {'base p50':>11} {'new p50':>11} {'change':>8}")
+    for size, operations in current["results"].items():
+        for name, result in operations.items():
+            base = baseline["results"].get(size, {}).get(name)
+            if base is None:
+                continue
+            before, after = base["p50_ms"], result["p50_ms"]
+            change = (after - before) / before if before else 0.0
+            # Sub-resolution differences are noise, however large in relative terms
+            regressed = change > args.threshold and after - before > args.min_ms
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{size:>8}  {name:<20} {before:9.3f}ms {after:9.3f}ms {change:+7.1%}{flag}")
+            if regressed:
+                regressions.append(f"{name} @ {size}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print(f"\nNo regressions over {args.threshold:.0%}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="time the operations and write JSON results")
+    run_parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated schedule sizes")
+    run_parser.add_argument("--calls", type=int, default=200, help="calls per operation")
+    run_parser.add_argument("--days", type=int, default=365, help="days the generated schedule spans")
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--backend", default="json", choices=("json", "journal", "sqlite"))
+    run_parser.add_argument("--out", default="benchmarks/results.json")
+
+    compare_parser = commands.add_parser("compare", help="flag regressions between two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    compare_parser.add_argument("--min-ms", type=float, default=0.01, help="ignore smaller absolute changes")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Seeded synthetic schedules for benchmarks.
+
+Events are spread over --days starting at BASE_DATE, on 15-minute
+boundaries in working hours, lasting 15 minutes to 2 hours. Tasks get a
+status, priority and (mostly) a due date in the same window. The same
+seed always yields the same schedule.
+
+Usage: python benchmarks/synthetic.py --events 100000 --tasks 100000 --out data/bench_schedule.json
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, List, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.storage.json_backend import write_json_atomic
+
+BASE_DATE = datetime(2030, 1, 1)
+STATUSES = ("pending", "in_progress", "completed")
+PRIORITIES = ("low", "medium", "high")
+DURATIONS = (15, 30, 45, 60, 90, 120)
+
+
+def make_events(count: int, seed: int = 42, days: int = 365) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    created = BASE_DATE.isoformat()
+    events = []
+    for i in range(1, count + 1):
+        start = BASE_DATE + timedelta(days=rng.randrange(days), minutes=8 * 60 + 15 * rng.randrange(40))
+        end = start + timedelta(minutes=rng.choice(DURATIONS))
+        events.append({
+            "id": i,
+            "title": f"Event {i}",
+            "start_time": start.isoformat(),
+            "end_time": end.isoformat(),
+            "description": "",
+            "location": rng.choice(("", "", "Room A", "Room B", "Online")),
+            "created_at": created,
+        })
+    return events
+
+
+def make_tasks(count: int, seed: int = 42, days: int = 365) -> List[Dict[str, Any]]:
+    rng = random.Random(seed + 1)
+    created = BASE_DATE.isoformat()
+    tasks = []
+    for i in range(1, count + 1):
+        due = BASE_DATE + timedelta(days=rng.randrange(days), hours=17) if rng.random() < 0.8 else None
+        tasks.append({
+            "id": i,
+            "title": f"Task {i}",
+            "due_date": due.isoformat() if due else None,
+            "priority": rng.choice(PRIORITIES),
+            "description": "",
+            "status": rng.choice(STATUSES),
+            "created_at": created,
+        })
+    return tasks
+
+
+def make_schedule(events: int, tasks: int, seed: int = 42, days: int = 365) -> Dict[str, Any]:
+    return {"events": make_events(events, seed, days), "tasks": make_tasks(tasks, seed, days)}
+
+
+def write_schedule(path: str, events: int, tasks: int, seed: int = 42, days: int = 365):
+    """Generate a schedule and write it as a compact schedule.json"""
+    write_json_atomic(path, make_schedule(events, tasks, seed, days), indent=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="data/bench_schedule.json")
+    args = parser.parse_args()
+    write_schedule(args.out, args.events, args.tasks, args.seed, args.days)
+    print(f"Wrote {args.events} events and {args.tasks} tasks to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -49,9 +49,11 @@ def main():
                     print(f"{i}. {example}")
                 continue
             
-            # Get response from agent
-            response = agent.chat(user_input)
-            print(f"\n📅 Agent: {response}")
+            # Stream the response from the agent as it arrives
+            print("\n📅 Agent: ", end="", flush=True)
+            for chunk in agent.chat_stream(user_input):
+                print(chunk, end="", flush=True)
+            print()
             
         except KeyboardInterrupt:
             print("\n\nGoodbye! 👋")
@@ -1,111 +1,48 @@
 import os
-import json
-import re
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
-from openai import OpenAI
-from dotenv import load_dotenv
-from dateutil import parser
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Any, Iterator, Optional
+from src.env import load_env, require_api_key
+from src.memory import ConversationMemory
+from src.router import default_router
+from src.storage import ScheduleStore
+from src.tools.time_parsing import parse_time, preprocess_time_string
 
 # Load environment variables
-load_dotenv()
+load_env()
 
 # Settings
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
-
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY not found in environment variables")
-
-# Memory System
-@dataclass
-class Message:
-    role: str
-    content: str
-
-class ConversationMemory:
-    def __init__(self, max_messages: int = 20):
-        self.messages: List[Message] = []
-        self.max_messages = max_messages
-    
-    def add_message(self, role: str, content: str):
-        message = Message(role=role, content=content)
-        self.messages.append(message)
-        if len(self.messages) > self.max_messages:
-            self.messages = self.messages[-self.max_messages:]
-    
-    def get_conversation_history(self) -> List[Dict[str, str]]:
-        return [{"role": msg.role, "content": msg.content} for msg in self.messages]
-    
-    def clear_memory(self):
-        self.messages = []
+SCHEDULE_FLUSH_INTERVAL = float(os.getenv("SCHEDULE_FLUSH_INTERVAL", "5"))
 
 # Calendar Manager with improved time parsing
 class CalendarManager:
-    def __init__(self, data_file: str = "data/schedule.json"):
+    def __init__(self, data_file: str = "data/schedule.json", store: Optional[ScheduleStore] = None):
         self.data_file = data_file
-        self.schedule = self._load_schedule()
-    
-    def _load_schedule(self) -> Dict[str, Any]:
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return {"events": [], "tasks": []}
-        return {"events": [], "tasks": []}
+        self.store = store or ScheduleStore(data_file)
     
-    def _save_schedule(self):
-        os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-        with open(self.data_file, 'w') as f:
-            json.dump(self.schedule, f, indent=2)
+    @property
+    def schedule(self) -> Dict[str, Any]:
+        return self.store.schedule
     
     def _preprocess_time_string(self, time_str: str) -> str:
         """Preprocess natural language time strings for better parsing"""
-        time_str = time_str.lower().strip()
-        
-        # Handle relative days
-        if 'tomorrow' in time_str:
-            tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
-            time_str = time_str.replace('tomorrow', tomorrow)
-        elif 'today' in time_str:
-            today = datetime.now().strftime('%Y-%m-%d')
-            time_str = time_str.replace('today', today)
-        
-        # Handle time formats
-        if 'pm' in time_str:
-            time_str = time_str.replace('pm', '').strip() + ' PM'
-        elif 'am' in time_str:
-            time_str = time_str.replace('am', '').strip() + ' AM'
-        
-        # If no date specified, assume today
-        if not any(char.isdigit() and len(part) == 4 for part in time_str.split() for char in part):
-            # No year found, add today's date
-            today = datetime.now().strftime('%Y-%m-%d ')
-            time_str = today + time_str
-        
-        return time_str
+        return preprocess_time_string(time_str, date.today())
     
     def add_event(self, title: str, start_time: str, end_time: Optional[str] = None, 
                  description: str = "", location: str = "") -> str:
         """Add a new event to the calendar with better natural language parsing"""
         try:
-            # Preprocess the time string
-            processed_time = self._preprocess_time_string(start_time)
-            
-            # Parse the processed time
-            start_dt = parser.parse(processed_time)
+            # Preprocess and parse the time string (cached per input and day)
+            start_dt = parse_time(start_time, preprocess=True)
             
             # Set end time (default to 1 hour later if not specified)
             if end_time:
-                processed_end_time = self._preprocess_time_string(end_time)
-                end_dt = parser.parse(processed_end_time)
+                end_dt = parse_time(end_time, preprocess=True)
             else:
                 end_dt = start_dt + timedelta(hours=1)
             
             event = {
-                "id": len(self.schedule["events"]) + 1,
                 "title": title,
                 "start_time": start_dt.isoformat(),
                 "end_time": end_dt.isoformat(),
@@ -114,8 +51,7 @@ class CalendarManager:
                 "created_at": datetime.now().isoformat()
             }
             
-            self.schedule["events"].append(event)
-            self._save_schedule()
+            self.store.insert("events", event)
             
             return f"Event '{title}' scheduled for {start_dt.strftime('%Y-%m-%d %H:%M')}"
             
@@ -125,58 +61,62 @@ class CalendarManager:
     def get_events(self, date: Optional[str] = None) -> str:
         try:
             if date:
-                processed_date = self._preprocess_time_string(date)
-                target_date = parser.parse(processed_date).date()
-                events = [
-                    event for event in self.schedule["events"]
-                    if parser.parse(event["start_time"]).date() == target_date
-                ]
+                target_date = parse_time(date, preprocess=True).date()
+                events = self.store.events_on(target_date)
             else:
-                events = self.schedule["events"]
+                events = self.store.all_events()
             
-            if not events:
-                return "No events found."
-            
-            result = []
-            for event in sorted(events, key=lambda x: x["start_time"]):
-                start = parser.parse(event["start_time"])
-                end = parser.parse(event["end_time"])
-                result.append(
-                    f"{event['id']}. {event['title']}: {start.strftime('%Y-%m-%d %H:%M')} to {end.strftime('%H:%M')}"
-                )
-            
-            return "\n".join(result)
+            return self._format_events(events)
             
         except Exception as e:
             return f"Error retrieving events: {str(e)}"
+    
+    def events_between(self, start: str, end: str) -> List[Dict[str, Any]]:
+        """Events overlapping the [start, end) window, ordered by start time"""
+        start_dt = parse_time(start, preprocess=True)
+        end_dt = parse_time(end, preprocess=True)
+        return self.store.events_between(start_dt, end_dt)
+    
+    def get_events_between(self, start: str, end: str) -> str:
+        try:
+            return self._format_events(self.events_between(start, end))
+        except Exception as e:
+            return f"Error retrieving events: {str(e)}"
+    
+    def remove_event(self, event_id: int) -> str:
+        if self.store.delete("events", event_id) is not None:
+            return f"Event {event_id} removed successfully."
+        return f"Event {event_id} not found."
+    
+    def _format_events(self, events: List[Dict[str, Any]]) -> str:
+        if not events:
+            return "No events found."
+        
+        result = []
+        for event in events:
+            start, end = self.store.event_span(event)
+            result.append(
+                f"{event['id']}. {event['title']}: {start.strftime('%Y-%m-%d %H:%M')} to {end.strftime('%H:%M')}"
+            )
+        
+        return "\n".join(result)
 
 # Task Manager (unchanged)
 class TaskManager:
-    def __init__(self, data_file: str = "data/schedule.json"):
+    def __init__(self, data_file: str = "data/schedule.json", store: Optional[ScheduleStore] = None):
         self.data_file = data_file
-        self.schedule = self._load_schedule()
-    
-    def _load_schedule(self) -> Dict[str, Any]:
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return {"events": [], "tasks": []}
-        return {"events": [], "tasks": []}
+        self.store = store or ScheduleStore(data_file)
     
-    def _save_schedule(self):
-        os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-        with open(self.data_file, 'w') as f:
-            json.dump(self.schedule, f, indent=2)
+    @property
+    def schedule(self) -> Dict[str, Any]:
+        return self.store.schedule
     
     def add_task(self, title: str, due_date: Optional[str] = None, 
                 priority: str = "medium", description: str = "") -> str:
         try:
-            due_dt = parser.parse(due_date) if due_date else None
+            due_dt = parse_time(due_date) if due_date else None
             
             task = {
-                "id": len(self.schedule["tasks"]) + 1,
                 "title": title,
                 "due_date": due_dt.isoformat() if due_dt else None,
                 "priority": priority,
@@ -185,8 +125,7 @@ class TaskManager:
                 "created_at": datetime.now().isoformat()
             }
             
-            self.schedule["tasks"].append(task)
-            self._save_schedule()
+            self.store.insert("tasks", task)
             
             due_info = f" due {due_dt.strftime('%Y-%m-%d')}" if due_dt else ""
             return f"Task '{title}' added{due_info} with {priority} priority."
@@ -196,17 +135,15 @@ class TaskManager:
     
     def get_tasks(self, status: Optional[str] = None) -> str:
         try:
-            if status:
-                tasks = [task for task in self.schedule["tasks"] if task["status"] == status]
-            else:
-                tasks = self.schedule["tasks"]
+            tasks = self.store.tasks(status)
             
             if not tasks:
                 return "No tasks found."
             
             result = []
             for task in tasks:
-                due_info = f" (Due: {parser.parse(task['due_date']).strftime('%Y-%m-%d')})" if task["due_date"] else ""
+                due_dt = self.store.task_due(task)
+                due_info = f" (Due: {due_dt.strftime('%Y-%m-%d')})" if due_dt else ""
                 result.append(
                     f"{task['id']}. {task['title']} [{task['priority']}] - {task['status']}{due_info}"
                 )
@@ -219,11 +156,18 @@ class TaskManager:
 # Enhanced Scheduling Agent
 class SchedulingAgent:
     def __init__(self, system_prompt: Optional[str] = None):
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
+        # Created on first use; see the client property
+        self._client = None
         self.model = OPENAI_MODEL
         self.memory = ConversationMemory()
-        self.calendar = CalendarManager()
-        self.task_manager = TaskManager()
+        # One store for both managers; writes are flushed at the end of each turn
+        self.store = ScheduleStore(flush_interval=SCHEDULE_FLUSH_INTERVAL)
+        self.calendar = CalendarManager(store=self.store)
+        self.task_manager = TaskManager(store=self.store)
+        # The same intent table as src/agent.py; intents without a handler here go to the LLM
+        self.router = default_router()
+        # Seconds to first output and to the complete reply for the last turn
+        self.last_timing: Dict[str, float] = {}
         
         self.system_prompt = system_prompt or """You are a scheduling assistant. You can:
         - Schedule events and meetings
@@ -236,117 +180,130 @@ class SchedulingAgent:
         
         self.memory.add_message("system", self.system_prompt)
     
+    @property
+    def client(self) -> Any:
+        """The OpenAI client, created on the first LLM call"""
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=require_api_key())
+        return self._client
+    
     def chat(self, user_input: str) -> str:
+        started = time.perf_counter()
         self.memory.add_message("user", user_input)
         
-        # Handle scheduling commands first
-        tool_response = self._handle_scheduling_commands(user_input)
-        
-        if tool_response:
-            # If we handled it with tools, use that response
-            final_response = tool_response
-        else:
-            # Otherwise, use OpenAI
-            messages = self.memory.get_conversation_history()
-            final_response = self._generate_response(messages)
+        try:
+            # Handle scheduling commands first
+            tool_response = self._handle_scheduling_commands(user_input)
+            
+            if tool_response:
+                # If we handled it with tools, use that response
+                final_response = tool_response
+            else:
+                # Otherwise, use OpenAI
+                messages = self.memory.get_conversation_history()
+                final_response = self._generate_response(messages)
+            
+            self.memory.add_message("assistant", final_response)
+            elapsed = time.perf_counter() - started
+            self.last_timing = {"first_token": elapsed, "total": elapsed}
+            return final_response
+        finally:
+            # Persist this turn's schedule changes in a single write
+            self.store.flush()
+    
+    def chat_stream(self, user_input: str) -> Iterator[str]:
+        """Like chat, but yield LLM replies in pieces as they stream in"""
+        started = time.perf_counter()
+        self.last_timing = {}
+        self.memory.add_message("user", user_input)
+        parts: List[str] = []
         
-        self.memory.add_message("assistant", final_response)
-        return final_response
+        try:
+            tool_response = self._handle_scheduling_commands(user_input)
+            self.store.flush()
+            
+            if tool_response:
+                chunks = [tool_response]
+            else:
+                chunks = self._stream_response(self.memory.get_conversation_history())
+            
+            for chunk in chunks:
+                if not parts:
+                    self.last_timing = {"first_token": time.perf_counter() - started}
+                parts.append(chunk)
+                yield chunk
+            
+            self.last_timing["total"] = time.perf_counter() - started
+        finally:
+            # Record the reply (or what arrived of it) once streaming stops
+            if parts:
+                self.memory.add_message("assistant", "".join(parts))
+            self.store.flush()
     
     def _handle_scheduling_commands(self, user_input: str) -> Optional[str]:
-        input_lower = user_input.lower()
-        
-        # Schedule event patterns
-        if any(word in input_lower for word in ['schedule', 'meeting', 'appointment', 'event', 'calendar']):
-            return self._handle_calendar_commands(user_input)
-        
-        # Task patterns
-        elif any(word in input_lower for word in ['task', 'todo', 'reminder', 'due', 'add task']):
-            return self._handle_task_commands(user_input)
+        """Route the input with the shared intent table and run the matching handler"""
+        intent = self.router.route(user_input)
+        handler = getattr(self, f"_handle_{intent.name}", None) if intent else None
+        if handler is None:
+            return None
         
-        # View patterns
-        elif any(word in input_lower for word in ['show', 'view', 'list', 'get', 'what\'s on', 'events', 'tasks']):
-            return self._handle_view_commands(user_input)
-        
-        return None
-    
-    def _handle_calendar_commands(self, user_input: str) -> str:
         try:
-            input_lower = user_input.lower()
-            
-            # Extract meeting details using improved pattern matching
-            if 'schedule' in input_lower or 'meeting' in input_lower or 'appointment' in input_lower:
-                # Extract title - look for phrases after schedule/meeting
-                title_match = re.search(r'(?:schedule|meeting|appointment) (?:called|named|for|with|about) ["\']?([^"\']+)["\']?', input_lower)
-                if not title_match:
-                    # Alternative pattern for "schedule meeting with X at Y"
-                    title_match = re.search(r'(?:schedule|meeting|appointment) (?:with|for) ([^\.]+?)(?:at|on|for|$)', input_lower)
-                
-                # Extract time
-                time_match = re.search(r'(?:at|on) ([^\.]+?)(?:\.|$|for|with|about)', input_lower)
-                
-                # Extract participants
-                participants = []
-                people_match = re.findall(r'(?:with|meeting) (\w+)', input_lower)
-                if people_match:
-                    participants = [name.capitalize() for name in people_match if name not in ['at', 'on', 'for', 'about', 'schedule', 'meeting']]
-                
-                # Extract purpose/topic
-                purpose_match = re.search(r'(?:about|regarding|related to) ([^\.]+)', input_lower)
-                
-                if time_match:
-                    title = title_match.group(1).strip() if title_match else "Meeting"
-                    time_str = time_match.group(1).strip()
-                    
-                    # Build description with participants and purpose
-                    description_parts = []
-                    if participants:
-                        description_parts.append(f"Participants: {', '.join(participants)}")
-                    if purpose_match:
-                        purpose = purpose_match.group(1).strip()
-                        description_parts.append(f"Topic: {purpose}")
-                    
-                    description = ". ".join(description_parts) if description_parts else ""
-                    
-                    return self.calendar.add_event(title, time_str, description=description)
-                
-            # View events
-            elif 'show events' in input_lower or 'view calendar' in input_lower:
-                date_match = re.search(r'(?:on|for) (.*?)(?:\.|$|please)', input_lower)
-                date_str = date_match.group(1).strip() if date_match else None
-                return self.calendar.get_events(date_str)
-                
+            return handler(intent.slots)
         except Exception as e:
-            return f"Error handling calendar command: {str(e)}"
-        
-        return ""
+            return f"Error handling {intent.group} command: {str(e)}"
     
-    def _handle_task_commands(self, user_input: str) -> str:
+    @staticmethod
+    def _slot_time(text: Optional[str]) -> Optional[datetime]:
+        """A time slot as a datetime, or None if it does not read as one"""
+        if not text:
+            return None
         try:
-            # Add task
-            if 'add task' in user_input.lower() or 'create task' in user_input.lower():
-                task_match = re.search(r'(?:add|create) task ["\']?([^"\']+)["\']?', user_input, re.IGNORECASE)
-                if task_match:
-                    title = task_match.group(1).strip()
-                    return self.task_manager.add_task(title)
-            
-            # View tasks
-            elif 'show tasks' in user_input.lower() or 'list tasks' in user_input.lower():
-                status_match = re.search(r'(?:with status|that are) (\w+)', user_input, re.IGNORECASE)
-                status = status_match.group(1).strip() if status_match else None
-                return self.task_manager.get_tasks(status)
-                
-        except Exception as e:
-            return f"Error handling task command: {str(e)}"
+            return parse_time(text, preprocess=True)
+        except (ValueError, OverflowError):
+            return None
+    
+    def _handle_add_event(self, slots: Dict[str, Any]) -> str:
+        start = self._slot_time(slots.get("time"))
+        if start is None:
+            return ""
+        title = slots.get("title")
+        if not title:
+            title = f"Meeting with {', '.join(slots['participants'])}" if slots.get("participants") else "Meeting"
         
-        return ""
+        # Build description with participants and purpose
+        description_parts = []
+        if slots.get("participants"):
+            description_parts.append(f"Participants: {', '.join(slots['participants'])}")
+        if slots.get("topic"):
+            description_parts.append(f"Topic: {slots['topic']}")
+        
+        end_time = (start + timedelta(hours=slots["duration"])).isoformat() if slots.get("duration") else None
+        return self.calendar.add_event(title, start.isoformat(), end_time, description=". ".join(description_parts))
     
-    def _handle_view_commands(self, user_input: str) -> str:
-        if 'events' in user_input.lower():
+    def _handle_show_events(self, slots: Dict[str, Any]) -> str:
+        day = slots.get("time")
+        if not day:
             return self.calendar.get_events()
-        elif 'tasks' in user_input.lower():
-            return self.task_manager.get_tasks()
-        return ""
+        if day.lower().endswith("week"):
+            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            monday = today - timedelta(days=today.weekday())
+            if day.lower().startswith("next"):
+                monday += timedelta(days=7)
+            return self.calendar.get_events_between(monday.isoformat(), (monday + timedelta(days=7)).isoformat())
+        start = self._slot_time(day)
+        return self.calendar.get_events(start.date().isoformat()) if start else ""
+    
+    def _handle_add_task(self, slots: Dict[str, Any]) -> str:
+        due = slots.get("time")
+        due_date = self._slot_time(due) if due else None
+        if not slots.get("title") or (due and due_date is None):
+            return ""
+        return self.task_manager.add_task(slots["title"], due_date.isoformat() if due_date else None,
+                                          priority=slots.get("priority", "medium").lower())
+    
+    def _handle_list_tasks(self, slots: Dict[str, Any]) -> str:
+        return self.task_manager.get_tasks(slots.get("status"))
     
     def _generate_response(self, messages: List[Dict[str, str]]) -> str:
         try:
@@ -365,6 +322,28 @@ class SchedulingAgent:
         except Exception as e:
             return f"Error: {str(e)}"
     
+    def _stream_response(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=500,
+                temperature=0.7,
+                stream=True
+            )
+            
+            received = False
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    received = True
+                    yield chunk.choices[0].delta.content
+            
+            if not received:
+                yield "Sorry, I encountered an error processing your request."
+                
+        except Exception as e:
+            yield f"Error: {str(e)}"
+    
     def clear_conversation(self):
         self.memory.clear_memory()
         self.memory.add_message("system", self.system_prompt)
@@ -414,8 +393,10 @@ def main():
                     print(f"{i}. {example}")
                 continue
             
-            response = agent.chat(user_input)
-            print(f"\n📅 Agent: {response}")
+            print("\n📅 Agent: ", end="", flush=True)
+            for chunk in agent.chat_stream(user_input):
+                print(chunk, end="", flush=True)
+            print()
             
         except KeyboardInterrupt:
             print("\n\nGoodbye! 👋")
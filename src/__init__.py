@@ -0,0 +1,4 @@
+from src.env import load_env
+
+# Module-level settings throughout the package read os.environ, so .env goes in first
+load_env()
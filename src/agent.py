@@ -1,36 +1,82 @@
 import sys
 import os
-from typing import Dict, List, Any, Optional
-import json
-import re
-from openai import OpenAI
-from dotenv import load_dotenv
+import time
+from typing import Callable, Dict, List, Any, Iterable, Iterator, Optional, Tuple
+from datetime import datetime, timedelta
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from src.env import load_env, require_api_key
+
 # Load environment variables
-load_dotenv()
+load_env()
 
 # Settings
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
-
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY not found in environment variables")
+SCHEDULE_FLUSH_INTERVAL = float(os.getenv("SCHEDULE_FLUSH_INTERVAL", "5"))
+# Rephrase tool results with the LLM instead of rendering them from templates
+AGENT_POLISH = os.getenv("AGENT_POLISH", "").lower() in ("1", "true", "yes")
+AGENT_POLISH_INTENTS = [name for name in os.getenv("AGENT_POLISH_INTENTS", "").split(",") if name]
 
 # Import tools
-from src.tools import CalendarManager, TaskManager, SchedulingTools
-from src.memory import ConversationMemory
-from src.utils import validate_response, retryable_api_call, format_messages
+from src.tools import CalendarManager, TaskManager, SchedulingTools, Participant, parse_time
+from src.storage import ScheduleStore
+from src.llm_cache import ResponseCache, default_cache
+from src.responses import LLM_UNAVAILABLE_REPLY, render_tool_response
+from src.router import Intent, IntentRouter, default_router
+from src.memory import ConversationMemory, tiktoken_counter
+from src.metrics import Metrics, default_metrics
+from src.utils import CircuitOpenError, ResilientCaller, default_caller, is_retryable, validate_response
+
+_shared_client: Any = None
+
+
+def shared_client() -> Any:
+    """One OpenAI client, and so one pooled HTTP connection pool, for every agent in the process.
+    
+    openai is imported and the API key checked on the first call, so
+    importing this module and tool-only turns work without either.
+    """
+    global _shared_client
+    if _shared_client is None:
+        from openai import OpenAI
+        # Retries are handled by ResilientCaller, so the client's own are turned off
+        _shared_client = OpenAI(api_key=require_api_key(), max_retries=0)
+    return _shared_client
+
 
 class SchedulingAgent:
-    def __init__(self, system_prompt: Optional[str] = None):
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
+    def __init__(self, system_prompt: Optional[str] = None, client: Any = None,
+                 store: Optional[ScheduleStore] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 polish: bool = AGENT_POLISH, polish_intents: Iterable[str] = AGENT_POLISH_INTENTS,
+                 router: Optional[IntentRouter] = None, llm: Optional[ResilientCaller] = None,
+                 metrics: Optional[Metrics] = None,
+                 directory: Optional[Callable[[str], Optional[Participant]]] = None):
+        # Created on first use; see the client property
+        self._client = client
+        # Retry, timeout, hedging and circuit-breaker policy for LLM calls
+        self.llm = llm or default_caller()
         self.model = OPENAI_MODEL
-        self.memory = ConversationMemory()
-        self.calendar = CalendarManager()
-        self.task_manager = TaskManager()
+        self.sampling = {"max_tokens": 500, "temperature": 0.7}
+        self.response_cache = response_cache or default_cache()
+        # Tool results go through the LLM only when polishing is on for the agent or the intent
+        self.polish = polish
+        self.polish_intents = set(polish_intents)
+        self.router = router or default_router()
+        # Per-stage latency histograms and counters, shared process-wide by default
+        self.metrics = metrics or default_metrics()
+        # Looks up other attendees by name for common-availability searches
+        # (SessionManager.participant when serving many users)
+        self.directory = directory
+        # Seconds to first output and to the complete reply for the last turn
+        self.last_timing: Dict[str, float] = {}
+        self.memory = ConversationMemory(token_counter=tiktoken_counter(self.model))
+        # One store for both managers; writes are flushed at the end of each turn
+        self.store = store or ScheduleStore(flush_interval=SCHEDULE_FLUSH_INTERVAL)
+        self.calendar = CalendarManager(store=self.store)
+        self.task_manager = TaskManager(store=self.store)
         
         # Enhanced system prompt for scheduling
         self.system_prompt = system_prompt or """You are a scheduling assistant. You can:
@@ -44,131 +90,344 @@ class SchedulingAgent:
         
         self.memory.add_message("system", self.system_prompt)
     
+    @property
+    def client(self) -> Any:
+        """The OpenAI client, created on the first LLM call"""
+        if self._client is None:
+            self._client = self._default_client()
+        return self._client
+    
+    @client.setter
+    def client(self, client: Any):
+        self._client = client
+    
+    def _default_client(self) -> Any:
+        return shared_client()
+    
     def chat(self, user_input: str) -> str:
         """Process user input with scheduling capabilities"""
+        started = time.perf_counter()
         self.memory.add_message("user", user_input)
         messages = self.memory.get_conversation_history()
         
-        # Check for scheduling commands
-        tool_response = self._handle_scheduling_commands(user_input)
+        try:
+            # Check for scheduling commands
+            intent, tool_response = self._dispatch(user_input)
+            
+            if tool_response and not self._should_polish(intent):
+                # Render the tool result locally; no second LLM round trip
+                final_response = render_tool_response(intent.name, tool_response)
+            else:
+                if tool_response:
+                    # Add tool response to context and let the LLM rephrase it
+                    self.memory.add_message("assistant", f"I handled your scheduling request: {tool_response}")
+                    messages = self.memory.get_conversation_history()
+                
+                # Generate final response
+                final_response = self._generate_response(messages)
+            
+            self.memory.add_message("assistant", final_response)
+            
+            elapsed = time.perf_counter() - started
+            self.last_timing = {"first_token": elapsed, "total": elapsed}
+            return final_response
+        finally:
+            # Persist this turn's schedule changes in a single write
+            with self.metrics.span("save"):
+                self.store.flush()
+            self.metrics.observe("turn", time.perf_counter() - started)
+            self.metrics.inc("turns")
+    
+    def chat_stream(self, user_input: str) -> Iterator[str]:
+        """Like chat, but yield the reply in pieces as the LLM streams it.
         
-        if tool_response:
-            # Add tool response to context and generate final response
-            self.memory.add_message("assistant", f"I handled your scheduling request: {tool_response}")
-            messages = self.memory.get_conversation_history()
+        Template-rendered tool replies arrive as a single piece. The full
+        reply is added to memory once the stream ends (or whatever was
+        received, if the caller stops early).
+        """
+        started = time.perf_counter()
+        self.last_timing = {}
+        self.memory.add_message("user", user_input)
+        messages = self.memory.get_conversation_history()
+        parts: List[str] = []
         
-        # Generate final response
-        final_response = self._generate_response(messages)
-        self.memory.add_message("assistant", final_response)
+        try:
+            intent, tool_response = self._dispatch(user_input)
+            # Tool changes are written before the reply starts streaming
+            with self.metrics.span("save"):
+                self.store.flush()
+            
+            if tool_response and not self._should_polish(intent):
+                chunks: Iterable[str] = [render_tool_response(intent.name, tool_response)]
+            else:
+                if tool_response:
+                    self.memory.add_message("assistant", f"I handled your scheduling request: {tool_response}")
+                    messages = self.memory.get_conversation_history()
+                chunks = self._stream_response(messages)
+            
+            for chunk in chunks:
+                if not parts:
+                    self.last_timing = {"first_token": time.perf_counter() - started}
+                parts.append(chunk)
+                yield chunk
+            
+            self.last_timing["total"] = time.perf_counter() - started
+        finally:
+            if parts:
+                self.memory.add_message("assistant", "".join(parts))
+            self.store.flush()
+            self.metrics.observe("turn", time.perf_counter() - started)
+            self.metrics.inc("turns")
+    
+    def _should_polish(self, intent: Intent) -> bool:
+        """Whether a tool result for this intent is rephrased by the LLM"""
+        if not self.llm.available:
+            # Tool-only replies while the LLM backend is failing
+            return False
+        return self.polish or intent.name in self.polish_intents or intent.group in self.polish_intents
+    
+    def _dispatch(self, user_input: str) -> Tuple[Intent, Optional[str]]:
+        """Route the input and run the matching intent handler"""
+        with self.metrics.span("intent"):
+            intent = self.router.route(user_input)
+        if not intent:
+            return intent, None
         
-        return final_response
+        self.metrics.inc(f"intent_{intent.name}")
+        try:
+            with self.metrics.span("tool"):
+                return intent, getattr(self, f"_handle_{intent.name}")(intent)
+        except Exception as e:
+            return intent, f"Error handling {intent.group} command: {str(e)}"
     
     def _handle_scheduling_commands(self, user_input: str) -> Optional[str]:
         """Handle scheduling-related commands"""
-        input_lower = user_input.lower()
+        return self._dispatch(user_input)[1]
+    
+    @staticmethod
+    def _slot_time(text: Optional[str]) -> Optional[datetime]:
+        """A time slot as a datetime, or None if it does not read as one; the LLM then answers instead"""
+        if not text:
+            return None
+        try:
+            return parse_time(text, preprocess=True)
+        except (ValueError, OverflowError):
+            return None
+    
+    def _handle_add_event(self, intent: Intent) -> str:
+        """Schedule an event from the extracted title, time, participants and topic"""
+        slots = intent.slots
+        title = slots.get("title")
+        if not title and slots.get("participants"):
+            title = f"Meeting with {', '.join(slots['participants'])}"
+        # Slot phrases are natural language ("tomorrow at 2:30 PM"); a bare clock time is today
+        start = self._slot_time(slots.get("time"))
+        if not title or start is None:
+            return ""
+        time_str = start.isoformat()
         
-        # Schedule event patterns
-        if any(word in input_lower for word in ['schedule', 'meeting', 'appointment', 'event', 'calendar']):
-            return self._handle_calendar_commands(user_input)
+        description_parts = []
+        if slots.get("participants"):
+            description_parts.append(f"Participants: {', '.join(slots['participants'])}")
+        if slots.get("topic"):
+            description_parts.append(f"Topic: {slots['topic']}")
+        description = ". ".join(description_parts)
         
-        # Task patterns
-        elif any(word in input_lower for word in ['task', 'todo', 'reminder', 'due']):
-            return self._handle_task_commands(user_input)
+        end_time = None
+        if slots.get("duration"):
+            end_time = (start + timedelta(hours=slots["duration"])).isoformat()
         
-        # View patterns
-        elif any(word in input_lower for word in ['show', 'view', 'list', 'get', 'what\'s on']):
-            return self._handle_view_commands(user_input)
+        if slots.get("repeat"):
+            return self.calendar.add_recurring_event(title, time_str, slots["repeat"], end_time,
+                                                     description=description)
+        return self.calendar.add_event(title, time_str, end_time, description=description)
+    
+    def _handle_show_events(self, intent: Intent) -> str:
+        """List events, optionally for one date or for this or next week"""
+        day = intent.slots.get("time")
+        if not day:
+            return self.calendar.get_events()
+        if day.lower().endswith("week"):
+            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            monday = today - timedelta(days=today.weekday())
+            if day.lower().startswith("next"):
+                monday += timedelta(days=7)
+            return self.calendar.get_events_between(monday.isoformat(), (monday + timedelta(days=7)).isoformat())
+        start = self._slot_time(day)
+        if start is None:
+            return ""
+        return self.calendar.get_events(start.date().isoformat())
+    
+    def _handle_find_time(self, intent: Intent) -> str:
+        """Find free slots in the week from the requested day"""
+        day = intent.slots.get("time")
+        start = self._slot_time(day) if day else datetime.now()
+        if start is None:
+            return ""
+        if intent.slots.get("participants") and self.directory is not None:
+            return self._find_common_time(intent.slots["participants"], start if day else None,
+                                          intent.slots.get("duration", 1))
+        # Only events overlapping the search window can block a slot
+        busy = self.calendar.store.busy_intervals(start, start + timedelta(days=8))
+        available_slots = SchedulingTools.find_available_time(
+            [], duration_hours=intent.slots.get("duration", 1),
+            start_date=start.isoformat() if day else None, busy=busy
+        )
+        if isinstance(available_slots, str):
+            return available_slots
+        if available_slots:
+            return f"Available slots: {available_slots[:3]}"  # Show first 3
+        else:
+            return "No available slots found."
+    
+    def _find_common_time(self, names: List[str], start: Optional[datetime], duration: float) -> str:
+        """Find slots free on this calendar and for every named attendee the directory knows"""
+        attendees = [Participant("you", calendar=self.store)]
+        unknown = []
+        for name in names:
+            participant = self.directory(name)
+            if participant is None:
+                unknown.append(name)
+            else:
+                attendees.append(participant)
         
-        return None
+        slots = SchedulingTools.find_common_availability(
+            attendees, duration_hours=duration, start_date=start.isoformat() if start else None
+        )
+        if isinstance(slots, str):
+            return slots
+        note = f" (no calendar found for {', '.join(unknown)})" if unknown else ""
+        if not slots:
+            return f"No common slots found.{note}"
+        best = [{"start": slot["start"], "end": slot["end"]} for slot in slots[:3]]
+        return f"Slots free for {', '.join(p.name for p in attendees)}: {best}{note}"
+    
+    def _handle_add_task(self, intent: Intent) -> str:
+        """Add a task from the extracted title, due date and priority"""
+        title = intent.slots.get("title")
+        due = intent.slots.get("time")
+        due_date = self._slot_time(due) if due else None
+        if not title or (due and due_date is None):
+            return ""
+        return self.task_manager.add_task(
+            title, due_date.isoformat() if due_date else None,
+            priority=intent.slots.get("priority", "medium").lower()
+        )
+    
+    def _handle_list_tasks(self, intent: Intent) -> str:
+        """List tasks: overdue, the most urgent, or all, optionally filtered by status"""
+        slots = intent.slots
+        if slots.get("overdue"):
+            return self.task_manager.get_overdue_tasks()
+        if slots.get("urgent"):
+            return self.task_manager.get_urgent_tasks(slots.get("limit", 5), slots.get("status", "pending"))
+        return self.task_manager.get_tasks(slots.get("status"))
+    
+    def _handle_update_task(self, intent: Intent) -> str:
+        """Change a task's status"""
+        if "task_id" not in intent.slots or "status" not in intent.slots:
+            return ""
+        return self.task_manager.update_task_status(intent.slots["task_id"], intent.slots["status"])
     
-    def _handle_calendar_commands(self, user_input: str) -> str:
-        """Handle calendar-related commands"""
+    def _generate_response(self, messages: List[Dict[str, str]]) -> str:
+        """Generate response using OpenAI API"""
+        cache_key = self._cache_key(messages)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            # Extract event details using simple pattern matching
-            # In a real implementation, you'd use more sophisticated NLP
-            patterns = {
-                'title': r'(?:schedule|meeting|appointment|event) (?:called|named|for) ["\']?([^"\']+)["\']?',
-                'time': r'(?:at|on) (.*?)(?:\.|$|for|with)',
-                'duration': r'(?:for|duration) (\d+) (?:hour|hr|minute|min)'
-            }
-            
-            title_match = re.search(patterns['title'], user_input, re.IGNORECASE)
-            time_match = re.search(patterns['time'], user_input, re.IGNORECASE)
+            with self.metrics.span("llm"):
+                response = self.llm.call(
+                    self.client.chat.completions.create,
+                    model=self.model,
+                    messages=messages,
+                    **self.sampling
+                )
+            self._count_usage(response)
             
-            if title_match and time_match:
-                title = title_match.group(1).strip()
-                time_str = time_match.group(1).strip()
-                
-                # Add common time phrases if missing
-                if not any(word in time_str for word in ['am', 'pm', 'today', 'tomorrow']):
-                    time_str += " today"  # Default to today
+            if validate_response(response):
+                content = response.choices[0].message.content
+                if cache_key:
+                    self.response_cache.put(cache_key, content)
+                return content
+            else:
+                return "Sorry, I encountered an error processing your request."
                 
-                return self.calendar.add_event(title, time_str)
-            
-            elif 'show events' in user_input.lower() or 'view calendar' in user_input.lower():
-                # Extract date if specified
-                date_match = re.search(r'(?:on|for) (.*?)(?:\.|$|please)', user_input, re.IGNORECASE)
-                date_str = date_match.group(1).strip() if date_match else None
-                return self.calendar.get_events(date_str)
-            
-            elif 'available time' in user_input.lower() or 'free slot' in user_input.lower():
-                events = self.calendar.schedule.get("events", [])
-                available_slots = SchedulingTools.find_available_time(events)
-                if available_slots:
-                    return f"Available slots: {available_slots[:3]}"  # Show first 3
-                else:
-                    return "No available slots found."
-            
         except Exception as e:
-            return f"Error handling calendar command: {str(e)}"
-        
-        return ""
+            self.metrics.inc("llm_errors")
+            return self._llm_error_reply(e)
     
-    def _handle_task_commands(self, user_input: str) -> str:
-        """Handle task-related commands"""
-        try:
-            if 'add task' in user_input.lower() or 'create task' in user_input.lower():
-                # Extract task details
-                task_match = re.search(r'(?:add|create) task ["\']?([^"\']+)["\']?', user_input, re.IGNORECASE)
-                if task_match:
-                    title = task_match.group(1).strip()
-                    return self.task_manager.add_task(title)
-            
-            elif 'show tasks' in user_input.lower() or 'list tasks' in user_input.lower():
-                status_match = re.search(r'(?:with status|that are) (\w+)', user_input, re.IGNORECASE)
-                status = status_match.group(1).strip() if status_match else None
-                return self.task_manager.get_tasks(status)
-            
-        except Exception as e:
-            return f"Error handling task command: {str(e)}"
+    def _stream_response(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """Stream response text from the OpenAI API"""
+        cache_key = self._cache_key(messages)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            yield cached
+            return
         
-        return ""
-    
-    def _handle_view_commands(self, user_input: str) -> str:
-        """Handle view commands"""
-        if 'events' in user_input.lower():
-            return self.calendar.get_events()
-        elif 'tasks' in user_input.lower():
-            return self.task_manager.get_tasks()
-        return ""
-    
-    def _generate_response(self, messages: List[Dict[str, str]]) -> str:
-        """Generate response using OpenAI API"""
+        started = time.perf_counter()
         try:
-            response = self.client.chat.completions.create(
+            # Only opening the stream is retried; a reply cut off midway is not replayed
+            stream = self.llm.call(
+                self.client.chat.completions.create,
                 model=self.model,
                 messages=messages,
-                max_tokens=500,
-                temperature=0.7
+                stream=True,
+                hedge=False,
+                **self.sampling
             )
+            self.metrics.inc("llm_requests")
             
-            if validate_response(response):
-                return response.choices[0].message.content
-            else:
-                return "Sorry, I encountered an error processing your request."
+            parts = []
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+            
+            if not parts:
+                yield "Sorry, I encountered an error processing your request."
+            elif cache_key:
+                self.response_cache.put(cache_key, "".join(parts))
                 
         except Exception as e:
-            return f"Error: {str(e)}"
+            self.metrics.inc("llm_errors")
+            yield self._llm_error_reply(e)
+        finally:
+            # From the request to the end of the stream (or the caller stopping)
+            self.metrics.observe("llm", time.perf_counter() - started)
+    
+    @staticmethod
+    def _llm_error_reply(error: Exception) -> str:
+        """Reply for a failed LLM call: a tool-only notice when the backend is down or still failing after retries"""
+        if isinstance(error, CircuitOpenError) or is_retryable(error):
+            return LLM_UNAVAILABLE_REPLY
+        return f"Error: {str(error)}"
+    
+    def _cached_response(self, cache_key: Optional[str]) -> Optional[str]:
+        """Cached reply for this key, counting the hit or miss"""
+        if not cache_key:
+            return None
+        cached = self.response_cache.get(cache_key)
+        self.metrics.inc("llm_cache_hits" if cached is not None else "llm_cache_misses")
+        return cached
+    
+    def _count_usage(self, response: Any):
+        """Add the token counts the API reports to the counters"""
+        self.metrics.inc("llm_requests")
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self.metrics.inc("llm_prompt_tokens", getattr(usage, "prompt_tokens", 0) or 0)
+            self.metrics.inc("llm_completion_tokens", getattr(usage, "completion_tokens", 0) or 0)
+    
+    def _cache_key(self, messages: List[Dict[str, str]]) -> Optional[str]:
+        """Response cache key for this request, or None when it must not be cached"""
+        if not self.response_cache.cacheable(self.sampling):
+            return None
+        return self.response_cache.key(self.model, messages, self.sampling)
     
     def clear_conversation(self):
         """Clear conversation history"""
@@ -0,0 +1,267 @@
+import asyncio
+import functools
+import os
+import threading
+import time
+import weakref
+from typing import AsyncIterator, Dict, Iterator, List, Any, Optional
+
+from src.agent import SchedulingAgent
+from src.storage import ScheduleStore
+from src.llm_cache import ResponseCache
+from src.responses import render_tool_response
+from src.env import require_api_key
+from src.utils import validate_response
+
+# Cap on chat-completion requests in flight per event loop, across all sessions
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+
+_loop_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+_loop_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = \
+    weakref.WeakKeyDictionary()
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_loop_lock = threading.Lock()
+
+
+def shared_async_client() -> Any:
+    """One AsyncOpenAI client (and connection pool) for every session on the running event loop.
+
+    The client's connections belong to the loop that first used them, so
+    each loop gets its own rather than one per process.
+    """
+    loop = asyncio.get_running_loop()
+    client = _loop_clients.get(loop)
+    if client is None:
+        from openai import AsyncOpenAI
+        client = AsyncOpenAI(api_key=require_api_key(), max_retries=0)
+        _loop_clients[loop] = client
+    return client
+
+
+def llm_semaphore() -> asyncio.Semaphore:
+    """The in-flight request limiter for the running event loop"""
+    loop = asyncio.get_running_loop()
+    semaphore = _loop_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+        _loop_semaphores[loop] = semaphore
+    return semaphore
+
+
+def sync_loop() -> asyncio.AbstractEventLoop:
+    """The background event loop the blocking chat wrappers run on, started on first use"""
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="async-agent-sync", daemon=True).start()
+            _sync_loop = loop
+        return _sync_loop
+
+
+class AsyncSchedulingAgent(SchedulingAgent):
+    """SchedulingAgent with a coroutine chat API.
+
+    LLM calls go through AsyncOpenAI behind a shared semaphore, while tool
+    handling and schedule flushes run in the default executor so they do
+    not block the event loop. Each agent is one session: its turns run one
+    at a time, and any number of agents can run concurrently.
+    """
+
+    def __init__(self, system_prompt: Optional[str] = None, client: Any = None,
+                 store: Optional[ScheduleStore] = None,
+                 semaphore: Optional[asyncio.Semaphore] = None,
+                 response_cache: Optional[ResponseCache] = None, **options):
+        super().__init__(system_prompt, client=client, store=store,
+                         response_cache=response_cache, **options)
+        self._semaphore = semaphore
+        self._turn_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def client(self) -> Any:
+        """The client given to the agent, else the shared one for the running loop"""
+        return self._client if self._client is not None else shared_async_client()
+
+    @client.setter
+    def client(self, client: Any):
+        self._client = client
+
+    async def _run_blocking(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(fn, *args))
+
+    async def achat(self, user_input: str) -> str:
+        """Process user input without blocking the event loop"""
+        if self._turn_lock is None:
+            self._turn_lock = asyncio.Lock()
+
+        async with self._turn_lock:
+            started = time.perf_counter()
+            self.memory.add_message("user", user_input)
+            messages = self.memory.get_conversation_history()
+
+            try:
+                intent, tool_response = await self._run_blocking(self._dispatch, user_input)
+
+                if tool_response and not self._should_polish(intent):
+                    final_response = render_tool_response(intent.name, tool_response)
+                else:
+                    if tool_response:
+                        self.memory.add_message("assistant", f"I handled your scheduling request: {tool_response}")
+                        messages = self.memory.get_conversation_history()
+
+                    final_response = await self._agenerate_response(messages)
+
+                self.memory.add_message("assistant", final_response)
+
+                elapsed = time.perf_counter() - started
+                self.last_timing = {"first_token": elapsed, "total": elapsed}
+                return final_response
+            finally:
+                with self.metrics.span("save"):
+                    await self._run_blocking(self.store.flush)
+                self.metrics.observe("turn", time.perf_counter() - started)
+                self.metrics.inc("turns")
+
+    async def achat_stream(self, user_input: str) -> AsyncIterator[str]:
+        """Async counterpart of chat_stream"""
+        if self._turn_lock is None:
+            self._turn_lock = asyncio.Lock()
+
+        async with self._turn_lock:
+            started = time.perf_counter()
+            self.last_timing = {}
+            self.memory.add_message("user", user_input)
+            messages = self.memory.get_conversation_history()
+            parts: List[str] = []
+
+            try:
+                intent, tool_response = await self._run_blocking(self._dispatch, user_input)
+                with self.metrics.span("save"):
+                    await self._run_blocking(self.store.flush)
+
+                if tool_response and not self._should_polish(intent):
+                    chunks = self._single(render_tool_response(intent.name, tool_response))
+                else:
+                    if tool_response:
+                        self.memory.add_message("assistant", f"I handled your scheduling request: {tool_response}")
+                        messages = self.memory.get_conversation_history()
+                    chunks = self._astream_response(messages)
+
+                try:
+                    async for chunk in chunks:
+                        if not parts:
+                            self.last_timing = {"first_token": time.perf_counter() - started}
+                        parts.append(chunk)
+                        yield chunk
+                finally:
+                    # Release the stream (and its semaphore slot) if the caller stops early
+                    await chunks.aclose()
+
+                self.last_timing["total"] = time.perf_counter() - started
+            finally:
+                if parts:
+                    self.memory.add_message("assistant", "".join(parts))
+                await self._run_blocking(self.store.flush)
+                self.metrics.observe("turn", time.perf_counter() - started)
+                self.metrics.inc("turns")
+
+    def chat(self, user_input: str) -> str:
+        """Blocking wrapper around achat for callers without an event loop"""
+        return asyncio.run_coroutine_threadsafe(self.achat(user_input), sync_loop()).result()
+
+    def chat_stream(self, user_input: str) -> Iterator[str]:
+        """Blocking wrapper around achat_stream for callers without an event loop"""
+        loop = sync_loop()
+        stream = self.achat_stream(user_input)
+        try:
+            while True:
+                try:
+                    yield asyncio.run_coroutine_threadsafe(stream.__anext__(), loop).result()
+                except StopAsyncIteration:
+                    break
+        finally:
+            asyncio.run_coroutine_threadsafe(stream.aclose(), loop).result()
+
+    @staticmethod
+    async def _single(text: str) -> AsyncIterator[str]:
+        yield text
+
+    async def _agenerate_response(self, messages: List[Dict[str, str]]) -> str:
+        """Generate response using the async OpenAI API"""
+        cache_key = self._cache_key(messages)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            return cached
+
+        semaphore = self._semaphore or llm_semaphore()
+
+        async def create(**kwargs):
+            # Each attempt and hedge takes its own slot; backoff sleeps hold none
+            async with semaphore:
+                return await self.client.chat.completions.create(**kwargs)
+
+        try:
+            with self.metrics.span("llm"):
+                response = await self.llm.acall(
+                    create,
+                    model=self.model,
+                    messages=messages,
+                    **self.sampling
+                )
+            self._count_usage(response)
+
+            if validate_response(response):
+                content = response.choices[0].message.content
+                if cache_key:
+                    self.response_cache.put(cache_key, content)
+                return content
+            else:
+                return "Sorry, I encountered an error processing your request."
+
+        except Exception as e:
+            self.metrics.inc("llm_errors")
+            return self._llm_error_reply(e)
+
+    async def _astream_response(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        """Stream response text from the async OpenAI API"""
+        cache_key = self._cache_key(messages)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+        semaphore = self._semaphore or llm_semaphore()
+        started = time.perf_counter()
+        try:
+            # The request counts against the cap until its stream is drained
+            async with semaphore:
+                stream = await self.llm.acall(
+                    self.client.chat.completions.create,
+                    model=self.model,
+                    messages=messages,
+                    stream=True,
+                    hedge=False,
+                    **self.sampling
+                )
+                self.metrics.inc("llm_requests")
+
+                parts = []
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+
+            if not parts:
+                yield "Sorry, I encountered an error processing your request."
+            elif cache_key:
+                self.response_cache.put(cache_key, "".join(parts))
+
+        except Exception as e:
+            self.metrics.inc("llm_errors")
+            yield self._llm_error_reply(e)
+        finally:
+            self.metrics.observe("llm", time.perf_counter() - started)
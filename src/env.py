@@ -0,0 +1,32 @@
+import os
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_loaded = False
+
+
+def load_env():
+    """Load a .env file into os.environ once, without overriding variables already set.
+
+    Looks in the working directory, then the project root; python-dotenv
+    is only imported when a file is found.
+    """
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+    for directory in (os.getcwd(), PROJECT_ROOT):
+        path = os.path.join(directory, ".env")
+        if os.path.isfile(path):
+            from dotenv import load_dotenv
+            load_dotenv(path)
+            return
+
+
+def require_api_key() -> str:
+    """The OpenAI API key, checked when the first client is created rather than at import"""
+    load_env()
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY not found in environment variables")
+    return api_key
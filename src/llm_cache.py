@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional
+
+from src.storage.json_backend import write_json_atomic
+
+# Settings
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "256"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "3600"))
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", "")
+LLM_CACHE_MAX_TEMPERATURE = float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", "0.7"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Collapse whitespace in message content so trivially different prompts share a key"""
+    normalized = []
+    for message in messages:
+        message = dict(message)
+        if isinstance(message.get("content"), str):
+            message["content"] = _WHITESPACE.sub(" ", message["content"]).strip()
+        normalized.append(message)
+    return normalized
+
+
+class ResponseCache:
+    """LRU + TTL cache of chat-completion texts with an optional on-disk tier.
+
+    Keys are a SHA-256 over the model, the normalized messages and the
+    sampling parameters. Requests sampled hotter than max_temperature are
+    never cached, since their replies are meant to vary. With cache_dir
+    set, entries are also written there as one JSON file per key and
+    survive restarts; expiry applies to both tiers.
+    """
+
+    def __init__(self, max_entries: int = LLM_CACHE_SIZE, ttl: float = LLM_CACHE_TTL,
+                 cache_dir: Optional[str] = LLM_CACHE_DIR or None,
+                 max_temperature: float = LLM_CACHE_MAX_TEMPERATURE):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self.max_temperature = max_temperature
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def key(model: str, messages: List[Dict[str, Any]], params: Dict[str, Any]) -> str:
+        payload = json.dumps(
+            {"model": model, "messages": normalize_messages(messages), "params": params},
+            sort_keys=True, separators=(",", ":"), default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def cacheable(self, params: Dict[str, Any]) -> bool:
+        """Whether a request with these sampling parameters may be served from cache"""
+        if not self.enabled:
+            return False
+        if params.get("temperature", 1.0) > self.max_temperature:
+            with self._lock:
+                self.bypassed += 1
+            return False
+        return True
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        if self.cache_dir:
+            value = self._disk_get(key, now)
+            if value is not None:
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                    self._store(key, value, now)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _disk_get(self, key: str, now: float) -> Optional[str]:
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("expires", 0) <= now:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return entry.get("value")
+
+    def _store(self, key: str, value: str, now: float):
+        self._entries[key] = (value, now + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def put(self, key: str, value: str):
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            self._store(key, value, now)
+        if self.cache_dir:
+            try:
+                write_json_atomic(self._disk_path(key), {"value": value, "expires": now + self.ttl},
+                                  indent=None, fsync=False)
+            except OSError:
+                pass
+
+    def clear(self):
+        """Drop all entries, including the on-disk tier"""
+        with self._lock:
+            self._entries.clear()
+        if self.cache_dir:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".json"):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except OSError:
+                        pass
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "entries": len(self._entries),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_default_cache: Optional[ResponseCache] = None
+
+
+def default_cache() -> ResponseCache:
+    """Process-wide cache shared by agents that are not given their own"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResponseCache()
+    return _default_cache
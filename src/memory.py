@@ -0,0 +1,180 @@
+import os
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+# Settings
+MEMORY_MAX_TOKENS = int(os.getenv("MEMORY_MAX_TOKENS", "3000"))
+MEMORY_SUMMARY_TOKENS = int(os.getenv("MEMORY_SUMMARY_TOKENS", "300"))
+
+# Chat formats add a few tokens of framing per message
+MESSAGE_OVERHEAD = 4
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+TokenCounter = Callable[[str], int]
+# (previous summary or None, messages being folded in, token budget) -> new summary
+Summarizer = Callable[[Optional[str], List["Message"], int], str]
+
+
+@dataclass
+class Message:
+    role: str
+    content: str
+    tokens: int = 0
+
+
+def approximate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)"""
+    return len(text) // 4 + 1
+
+
+@lru_cache(maxsize=None)
+def tiktoken_counter(model: str = "gpt-3.5-turbo") -> TokenCounter:
+    """Exact counts with tiktoken when it is installed, the approximation otherwise"""
+    try:
+        import tiktoken
+    except ImportError:
+        return approximate_tokens
+
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("cl100k_base")
+
+    @lru_cache(maxsize=1024)
+    def count(text: str) -> int:
+        return len(encoding.encode(text))
+
+    return count
+
+
+def extractive_summary(previous: Optional[str], messages: List[Message], budget: int,
+                       token_counter: TokenCounter = approximate_tokens) -> str:
+    """Fold messages into the summary as one clipped line each, dropping the oldest lines past budget"""
+    lines = previous.split("\n") if previous else []
+    for message in messages:
+        text = " ".join(message.content.split())
+        lines.append(f"{message.role}: {text[:160] + '...' if len(text) > 160 else text}")
+
+    while len(lines) > 1 and token_counter("\n".join(lines)) > budget:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class ConversationMemory:
+    """Token-budgeted conversation history.
+
+    The first system message is pinned and always sent. Other messages are
+    kept in a deque; once they exceed max_messages or the prompt would
+    exceed max_tokens, the oldest are folded into a rolling summary that is
+    sent as a second system message. The summary is updated once per fold
+    and cached, so reading the history never re-summarizes. The newest
+    message is always kept, even when it alone is over budget.
+    """
+
+    def __init__(self, max_messages: int = 20, max_tokens: int = MEMORY_MAX_TOKENS,
+                 token_counter: Optional[TokenCounter] = None, summarizer: Optional[Summarizer] = None,
+                 summary_tokens: int = MEMORY_SUMMARY_TOKENS):
+        self.max_messages = max_messages
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.token_counter = token_counter or approximate_tokens
+        self.summarizer = summarizer or (
+            lambda previous, messages, budget: extractive_summary(previous, messages, budget, self.token_counter)
+        )
+
+        self.system: Optional[Message] = None
+        self.messages: Deque[Message] = deque()
+        self.summary: Optional[Message] = None
+        self.summarized_count = 0
+        self._tokens = 0
+        self._history: Optional[List[Dict[str, str]]] = None
+
+    def _message(self, role: str, content: str) -> Message:
+        return Message(role, content, self.token_counter(content) + MESSAGE_OVERHEAD)
+
+    @property
+    def total_tokens(self) -> int:
+        """Tokens in the prompt built from this memory"""
+        pinned = (self.system.tokens if self.system else 0) + (self.summary.tokens if self.summary else 0)
+        return pinned + self._tokens
+
+    def add_message(self, role: str, content: str):
+        message = self._message(role, content)
+        self._history = None
+
+        if role == "system" and self.system is None:
+            self.system = message
+            return
+
+        self.messages.append(message)
+        self._tokens += message.tokens
+        self._enforce_budget()
+
+    def _enforce_budget(self):
+        evicted: List[Message] = []
+        # Reserve room for the summary that the evicted messages will produce
+        budget = self.max_tokens - (self.system.tokens if self.system else 0) - self.summary_tokens
+        while len(self.messages) > 1 and (len(self.messages) > self.max_messages or self._tokens > budget):
+            message = self.messages.popleft()
+            self._tokens -= message.tokens
+            evicted.append(message)
+
+        if evicted:
+            previous = self.summary.content if self.summary else None
+            budget = self.summary_tokens - self.token_counter(SUMMARY_PREFIX) - MESSAGE_OVERHEAD
+            content = self.summarizer(previous, evicted, budget)
+            self.summary = Message("system", content, self.token_counter(SUMMARY_PREFIX + content) + MESSAGE_OVERHEAD)
+            self.summarized_count += len(evicted)
+
+    def get_conversation_history(self) -> List[Dict[str, str]]:
+        if self._history is None:
+            history = []
+            if self.system:
+                history.append({"role": "system", "content": self.system.content})
+            if self.summary:
+                history.append({"role": "system", "content": SUMMARY_PREFIX + self.summary.content})
+            history.extend({"role": msg.role, "content": msg.content} for msg in self.messages)
+            self._history = history
+        return list(self._history)
+
+    @property
+    def approx_bytes(self) -> int:
+        """Rough resident size of the stored text"""
+        messages = [self.system, self.summary, *self.messages]
+        return sum(len(message.content) + 64 for message in messages if message)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable state, for saving a session"""
+        def dump(message: Optional[Message]) -> Optional[Dict[str, str]]:
+            return {"role": message.role, "content": message.content} if message else None
+
+        return {
+            "system": dump(self.system),
+            "summary": self.summary.content if self.summary else None,
+            "summarized_count": self.summarized_count,
+            "messages": [dump(message) for message in self.messages],
+        }
+
+    def restore(self, state: Dict[str, Any]):
+        """Replace the contents with state from to_dict; token counts are recomputed"""
+        self.clear_memory()
+        if state.get("system"):
+            self.system = self._message("system", state["system"]["content"])
+        if state.get("summary"):
+            content = state["summary"]
+            self.summary = Message("system", content, self.token_counter(SUMMARY_PREFIX + content) + MESSAGE_OVERHEAD)
+        for message in state.get("messages", []):
+            self.messages.append(self._message(message["role"], message["content"]))
+            self._tokens += self.messages[-1].tokens
+        self.summarized_count = state.get("summarized_count", 0)
+        self._enforce_budget()
+
+    def clear_memory(self):
+        self.system = None
+        self.messages.clear()
+        self.summary = None
+        self.summarized_count = 0
+        self._tokens = 0
+        self._history = None
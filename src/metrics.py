@@ -0,0 +1,172 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Any, Optional, Sequence
+
+# Settings
+AGENT_METRICS = os.getenv("AGENT_METRICS", "1").lower() not in ("0", "false", "no")
+
+# Histogram bucket upper bounds in seconds, as in Prometheus client defaults
+# but starting lower, since intent matching and cached parses take microseconds
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Stages of a chat turn. "tool" includes any date parsing the handler does
+STAGES = ("intent", "date_parse", "tool", "save", "llm", "turn")
+
+PREFIX = "agent"
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def cumulative(self) -> List[int]:
+        totals, running = [], 0
+        for count in self.counts:
+            running += count
+            totals.append(running)
+        return totals
+
+
+class _Span:
+    __slots__ = ("metrics", "stage", "started")
+
+    def __init__(self, metrics: "Metrics", stage: str):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.started)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Metrics:
+    """Per-stage latency histograms and counters for the agent.
+
+    span(stage) times a block into that stage's histogram and inc(name)
+    bumps a counter (LLM tokens, cache hits, schedule bytes written, ...).
+    When disabled, span() hands back a shared no-op context manager and
+    inc() returns at once, so instrumented code costs one attribute check.
+    """
+
+    def __init__(self, enabled: bool = AGENT_METRICS, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._histograms: Dict[str, Histogram] = {}
+        self._counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def span(self, stage: str):
+        if not self.enabled:
+            return NULL_SPAN
+        return _Span(self, stage)
+
+    def observe(self, stage: str, seconds: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def inc(self, name: str, value: float = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self.started_at = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Counters plus count, sum, mean and bucket counts per stage"""
+        with self._lock:
+            stages = {}
+            for stage, histogram in self._histograms.items():
+                stages[stage] = {
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "mean": histogram.sum / histogram.count if histogram.count else 0.0,
+                    "buckets": {
+                        _bound(bound): total for bound, total in zip(histogram.buckets + (float("inf"),),
+                                                                     histogram.cumulative())
+                    },
+                }
+            return {"enabled": self.enabled, "since": self.started_at, "stages": stages,
+                    "counters": dict(self._counters)}
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        with self._lock:
+            if self._histograms:
+                name = f"{PREFIX}_stage_seconds"
+                lines.append(f"# HELP {name} Time spent in each stage of a chat turn.")
+                lines.append(f"# TYPE {name} histogram")
+                for stage in sorted(self._histograms):
+                    histogram = self._histograms[stage]
+                    for bound, total in zip(histogram.buckets + (float("inf"),), histogram.cumulative()):
+                        lines.append(f'{name}_bucket{{stage="{stage}",le="{_bound(bound)}"}} {total}')
+                    lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.sum!r}')
+                    lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+            for counter in sorted(self._counters):
+                name = f"{PREFIX}_{counter}_total"
+                lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name} {_number(self._counters[counter])}")
+        return "\n".join(lines) + "\n"
+
+
+def _bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+_default_metrics: Optional[Metrics] = None
+
+
+def default_metrics() -> Metrics:
+    """The process-wide registry shared by agents, storage and the time parser"""
+    global _default_metrics
+    if _default_metrics is None:
+        _default_metrics = Metrics()
+    return _default_metrics
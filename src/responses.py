@@ -0,0 +1,24 @@
+from typing import Dict, Optional
+
+# Reply templates per intent. "line" renders one-line tool results
+# (confirmations, "No events found.") and "list" renders multi-line listings;
+# {result} is the tool output.
+TEMPLATES: Dict[str, Dict[str, str]] = {
+    "show_events": {"list": "Here are your events:\n{result}"},
+    "list_tasks": {"list": "Here are your tasks:\n{result}"},
+}
+
+DEFAULT_TEMPLATES = {"line": "{result}", "list": "{result}"}
+
+# Reply to messages that need the LLM while it is unreachable
+LLM_UNAVAILABLE_REPLY = ("I can't reach the language model right now, but scheduling commands still work, "
+                         "for example \"Show tasks\" or \"Find time tomorrow\".")
+
+
+def render_tool_response(intent: Optional[str], result: str) -> str:
+    """Render a tool result as the assistant's reply without calling the LLM"""
+    if result.startswith("Error"):
+        return result
+    templates = {**DEFAULT_TEMPLATES, **TEMPLATES.get(intent or "", {})}
+    shape = "list" if "\n" in result else "line"
+    return templates[shape].format(result=result)
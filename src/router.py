@@ -0,0 +1,241 @@
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Any, Optional, Pattern, Tuple
+
+DURATION = r"\bfor (?:an? )?(?:(\d+(?:\.\d+)?)[ -]?)?(hours?|hrs?|minutes?|mins?)\b"
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+PARTICIPANTS = r"\bwith ([a-z][\w\-]*(?:(?:\s*,\s*|\s+and\s+)[a-z][\w\-]*)*)"
+REPEAT = r"\b(daily|weekly|monthly|every (?:day|weekday|week|month|" + "|".join(WEEKDAYS) + r"))\b"
+# A day word right before "at" belongs to the time: "tomorrow at 2:30 PM", "friday at noon"
+DAY_WORD = r"(?:today|tomorrow|(?:next )?(?:" + "|".join(WEEKDAYS) + r"))"
+MONTHS = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+# A day or week to list events for; anything else in the sentence is not a date
+DATE_PHRASE = (r"\b(today|tomorrow|(?:this|next) week|(?:this |next )?(?:" + "|".join(WEEKDAYS) + r")"
+               r"|\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}(?:/\d{2,4})?"
+               r"|(?:" + "|".join(MONTHS) + r")[a-z]*\.? \d{1,2}(?:st|nd|rd|th)?)\b")
+
+# Declarative intent table. Keywords are matched case-insensitively on word
+# boundaries and add their weight to the intent's score; the highest score
+# wins, earlier rows break ties. Slot patterns run only for the winning
+# intent, and a slot's value is its first non-empty group unless
+# SLOT_PARSERS says otherwise.
+INTENT_TABLE: List[Dict[str, Any]] = [
+    {
+        "name": "find_time",
+        "group": "calendar",
+        "keywords": {"available time": 3, "free slot": 3, "free slots": 3, "free time": 3,
+                     "availability": 3, "available": 1},
+        "slots": {
+            "duration": DURATION,
+            "time": r"\b(?:on|from|starting) ((?:next )?\w+day|\d{4}-\d{2}-\d{2})\b|\b(tomorrow|today)\b",
+            "participants": PARTICIPANTS,
+        },
+    },
+    {
+        "name": "show_events",
+        "group": "calendar",
+        "keywords": {"show events": 3, "view calendar": 3, "what's on": 3, "what is on": 3, "on my calendar": 3,
+                     "events": 1, "calendar": 1, "schedule for": 3, "my schedule": 3},
+        "slots": {
+            "time": DATE_PHRASE,
+        },
+    },
+    {
+        "name": "add_event",
+        "group": "calendar",
+        "keywords": {"schedule": 2, "book": 2, "appointment": 2, "meeting": 1, "event": 1},
+        "slots": {
+            "title": r"\b(?:schedule|book|meeting|appointment|event)(?: an?)?(?: meeting| appointment| event)? "
+                     r"(?:called|named|for|about) (?:[\"']([^\"']+)[\"']|(.+?)(?= at | on | with | " + DAY_WORD + r" at |$))"
+                     # or a bare name: "schedule standup every weekday at 9am"
+                     r"|\b(?:schedule|book) (?!(?:an?|the|my|me|some|meeting|appointment|event)\b)"
+                     r"(?:[\"']([^\"']+)[\"']|(.+?)(?= at | on | every | with | about | for | daily\b| weekly\b"
+                     r"| monthly\b| " + DAY_WORD + r"\b|$))",
+            "time": r"\b(?:(" + DAY_WORD + r") at |at |on )"
+                    r"(.*?)(?:\.|$|\bfor\b|\bwith\b|\babout\b|\bevery\b|\bdaily\b|\bweekly\b|\bmonthly\b)",
+            "participants": PARTICIPANTS,
+            "topic": r"\b(?:about|regarding|related to) (.+?)(?=\.|$| for (?:an? )?\d| at | on )",
+            "duration": DURATION,
+            "repeat": REPEAT,
+        },
+    },
+    {
+        "name": "update_task",
+        "group": "task",
+        "keywords": {"mark task": 3, "complete task": 3, "finish task": 3, "start task": 3},
+        "slots": {
+            "task_id": r"\btask #?(\d+)",
+            "status": r"\b(?:as|to) (pending|in[ _]progress|completed|complete|done)\b"
+                      r"|\b(complete|finish|start)\b",
+        },
+    },
+    {
+        "name": "add_task",
+        "group": "task",
+        "keywords": {"add task": 3, "create task": 3, "add a task": 3, "create a task": 3,
+                     "new task": 3, "task": 1, "todo": 2, "reminder": 2, "due": 1},
+        "slots": {
+            "title": r"\b(?:add|create|new|set)(?: an?)? (?:task|todo|reminder)(?: called| named| to)? "
+                     r"(?:[\"']([^\"']+)[\"']|(.+?)(?= due | with | for |$))",
+            "time": r"\bdue (?:on |by )?(.*?)(?:\.|$|\bwith\b)",
+            "priority": r"\b(low|medium|high) priority\b",
+        },
+    },
+    {
+        "name": "list_tasks",
+        "group": "task",
+        "keywords": {"show tasks": 3, "list tasks": 3, "my tasks": 2, "tasks": 1, "pending": 1,
+                     "overdue": 2, "urgent": 2},
+        "slots": {
+            "status": r"\b(?:with status|that are) (\w+)|\b(pending|in progress|completed)\b",
+            "overdue": r"\b(overdue)\b",
+            "urgent": r"\b((?:most )?urgent)\b|\b(?:next|top) (\d+ )?tasks\b",
+            "limit": r"\b(?:next|top) (\d+)\b",
+        },
+    },
+]
+
+_WORD = re.compile(r"\w+(?:'\w+)?")
+_PARTICIPANT_STOPWORDS = {"me", "my", "us", "you", "the", "a", "an", "at", "on", "for", "about"}
+_STATUS_WORDS = {"complete": "completed", "done": "completed", "finish": "completed",
+                 "start": "in_progress", "in progress": "in_progress"}
+
+
+def _first_group(match) -> Optional[str]:
+    for value in match.groups():
+        if value:
+            return value.strip()
+    return None
+
+
+def _participants(match) -> List[str]:
+    names = re.split(r"\s*,\s*|\s+and\s+", match.group(1))
+    return [name.capitalize() for name in names if name and name.lower() not in _PARTICIPANT_STOPWORDS]
+
+
+def _duration_hours(match) -> float:
+    amount, unit = match.group(1), match.group(2).lower()
+    value = float(amount) if amount else 1.0
+    return value / 60 if unit.startswith("m") else value
+
+
+def _repeat(match) -> str:
+    """RRULE for "daily", "every weekday", "every monday", ..."""
+    phrase = match.group(1).lower().replace("every ", "")
+    if phrase in WEEKDAYS:
+        return f"FREQ=WEEKLY;BYDAY={phrase[:2].upper()}"
+    if phrase == "weekday":
+        return "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR"
+    return {"day": "FREQ=DAILY", "week": "FREQ=WEEKLY", "month": "FREQ=MONTHLY"}.get(phrase, f"FREQ={phrase.upper()}")
+
+
+def _time(match) -> str:
+    """Every non-empty group, so a day word and the clock time after it stay together"""
+    return " ".join(value.strip() for value in match.groups() if value)
+
+
+def _status(match) -> str:
+    value = _first_group(match).lower().replace("_", " ")
+    return _STATUS_WORDS.get(value, value.replace(" ", "_"))
+
+
+SLOT_PARSERS: Dict[str, Callable[[Any], Any]] = {
+    "participants": _participants,
+    "duration": _duration_hours,
+    "status": _status,
+    "time": _time,
+    "repeat": _repeat,
+    "task_id": lambda match: int(match.group(1)),
+    "urgent": lambda match: True,
+    "limit": lambda match: int(match.group(1)),
+}
+
+
+@dataclass
+class Intent:
+    name: Optional[str]
+    group: Optional[str] = None
+    score: int = 0
+    slots: Dict[str, Any] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return self.name is not None
+
+
+class IntentRouter:
+    """Single-pass keyword classifier with per-intent slot extraction.
+
+    Keywords are looked up as word n-grams in one table, so a single scan
+    over the input's words scores every intent at once. Slot regexes are compiled
+    up front and only the winning intent's run.
+    """
+
+    def __init__(self, table: List[Dict[str, Any]] = INTENT_TABLE):
+        self._intents: List[Tuple[str, str]] = []
+        self._slots: List[List[Tuple[str, Pattern]]] = []
+        self._keywords: Dict[str, List[Tuple[int, int]]] = {}
+
+        for position, spec in enumerate(table):
+            self._intents.append((spec["name"], spec.get("group")))
+            self._slots.append([
+                (slot, re.compile(pattern, re.IGNORECASE)) for slot, pattern in spec.get("slots", {}).items()
+            ])
+            for keyword, weight in spec["keywords"].items():
+                self._keywords.setdefault(keyword.lower(), []).append((position, weight))
+
+        # Word-level proper prefixes of multi-word keywords
+        self._prefixes = {
+            " ".join(keyword.split()[:n]) for keyword in self._keywords for n in range(1, len(keyword.split()))
+        }
+
+    def classify(self, text: str) -> Tuple[Optional[int], int]:
+        """(table position, score) of the best-scoring intent, or (None, 0)"""
+        scores = [0] * len(self._intents)
+        words = _WORD.findall(text.lower())
+        found = set(words)
+        # Extend a phrase only while it is the start of some multi-word keyword
+        for i, phrase in enumerate(words):
+            j = i + 1
+            while phrase in self._prefixes and j < len(words):
+                phrase = f"{phrase} {words[j]}"
+                found.add(phrase)
+                j += 1
+
+        # Every distinct keyword in the input adds its weight once
+        for phrase in found.intersection(self._keywords):
+            for position, weight in self._keywords[phrase]:
+                scores[position] += weight
+
+        best = max(scores)
+        if not best:
+            return None, 0
+        return scores.index(best), best
+
+    def extract(self, position: int, text: str) -> Dict[str, Any]:
+        slots = {}
+        for slot, pattern in self._slots[position]:
+            match = pattern.search(text)
+            if match:
+                value = SLOT_PARSERS.get(slot, _first_group)(match)
+                if value is not None and value != []:
+                    slots[slot] = value
+        return slots
+
+    def route(self, text: str) -> Intent:
+        """Classify text and extract the winning intent's slots"""
+        position, score = self.classify(text)
+        if position is None:
+            return Intent(None)
+        name, group = self._intents[position]
+        return Intent(name, group, score, self.extract(position, text))
+
+
+_router: Optional[IntentRouter] = None
+
+
+def default_router() -> IntentRouter:
+    """The process-wide router, compiled on first use"""
+    global _router
+    if _router is None:
+        _router = IntentRouter()
+    return _router
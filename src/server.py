@@ -0,0 +1,449 @@
+"""HTTP/JSON front-end for the scheduling agent, built on asyncio streams.
+
+Run with: python -m src.server [--host 127.0.0.1] [--port 8080]
+
+Endpoints (user ids are path segments, bodies and replies are JSON):
+    POST   /users/<user>/chat                  {"message": ...}
+    GET    /users/<user>/events                ?date= | ?start=&end=
+    POST   /users/<user>/events                {"title", "start_time", "end_time", ...}
+    GET    /users/<user>/events/<id>
+    PATCH  /users/<user>/events/<id>
+    DELETE /users/<user>/events/<id>
+    GET    /users/<user>/tasks                 ?status= | ?urgent=N[&status=] | ?overdue=<as of>
+    POST   /users/<user>/tasks                 {"title", "due_date", "priority", ...}
+    GET    /users/<user>/tasks/<id>
+    PATCH  /users/<user>/tasks/<id>
+    DELETE /users/<user>/tasks/<id>
+    GET    /users/<user>/free-slots            ?duration=&start=&days=&max=
+    GET    /health
+    GET    /metrics                            ?format=json (Prometheus text otherwise)
+"""
+import argparse
+import asyncio
+import contextlib
+import functools
+import json
+import os
+import re
+import weakref
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from src.async_agent import AsyncSchedulingAgent
+from src.metrics import default_metrics
+from src.sessions import SessionManager
+from src.tools import Priority, SchedulingTools, Status, parse_time
+
+# Settings
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8080"))
+SERVER_MAX_PENDING = int(os.getenv("SERVER_MAX_PENDING", "256"))
+SERVER_RETRY_AFTER = int(os.getenv("SERVER_RETRY_AFTER", "1"))
+SERVER_KEEPALIVE_TIMEOUT = float(os.getenv("SERVER_KEEPALIVE_TIMEOUT", "15"))
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+
+USER = r"/users/(?P<user>[^/]+)"
+# (method, path pattern, handler name, mutates the user's schedule or conversation)
+ROUTES = [
+    ("GET", r"/health", "health", False),
+    ("GET", r"/metrics", "metrics", False),
+    ("POST", USER + r"/chat", "chat", True),
+    ("GET", USER + r"/events", "list_events", False),
+    ("POST", USER + r"/events", "create_event", True),
+    ("GET", USER + r"/events/(?P<id>\d+)", "get_event", False),
+    ("PATCH", USER + r"/events/(?P<id>\d+)", "update_event", True),
+    ("DELETE", USER + r"/events/(?P<id>\d+)", "delete_event", True),
+    ("GET", USER + r"/tasks", "list_tasks", False),
+    ("POST", USER + r"/tasks", "create_task", True),
+    ("GET", USER + r"/tasks/(?P<id>\d+)", "get_task", False),
+    ("PATCH", USER + r"/tasks/(?P<id>\d+)", "update_task", True),
+    ("DELETE", USER + r"/tasks/(?P<id>\d+)", "delete_task", True),
+    ("GET", USER + r"/free-slots", "free_slots", False),
+]
+
+EVENT_FIELDS = {"title", "start_time", "end_time", "description", "location"}
+TASK_FIELDS = {"title", "due_date", "priority", "description", "status"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class Request:
+    def __init__(self, method: str, target: str, version: str, headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.version = version
+        self.headers = headers
+        self.body = body
+        url = urlsplit(target)
+        self.path = url.path
+        self.query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    def json(self) -> Dict[str, Any]:
+        if not self.body:
+            return {}
+        try:
+            payload = json.loads(self.body)
+        except ValueError:
+            raise HTTPError(400, "request body is not valid JSON")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "request body must be a JSON object")
+        return payload
+
+
+class SchedulingServer:
+    """Serves the agent and schedule API over keep-alive HTTP/1.1 connections.
+
+    Connections are handled concurrently; agent and storage calls run in
+    the default executor. Requests that change a user's data take that
+    user's lock, so they apply in arrival order. Once max_pending requests
+    are in flight, new ones are answered 503 with a Retry-After hint.
+    """
+
+    def __init__(self, sessions: Optional[SessionManager] = None, max_pending: int = SERVER_MAX_PENDING,
+                 retry_after: int = SERVER_RETRY_AFTER, keepalive_timeout: float = SERVER_KEEPALIVE_TIMEOUT):
+        self.sessions = sessions if sessions is not None else SessionManager(agent_class=AsyncSchedulingAgent)
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self.keepalive_timeout = keepalive_timeout
+        self.pending = 0
+        self.rejected = 0
+        self._routes = [(method, re.compile(f"^{pattern}$"), name, mutates)
+                        for method, pattern, name, mutates in ROUTES]
+        self._user_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    async def _blocking(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(fn, *args))
+
+    def _user_lock(self, user_id: str) -> asyncio.Lock:
+        lock = self._user_locks.get(user_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._user_locks[user_id] = lock
+        return lock
+
+    # Connection handling
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    await self._respond(writer, e.status, {"error": e.message}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+
+                status, payload, headers = await self._dispatch(request)
+                await self._respond(writer, status, payload, request.keep_alive, headers)
+                if not request.keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        """Read one request; None when the client closed or idled out"""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.keepalive_timeout)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(431, "request headers too large")
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "malformed request line")
+
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        # Digits only: int() would also take "-5", "+5" and "1_000"
+        length = headers.get("content-length", "0")
+        if not (length.isascii() and length.isdigit()):
+            raise HTTPError(400, "invalid Content-Length")
+        length = int(length)
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, "request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return Request(method.upper(), target, version.strip(), headers, body)
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool,
+                       headers: Optional[Dict[str, str]] = None):
+        # Handlers return plain text (the Prometheus exposition) as a str
+        if isinstance(payload, str):
+            body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+        lines = [
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if keep_alive:
+            lines.append(f"Keep-Alive: timeout={int(self.keepalive_timeout)}")
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def _dispatch(self, request: Request) -> Tuple[int, Any, Dict[str, str]]:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            return 503, {"error": "server busy", "retry_after": self.retry_after}, \
+                {"Retry-After": str(self.retry_after)}
+
+        self.pending += 1
+        try:
+            handler, params, mutates = self._route(request)
+            user_id = params.get("user")
+            if user_id is None:
+                status, payload = await handler(request, **params)
+            else:
+                async with self._pinned(user_id):
+                    if mutates:
+                        async with self._user_lock(user_id):
+                            status, payload = await handler(request, **params)
+                    else:
+                        status, payload = await handler(request, **params)
+            return status, payload, {}
+        except HTTPError as e:
+            return e.status, {"error": e.message}, e.headers
+        except ValueError as e:
+            return 400, {"error": str(e)}, {}
+        except Exception as e:
+            return 500, {"error": f"{type(e).__name__}: {e}"}, {}
+        finally:
+            self.pending -= 1
+
+    def _route(self, request: Request):
+        allowed = []
+        for method, pattern, name, mutates in self._routes:
+            match = pattern.match(request.path)
+            if not match:
+                continue
+            if method != request.method:
+                allowed.append(method)
+                continue
+            params = {key: unquote(value) for key, value in match.groupdict().items()}
+            if "id" in params:
+                params["record_id"] = int(params.pop("id"))
+            return getattr(self, name), params, mutates
+
+        if allowed:
+            raise HTTPError(405, "method not allowed", {"Allow": ", ".join(allowed)})
+        raise HTTPError(404, "not found")
+
+    @contextlib.asynccontextmanager
+    async def _pinned(self, user_id: str):
+        """Keep the user's session resident while the request runs, even with blocking calls in the executor"""
+        await self._blocking(self.sessions.acquire, user_id)
+        try:
+            yield
+        finally:
+            await self._blocking(self.sessions.release, user_id)
+
+    async def _agent(self, user_id: str):
+        return await self._blocking(self.sessions.get, user_id)
+
+    # Handlers
+
+    async def health(self, request: Request):
+        return 200, {"status": "ok", "pending": self.pending, "rejected": self.rejected,
+                     "sessions": self.sessions.stats()}
+
+    async def metrics(self, request: Request):
+        registry = default_metrics()
+        if request.query.get("format") == "json":
+            return 200, registry.to_dict()
+        return 200, registry.to_prometheus()
+
+    async def chat(self, request: Request, user: str):
+        message = request.json().get("message")
+        if not isinstance(message, str) or not message.strip():
+            raise HTTPError(400, "message is required")
+        agent = await self._agent(user)
+        if isinstance(agent, AsyncSchedulingAgent):
+            reply = await agent.achat(message)
+        else:
+            reply = await self._blocking(agent.chat, message)
+        return 200, {"reply": reply, "timing": agent.last_timing}
+
+    async def list_events(self, request: Request, user: str):
+        store = (await self._agent(user)).store
+        query = request.query
+        if "date" in query:
+            events = await self._blocking(store.events_on, parse_time(query["date"]).date())
+        elif "start" in query and "end" in query:
+            events = await self._blocking(store.events_between, parse_time(query["start"]),
+                                          parse_time(query["end"]))
+        else:
+            events = await self._blocking(store.all_events)
+        return 200, {"events": events}
+
+    async def get_event(self, request: Request, user: str, record_id: int):
+        return await self._get_record(user, "events", record_id)
+
+    async def create_event(self, request: Request, user: str):
+        agent = await self._agent(user)
+        fields = self._fields(request, EVENT_FIELDS)
+        return await self._blocking(self._create, agent, "events", agent.calendar.add_events_bulk, fields)
+
+    async def update_event(self, request: Request, user: str, record_id: int):
+        agent = await self._agent(user)
+        fields = self._fields(request, EVENT_FIELDS)
+        for name in ("start_time", "end_time"):
+            if name in fields:
+                fields[name] = parse_time(fields[name]).isoformat()
+        return await self._blocking(self._update, agent, "events", record_id, fields)
+
+    async def delete_event(self, request: Request, user: str, record_id: int):
+        return await self._blocking(self._delete, await self._agent(user), "events", record_id)
+
+    async def list_tasks(self, request: Request, user: str):
+        store = (await self._agent(user)).store
+        query = request.query
+        if "urgent" in query:
+            tasks = await self._blocking(store.urgent_tasks, int(query["urgent"]), query.get("status", "pending"))
+        elif "overdue" in query:
+            as_of = parse_time(query["overdue"]) if query["overdue"] else datetime.now()
+            tasks = await self._blocking(store.overdue_tasks, as_of)
+        else:
+            tasks = await self._blocking(store.tasks, query.get("status"))
+        return 200, {"tasks": tasks}
+
+    async def get_task(self, request: Request, user: str, record_id: int):
+        return await self._get_record(user, "tasks", record_id)
+
+    async def create_task(self, request: Request, user: str):
+        agent = await self._agent(user)
+        fields = self._fields(request, TASK_FIELDS - {"status"})
+        return await self._blocking(self._create, agent, "tasks", agent.task_manager.add_tasks_bulk, fields)
+
+    async def update_task(self, request: Request, user: str, record_id: int):
+        agent = await self._agent(user)
+        fields = self._fields(request, TASK_FIELDS)
+        if "priority" in fields and fields["priority"] not in {p.value for p in Priority}:
+            raise HTTPError(400, f"unknown priority '{fields['priority']}'")
+        if "status" in fields and fields["status"] not in {s.value for s in Status}:
+            raise HTTPError(400, f"unknown status '{fields['status']}'")
+        if fields.get("due_date"):
+            fields["due_date"] = parse_time(fields["due_date"]).isoformat()
+        return await self._blocking(self._update, agent, "tasks", record_id, fields)
+
+    async def delete_task(self, request: Request, user: str, record_id: int):
+        return await self._blocking(self._delete, await self._agent(user), "tasks", record_id)
+
+    async def free_slots(self, request: Request, user: str):
+        store = (await self._agent(user)).store
+        query = request.query
+        duration = float(query.get("duration", 1))
+        days = int(query.get("days", 7))
+        max_slots = int(query.get("max", 10))
+        start = parse_time(query["start"]) if "start" in query else datetime.now().replace(microsecond=0)
+
+        busy = await self._blocking(store.busy_intervals, start, start + timedelta(days=days + 1))
+        slots = SchedulingTools.find_available_time(
+            [], duration, start.isoformat(), days, max_slots=max_slots, busy=busy
+        )
+        if isinstance(slots, str):
+            raise HTTPError(400, slots)
+        return 200, {"slots": slots}
+
+    # Helpers (run in the executor)
+
+    @staticmethod
+    def _fields(request: Request, allowed) -> Dict[str, Any]:
+        body = request.json()
+        unknown = set(body) - allowed
+        if unknown:
+            raise HTTPError(400, f"unknown fields: {', '.join(sorted(unknown))}")
+        return body
+
+    async def _get_record(self, user: str, kind: str, record_id: int):
+        store = (await self._agent(user)).store
+        record = await self._blocking(store.get, kind, record_id)
+        if record is None:
+            raise HTTPError(404, f"{kind[:-1]} {record_id} not found")
+        return 200, record
+
+    @staticmethod
+    def _create(agent, kind: str, add_bulk, fields: Dict[str, Any]):
+        result = add_bulk([fields])[0]
+        if not result["ok"]:
+            raise HTTPError(400, result["error"])
+        agent.store.flush()
+        return 201, agent.store.get(kind, result["id"])
+
+    @staticmethod
+    def _update(agent, kind: str, record_id: int, fields: Dict[str, Any]):
+        if kind == "events" and ("start_time" in fields or "end_time" in fields):
+            current = agent.store.get(kind, record_id)
+            if current is None:
+                raise HTTPError(404, f"event {record_id} not found")
+            merged = {**current, **fields}
+            if parse_time(merged["end_time"]) < parse_time(merged["start_time"]):
+                raise HTTPError(400, "end_time is before start_time")
+
+        record = agent.store.update(kind, record_id, fields)
+        if record is None:
+            raise HTTPError(404, f"{kind[:-1]} {record_id} not found")
+        agent.store.flush()
+        return 200, record
+
+    @staticmethod
+    def _delete(agent, kind: str, record_id: int):
+        record = agent.store.delete(kind, record_id)
+        if record is None:
+            raise HTTPError(404, f"{kind[:-1]} {record_id} not found")
+        agent.store.flush()
+        return 200, record
+
+
+async def serve(host: str = SERVER_HOST, port: int = SERVER_PORT, server: Optional[SchedulingServer] = None):
+    server = server or SchedulingServer()
+    listener = await asyncio.start_server(server.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+    print(f"Scheduling server listening on http://{host}:{port}")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.sessions.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the scheduling agent over HTTP")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import time
+from typing import Dict, Any, Optional, Type
+
+from src.agent import SchedulingAgent
+from src.storage import ScheduleStore
+from src.storage.json_backend import write_json_atomic
+from src.tools import Participant
+
+# Settings
+SESSION_DIR = os.getenv("SESSION_DIR", "data/sessions")
+SESSION_MAX_ACTIVE = int(os.getenv("SESSION_MAX_ACTIVE", "100"))
+SESSION_MEMORY_MB = float(os.getenv("SESSION_MEMORY_MB", "256"))
+
+# Rough resident cost of one schedule record held by an in-memory backend
+RECORD_BYTES = 600
+
+_SAFE_ID = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+
+def session_key(user_id: str) -> str:
+    """Directory name for a user id; ids that are not filename-safe are hashed"""
+    if _SAFE_ID.match(user_id) and user_id not in (".", ".."):
+        return user_id
+    return "u-" + hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:32]
+
+
+class SessionManager:
+    """Maps user ids to agents, keeping the most recently used ones resident.
+
+    Each user gets a directory under data_dir holding their schedule,
+    an optional profile.json with their working hours, and, while the
+    session is not resident, their saved conversation memory.
+    Agents share the process-wide OpenAI client, intent router and
+    response cache, so opening a session costs one schedule load. Once
+    more than max_sessions are resident or their estimated footprint
+    passes max_bytes, the least recently used sessions are flushed, their
+    memory saved, and dropped; the next get() reloads them.
+    """
+
+    def __init__(self, data_dir: str = SESSION_DIR, agent_class: Type[SchedulingAgent] = SchedulingAgent,
+                 max_sessions: int = SESSION_MAX_ACTIVE, max_bytes: float = SESSION_MEMORY_MB * 1024 * 1024,
+                 flush_interval: float = 0, **agent_options):
+        self.data_dir = data_dir
+        self.agent_class = agent_class
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.agent_options = agent_options
+        self._sessions: "OrderedDict[str, SchedulingAgent]" = OrderedDict()
+        self._footprints: Dict[str, int] = {}
+        # Requests in flight per user; a pinned session is never evicted
+        self._pins: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self.opened = 0
+        self.evicted = 0
+
+    def _path(self, user_id: str, name: str) -> str:
+        return os.path.join(self.data_dir, session_key(user_id), name)
+
+    def _open(self, user_id: str) -> SchedulingAgent:
+        store = ScheduleStore(self._path(user_id, "schedule.json"), flush_interval=self.flush_interval)
+        # Agents find other users' calendars through this manager unless told otherwise
+        agent = self.agent_class(store=store, **{"directory": self.participant, **self.agent_options})
+
+        memory_file = self._path(user_id, "memory.json")
+        if os.path.exists(memory_file):
+            try:
+                with open(memory_file, 'r') as f:
+                    agent.memory.restore(json.load(f))
+            except (OSError, ValueError):
+                pass
+        self.opened += 1
+        return agent
+
+    @staticmethod
+    def footprint(agent: SchedulingAgent) -> int:
+        """Estimated bytes held by a resident session"""
+        return agent.memory.approx_bytes + agent.store.resident_records() * RECORD_BYTES
+
+    def _resident(self, user_id: str) -> SchedulingAgent:
+        """The user's agent, made resident and most recently used; the caller holds the lock"""
+        agent = self._sessions.get(user_id)
+        if agent is None:
+            agent = self._open(user_id)
+            self._sessions[user_id] = agent
+        else:
+            self._sessions.move_to_end(user_id)
+        self._footprints[user_id] = self.footprint(agent)
+        return agent
+
+    def get(self, user_id: str) -> SchedulingAgent:
+        """The user's agent, opening or reloading the session if it is not resident"""
+        with self._lock:
+            agent = self._resident(user_id)
+            self._evict_over_limits(keep=user_id)
+            return agent
+
+    def acquire(self, user_id: str) -> SchedulingAgent:
+        """get(), pinning the session resident until the matching release()"""
+        with self._lock:
+            self._pins[user_id] = self._pins.get(user_id, 0) + 1
+            try:
+                return self.get(user_id)
+            except Exception:
+                self._unpin(user_id)
+                raise
+
+    def release(self, user_id: str):
+        """Unpin a session taken with acquire(), then trim anything held over the limits"""
+        with self._lock:
+            self._unpin(user_id)
+            self._evict_over_limits()
+
+    def _unpin(self, user_id: str):
+        count = self._pins.get(user_id, 0) - 1
+        if count > 0:
+            self._pins[user_id] = count
+        else:
+            self._pins.pop(user_id, None)
+
+    def participant(self, user_id: str) -> Optional[Participant]:
+        """A user as a meeting attendee: their calendar plus the working hours in profile.json.
+        
+        profile.json may set work_start and work_end ("HH:MM"), workdays
+        (0 = Monday) and preferred (["HH:MM", "HH:MM"]). Names are tried
+        as given and lower-cased; None if there is no such user.
+        
+        This runs in the middle of another user's turn, so it never evicts:
+        that could close the asking user's own store, or a calendar already
+        handed out for the same meeting. The next get() trims the sessions.
+        """
+        with self._lock:
+            for candidate in dict.fromkeys((user_id, user_id.lower())):
+                if candidate in self._sessions or os.path.isdir(os.path.join(self.data_dir, session_key(candidate))):
+                    break
+            else:
+                return None
+            calendar = self._resident(candidate).store
+        
+        profile = {}
+        profile_file = self._path(candidate, "profile.json")
+        if os.path.exists(profile_file):
+            try:
+                with open(profile_file, 'r') as f:
+                    profile = json.load(f)
+            except (OSError, ValueError):
+                pass
+        
+        hours = {}
+        for field in ("work_start", "work_end"):
+            if profile.get(field):
+                hours[field] = time.fromisoformat(profile[field])
+        if profile.get("workdays") is not None:
+            hours["workdays"] = tuple(profile["workdays"])
+        if profile.get("preferred"):
+            hours["preferred"] = tuple(time.fromisoformat(value) for value in profile["preferred"])
+        return Participant(user_id, calendar=calendar, **hours)
+    
+    def chat(self, user_id: str, user_input: str) -> str:
+        agent = self.acquire(user_id)
+        try:
+            return agent.chat(user_input)
+        finally:
+            self.release(user_id)
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(self._footprints.values())
+
+    def _evict_over_limits(self, keep: Optional[str] = None):
+        """Evict least recently used sessions, skipping keep and pinned ones, until within the limits"""
+        while len(self._sessions) > 1 and (
+                len(self._sessions) > self.max_sessions or self.resident_bytes > self.max_bytes):
+            user_id = next((candidate for candidate in self._sessions
+                            if candidate != keep and candidate not in self._pins), None)
+            if user_id is None:
+                break
+            self.evict(user_id)
+
+    def save(self, user_id: str):
+        """Flush the user's schedule and save their conversation memory"""
+        with self._lock:
+            agent = self._sessions.get(user_id)
+            if agent is None:
+                return
+            agent.store.flush()
+            write_json_atomic(self._path(user_id, "memory.json"), agent.memory.to_dict())
+
+    def evict(self, user_id: str):
+        """Save the session and drop it from memory"""
+        with self._lock:
+            if user_id not in self._sessions:
+                return
+            self.save(user_id)
+            agent = self._sessions.pop(user_id)
+            self._footprints.pop(user_id, None)
+            agent.store.close()
+            self.evicted += 1
+
+    def close(self):
+        """Save and drop every resident session"""
+        with self._lock:
+            for user_id in list(self._sessions):
+                self.evict(user_id)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "resident": len(self._sessions),
+            "resident_bytes": self.resident_bytes,
+            "opened": self.opened,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,33 @@
+import os
+
+from .base import StorageBackend
+from .event_index import EventIndex
+from .event_table import EventTable
+from .json_backend import JsonBackend
+from .journal import JournalBackend, JournalSnapshot, apply_change
+from .recurrence import SeriesIndex
+from .sqlite_backend import SqliteBackend
+from .store import ScheduleStore
+
+
+def open_backend(data_file: str = "data/schedule.json", mode: str = None) -> StorageBackend:
+    """Create the storage backend selected by mode or the SCHEDULE_STORAGE env var.
+
+    The sqlite backend keeps its database next to data_file with a .db suffix.
+    SCHEDULE_EVENT_TABLE=1 makes the in-memory backends store one-off events
+    in a compact EventTable, queried by vectorized scans, instead of as
+    dicts in the sorted EventIndex.
+    """
+    mode = (mode or os.getenv("SCHEDULE_STORAGE", "json")).lower()
+    event_table = os.getenv("SCHEDULE_EVENT_TABLE", "0").lower() in ("1", "true", "yes")
+    if mode == "json":
+        return JsonBackend(data_file, event_table=event_table)
+    if mode == "journal":
+        return JournalBackend(data_file, event_table=event_table)
+    if mode == "sqlite":
+        return SqliteBackend(os.path.splitext(data_file)[0] + ".db")
+    raise ValueError(f"Unknown storage backend: {mode}")
+
+
+__all__ = ['StorageBackend', 'EventIndex', 'EventTable', 'SeriesIndex', 'JsonBackend', 'JournalBackend', 'JournalSnapshot',
+           'SqliteBackend', 'ScheduleStore', 'apply_change', 'open_backend']
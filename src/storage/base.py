@@ -0,0 +1,209 @@
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Any, Optional, Tuple
+
+from .busy_blocks import BusyBlocks, nearest_window
+from .event_index import from_epoch, parse_stored_time, to_epoch, wall_clock
+from .task_index import DONE_STATUSES, PRIORITY_RANK
+
+KINDS = ("events", "tasks")
+
+# How far either side of a requested time nearest_free looks
+FREE_SEARCH_DAYS = 30
+
+Interval = Tuple[datetime, datetime]
+
+
+def overlapping(spans: List[Interval], start: datetime, end: datetime) -> List[Interval]:
+    """Spans sharing more than an instant with [start, end)"""
+    return [(begin, finish) for begin, finish in spans if max(begin, start) < min(finish, end)]
+
+
+class StorageBackend:
+    """Interface shared by the schedule storage backends.
+
+    Records are plain dicts in the same shape as schedule.json. Event
+    timestamps are ISO strings; range arguments are datetimes.
+
+    With autoflush on, every mutation is persisted before it returns.
+    With it off, mutations only mark the backend dirty and are written
+    by the next flush().
+    """
+
+    autoflush = True
+    dirty = False
+
+    def get(self, kind: str, record_id: int) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def insert(self, kind: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Assign the next id to record, store it and return it"""
+        raise NotImplementedError
+
+    def insert_many(self, kind: str, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert a batch of records as one write; returns them with ids assigned"""
+        return [self.insert(kind, record) for record in records]
+
+    def update(self, kind: str, record_id: int, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update fields of a record; None if it does not exist"""
+        raise NotImplementedError
+
+    def delete(self, kind: str, record_id: int) -> Optional[Dict[str, Any]]:
+        """Remove a record and return it; None if it does not exist"""
+        raise NotImplementedError
+
+    def all_events(self) -> List[Dict[str, Any]]:
+        """Every event in start-time order"""
+        raise NotImplementedError
+
+    def events_on(self, day: date) -> List[Dict[str, Any]]:
+        """Events starting on day, in start-time order"""
+        raise NotImplementedError
+
+    def events_between(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """Events overlapping [start, end), in start-time order"""
+        raise NotImplementedError
+
+    def tasks(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Tasks in id order, optionally filtered by status"""
+        raise NotImplementedError
+
+    def event_span(self, event: Dict[str, Any]) -> Tuple[datetime, datetime]:
+        """Wall-clock (start, end) of a stored event"""
+        return (wall_clock(parse_stored_time(event["start_time"])),
+                wall_clock(parse_stored_time(event["end_time"])))
+
+    def busy_intervals(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        """(start, end) of every event overlapping [start, end), in start order"""
+        return [self.event_span(event) for event in self.events_between(start, end)]
+
+    def iter_events(self, start: Optional[datetime] = None,
+                    end: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """Events for display: all of them, or those overlapping [start, end).
+
+        A recurring series is yielded once, as its record, at its first
+        occurrence in the window. Backends that can stream override this
+        so the first events arrive before the rest are read.
+        """
+        if start is None or end is None:
+            yield from self.all_events()
+            return
+        yield from self._series_once(self.events_between(start, end))
+
+    def _series_once(self, events: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Replace the occurrences of each series with its record, at the first of them"""
+        seen = set()
+        for event in events:
+            if "recurrence_id" not in event:
+                yield event
+            elif event["id"] not in seen:
+                seen.add(event["id"])
+                yield self.get("events", event["id"])
+
+    def iter_tasks(self, status: Optional[str] = None, priority: Optional[str] = None,
+                   due_from: Optional[datetime] = None, due_to: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """Tasks in id order, filtered by status, priority and a [due_from, due_to) due-date window"""
+        for task in self.tasks(status):
+            if priority and task.get("priority") != priority:
+                continue
+            if due_from is not None or due_to is not None:
+                due = self.task_due(task)
+                if due is None or (due_from is not None and wall_clock(due) < wall_clock(due_from)) \
+                        or (due_to is not None and wall_clock(due) >= wall_clock(due_to)):
+                    continue
+            yield task
+
+    def conflicts(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """Events sharing more than an instant with [start, end), in start order"""
+        return [event for event in self.events_between(start, end)
+                if overlapping([self.event_span(event)], start, end)]
+
+    def nearest_free(self, start: datetime, end: datetime,
+                     not_before: Optional[datetime] = None) -> Optional[Interval]:
+        """The free window as long as [start, end) that is closest to it.
+
+        Ties go to the later window; nothing starting before not_before or
+        further than FREE_SEARCH_DAYS away is offered. None if no window fits.
+        """
+        # Widen the searched range until a window turns up; a window found
+        # within reach is nearer than anything beyond it
+        days = 1
+        while True:
+            reach = timedelta(days=days)
+            busy = self.busy_intervals(start - reach, end + reach)
+            blocks = BusyBlocks(sorted((to_epoch(begin), to_epoch(finish)) for begin, finish in busy))
+            window = self._search_free(blocks, start, end, not_before, reach=reach)
+            if window is not None or days >= FREE_SEARCH_DAYS:
+                return window
+            days = min(days * 4, FREE_SEARCH_DAYS)
+
+    @staticmethod
+    def _search_free(blocks: BusyBlocks, start: datetime, end: datetime, not_before: Optional[datetime],
+                     more_busy: Optional[Callable[[datetime, datetime], List[Interval]]] = None,
+                     reach: timedelta = timedelta(days=FREE_SEARCH_DAYS)) -> Optional[Interval]:
+        """nearest_free over blocks within reach, stepping past anything more_busy(start, end) also reports"""
+        lo, hi = to_epoch(start - reach), to_epoch(end + reach)
+
+        def clashes(begin: int, length: int) -> List[Interval]:
+            if more_busy is None:
+                return []
+            window_start, window_end = from_epoch(begin), from_epoch(begin + length)
+            return overlapping(more_busy(window_start, window_end), window_start, window_end)
+
+        def after(begin: int, length: int) -> Optional[int]:
+            while True:
+                begin = blocks.free_after(begin, length)
+                if begin + length > hi:
+                    return None
+                clash = clashes(begin, length)
+                if not clash:
+                    return begin
+                begin = max(to_epoch(finish) for _, finish in clash)
+
+        def before(finish: int, length: int) -> Optional[int]:
+            while True:
+                begin = blocks.free_before(finish, length)
+                if begin < lo:
+                    return None
+                clash = clashes(begin, length)
+                if not clash:
+                    return begin
+                finish = min(to_epoch(busy_start) for busy_start, _ in clash)
+
+        window = nearest_window(to_epoch(start), to_epoch(end), after, before,
+                                to_epoch(not_before) if not_before is not None else None)
+        return (from_epoch(window[0]), from_epoch(window[1])) if window else None
+
+    def urgent_tasks(self, limit: int, status: str = "pending") -> List[Dict[str, Any]]:
+        """Up to limit tasks with status, highest priority then earliest due (undated last) first"""
+        def urgency(task: Dict[str, Any]):
+            due = self.task_due(task)
+            return (PRIORITY_RANK.get(task.get("priority"), len(PRIORITY_RANK)), due is None,
+                    wall_clock(due) if due else datetime.min, task["id"])
+        return sorted(self.tasks(status), key=urgency)[:limit]
+
+    def overdue_tasks(self, as_of: datetime) -> List[Dict[str, Any]]:
+        """Unfinished tasks due before as_of, earliest due first"""
+        overdue = [(wall_clock(self.task_due(task)), task["id"], task) for task in self.tasks()
+                   if task["status"] not in DONE_STATUSES and task.get("due_date")
+                   and wall_clock(self.task_due(task)) < wall_clock(as_of)]
+        return [task for _, _, task in sorted(overdue, key=lambda item: item[:2])]
+
+    def task_due(self, task: Dict[str, Any]) -> Optional[datetime]:
+        """Parsed due date of a stored task"""
+        return parse_stored_time(task["due_date"]) if task.get("due_date") else None
+
+    def resident_records(self) -> int:
+        """Records held in process memory (0 for backends that query on demand)"""
+        return 0
+
+    @property
+    def schedule(self) -> Dict[str, Any]:
+        """The whole schedule as a {"events", "tasks"} dict"""
+        raise NotImplementedError
+
+    def flush(self):
+        """Persist any mutations made since the last flush"""
+        self.dirty = False
+
+    def close(self):
+        self.flush()
@@ -0,0 +1,100 @@
+import bisect
+from typing import Callable, Iterable, List, Optional, Tuple
+
+Span = Tuple[int, int]
+
+
+class BusyBlocks:
+    """Disjoint busy blocks: the union of event spans, in epoch seconds.
+
+    Overlapping or touching spans are merged into one block, and the blocks
+    are kept as two sorted lists (starts and ends), so whether a window is
+    free is a single bisect, and the nearest free window is a bisect plus
+    a walk over the blocks in the way. Removing a span rebuilds only the
+    block it was in, from the spans the owner still holds there.
+    Zero-length spans take up no time and are ignored.
+    """
+
+    def __init__(self, spans: Iterable[Span] = ()):
+        """Build from spans sorted by start"""
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        for start, end in spans:
+            if end <= start:
+                continue
+            if self.ends and start <= self.ends[-1]:
+                if end > self.ends[-1]:
+                    self.ends[-1] = end
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def add(self, start: int, end: int):
+        """Cover [start, end), merging the blocks it overlaps or touches"""
+        if end <= start:
+            return
+        first = bisect.bisect_left(self.ends, start)
+        last = bisect.bisect_right(self.starts, end)
+        if first < last:
+            start = min(start, self.starts[first])
+            end = max(end, self.ends[last - 1])
+        self.starts[first:last] = [start]
+        self.ends[first:last] = [end]
+
+    def remove(self, start: int, end: int, remaining: Callable[[int, int], Iterable[Span]]):
+        """Uncover a span that has been dropped by the owner.
+
+        remaining(lo, hi) gives the spans the owner still holds that start
+        in [lo, hi), sorted by start; the block is rebuilt from them.
+        """
+        if end <= start:
+            return
+        pos = bisect.bisect_right(self.starts, start) - 1
+        if pos < 0 or self.ends[pos] < end:
+            return
+        rebuilt = BusyBlocks(remaining(self.starts[pos], self.ends[pos]))
+        self.starts[pos:pos + 1] = rebuilt.starts
+        self.ends[pos:pos + 1] = rebuilt.ends
+
+    def overlaps(self, start: int, end: int) -> bool:
+        """Whether any block overlaps [start, end)"""
+        # The last block starting before end reaches furthest of all of them
+        pos = bisect.bisect_left(self.starts, end) - 1
+        return pos >= 0 and self.ends[pos] > start and end > start
+
+    def free_after(self, start: int, length: int) -> int:
+        """Earliest s >= start with [s, s + length) free"""
+        pos = bisect.bisect_right(self.ends, start)
+        while pos < len(self.starts) and self.starts[pos] < start + length:
+            start = max(start, self.ends[pos])
+            pos += 1
+        return start
+
+    def free_before(self, end: int, length: int) -> int:
+        """Start of the latest free [s, s + length) with s + length <= end"""
+        pos = bisect.bisect_left(self.starts, end) - 1
+        while pos >= 0 and self.ends[pos] > end - length:
+            end = min(end, self.starts[pos])
+            pos -= 1
+        return end - length
+
+
+def nearest_window(start: int, end: int, free_after: Callable[[int, int], Optional[int]],
+                   free_before: Callable[[int, int], Optional[int]], not_before: Optional[int] = None) -> Optional[Span]:
+    """The free window as long as [start, end) closest to it, given the two searches.
+
+    free_after(start, length) and free_before(end, length) return a window
+    start or None if they found nothing. Ties go to the later window, and
+    windows starting before not_before are not considered.
+    """
+    length = end - start
+    later = free_after(start if not_before is None else max(start, not_before), length)
+    earlier = free_before(end, length)
+    if earlier is not None and not_before is not None and earlier < not_before:
+        earlier = None
+    if earlier is not None and (later is None or start - earlier < later - start):
+        return earlier, earlier + length
+    return (later, later + length) if later is not None else None
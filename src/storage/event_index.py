@@ -0,0 +1,177 @@
+import bisect
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+
+from .busy_blocks import BusyBlocks
+
+EPOCH = datetime(1970, 1, 1)
+SECOND = timedelta(seconds=1)
+
+# Counts calls to parse_stored_time, so cache savings can be measured
+stored_parse_count = 0
+
+
+def parse_stored_time(value: str) -> datetime:
+    """Parse an ISO timestamp written by the managers, falling back to dateutil"""
+    global stored_parse_count
+    stored_parse_count += 1
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        from dateutil import parser
+        return parser.parse(value)
+
+
+def wall_clock(dt: datetime) -> datetime:
+    """Drop tzinfo so naive and aware events sort and bucket by their local time"""
+    return dt.replace(tzinfo=None) if dt.tzinfo is not None else dt
+
+
+def to_epoch(dt: datetime) -> int:
+    """Wall-clock seconds since 1970-01-01"""
+    return (wall_clock(dt) - EPOCH) // SECOND
+
+
+def from_epoch(seconds: int) -> datetime:
+    return EPOCH + timedelta(seconds=seconds)
+
+
+def stored_epoch(value: str) -> int:
+    return to_epoch(parse_stored_time(value))
+
+
+class EventIndex:
+    """Sorted interval index over calendar events.
+
+    Events are kept ordered by (start, id) so date and range lookups are a
+    bisect plus a scan over the matching events. Start and end are parsed
+    once, when an event is indexed, and kept as wall-clock epoch seconds.
+    The index holds references to the event dicts, so callers add/remove
+    alongside schedule["events"].
+
+    The merged busy blocks used for conflict checks are built on first use
+    and kept up to date by add and remove from then on.
+    """
+
+    def __init__(self, events: Optional[List[Dict[str, Any]]] = None):
+        self._keys: List[Tuple[int, int]] = []
+        self._events: Dict[int, Dict[str, Any]] = {}
+        self._spans: Dict[int, Tuple[int, int]] = {}
+        self._max_duration = 0
+        self._blocks: Optional[BusyBlocks] = None
+
+        for event in events or []:
+            self._store(event)
+        self._keys.sort()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Iterate events in start-time order"""
+        for _, event_id in self._keys:
+            yield self._events[event_id]
+
+    def __contains__(self, event_id: int) -> bool:
+        return event_id in self._events
+
+    def _store(self, event: Dict[str, Any]) -> Tuple[int, int]:
+        start = stored_epoch(event["start_time"])
+        end = stored_epoch(event["end_time"])
+        event_id = event["id"]
+
+        self._events[event_id] = event
+        self._spans[event_id] = (start, end)
+        if end - start > self._max_duration:
+            self._max_duration = end - start
+
+        key = (start, event_id)
+        self._keys.append(key)
+        return key
+
+    def add(self, event: Dict[str, Any]):
+        """Index a new event"""
+        if event["id"] in self._events:
+            self.remove(event["id"])
+        key = self._store(event)
+        self._keys.pop()
+        bisect.insort(self._keys, key)
+        if self._blocks is not None:
+            self._blocks.add(*self._spans[event["id"]])
+
+    def add_many(self, events: List[Dict[str, Any]]):
+        """Index a batch of events with one sort instead of an insort per event"""
+        for event in events:
+            if event["id"] in self._events:
+                self.remove(event["id"])
+            self._store(event)
+        # Timsort merges the already-sorted prefix with the new run
+        self._keys.sort()
+        self._blocks = None
+
+    def remove(self, event_id: int) -> Optional[Dict[str, Any]]:
+        """Drop an event from the index and return it"""
+        event = self._events.pop(event_id, None)
+        if event is None:
+            return None
+
+        start, end = self._spans.pop(event_id)
+        pos = bisect.bisect_left(self._keys, (start, event_id))
+        del self._keys[pos]
+        if self._blocks is not None:
+            self._blocks.remove(start, end, lambda lo, hi: [self._spans[key[1]] for key in self._range(lo, hi)])
+        return event
+
+    def get(self, event_id: int) -> Optional[Dict[str, Any]]:
+        return self._events.get(event_id)
+
+    def epoch_span(self, event_id: int) -> Tuple[int, int]:
+        """(start, end) of an indexed event in epoch seconds"""
+        return self._spans[event_id]
+
+    def span(self, event_id: int) -> Tuple[datetime, datetime]:
+        """Parsed (start, end) of an indexed event"""
+        start, end = self._spans[event_id]
+        return from_epoch(start), from_epoch(end)
+
+    def _range(self, lo_epoch: int, hi_epoch: int) -> List[Tuple[int, int]]:
+        lo = bisect.bisect_left(self._keys, (lo_epoch, -1))
+        hi = bisect.bisect_left(self._keys, (hi_epoch, -1))
+        return self._keys[lo:hi]
+
+    def starting_between(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """Events whose start falls in [start, end), in start order"""
+        return [self._events[event_id] for _, event_id in self._range(to_epoch(start), to_epoch(end))]
+
+    def on_date(self, day: date) -> List[Dict[str, Any]]:
+        """Events starting on the given calendar day"""
+        day_start = datetime.combine(day, time.min)
+        return self.starting_between(day_start, day_start + timedelta(days=1))
+
+    def _overlapping(self, start: datetime, end: datetime) -> Iterator[int]:
+        start_epoch, end_epoch = to_epoch(start), to_epoch(end)
+
+        # No event is longer than _max_duration, so anything overlapping the
+        # window must start at or after start - _max_duration.
+        for event_start, event_id in self._range(start_epoch - self._max_duration, end_epoch):
+            if self._spans[event_id][1] > start_epoch or event_start >= start_epoch:
+                yield event_id
+
+    def between(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """Events overlapping [start, end), in start order"""
+        return [self._events[event_id] for event_id in self._overlapping(start, end)]
+
+    def busy_between(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        """(start, end) datetimes of events overlapping [start, end), without re-parsing"""
+        return [self.span(event_id) for event_id in self._overlapping(start, end)]
+
+    @property
+    def blocks(self) -> BusyBlocks:
+        """Merged busy blocks of the indexed events"""
+        if self._blocks is None:
+            self._blocks = BusyBlocks(self._spans[event_id] for _, event_id in self._keys)
+        return self._blocks
+
+    def has_overlap(self, start: datetime, end: datetime) -> bool:
+        """Whether any event overlaps [start, end), in O(log n)"""
+        return self.blocks.overlaps(to_epoch(start), to_epoch(end))
@@ -0,0 +1,312 @@
+import bisect
+import importlib.util
+from array import array
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+
+from .busy_blocks import BusyBlocks
+from .event_index import from_epoch, stored_epoch, to_epoch
+
+# NumPy is imported when the first table is built, not with the storage package
+np = None
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+# Record fields held in the table's own columns
+_COLUMN_FIELDS = ("id", "title", "start_time", "end_time", "description", "location", "created_at")
+
+
+def _load_numpy():
+    global np
+    if np is None and HAS_NUMPY:
+        import numpy
+        np = numpy
+
+
+class EventTable:
+    """Column-oriented event storage.
+
+    Start/end times live in int64 epoch-second arrays (array('q'), viewed
+    through NumPy when it is installed) and ids in a third array; titles,
+    descriptions, locations and created_at are side tables of string
+    references. Overlap, date and busy-time queries are vectorized masks
+    over the columns. Removed rows are tombstoned and reclaimed by
+    compact().
+
+    The table is the storage: no event dicts are kept, and queries build
+    them from the columns. Whatever the columns cannot hold (other fields,
+    times that do not round-trip through epoch seconds, None values) is
+    kept per event in a sparse side table, so a record comes back as it
+    was stored. The table offers the same query interface as EventIndex
+    so JsonBackend can use either, including the merged busy blocks.
+    """
+
+    def __init__(self, events: Optional[List[Dict[str, Any]]] = None):
+        _load_numpy()
+        self.ids = array('q')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.alive = bytearray()
+        self.titles: List[str] = []
+        self.descriptions: List[str] = []
+        self.locations: List[str] = []
+        self.created_at: List[str] = []
+        # Event id -> fields the columns cannot reproduce
+        self.extras: Dict[int, Dict[str, Any]] = {}
+        self._live = 0
+        # Row lookup by bisecting ids while they are appended in order;
+        # an out-of-order id switches to a dict
+        self._rows: Optional[Dict[int, int]] = None
+        self._blocks: Optional[BusyBlocks] = None
+
+        if events:
+            self.add_many(events)
+
+    def __len__(self) -> int:
+        return self._live
+
+    def __contains__(self, event_id: int) -> bool:
+        return self._row_of(event_id) is not None
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Iterate events in start-time order"""
+        for row in self._sorted_rows(self._live_rows()):
+            yield self._event(row)
+
+    def nbytes(self) -> int:
+        """Bytes held by the numeric columns (side-table strings are shared references)"""
+        return (self.ids.itemsize * len(self.ids) * 3 + len(self.alive)
+                + 8 * (len(self.titles) + len(self.descriptions) + len(self.locations) + len(self.created_at)))
+
+    def _row_of(self, event_id: int) -> Optional[int]:
+        if self._rows is not None:
+            row = self._rows.get(event_id)
+        else:
+            row = bisect.bisect_left(self.ids, event_id)
+            if row == len(self.ids) or self.ids[row] != event_id:
+                return None
+        if row is None or not self.alive[row]:
+            return None
+        return row
+
+    def _event(self, row: int) -> Dict[str, Any]:
+        event_id = self.ids[row]
+        event = {"id": event_id, "title": self.titles[row],
+                 "start_time": from_epoch(self.starts[row]).isoformat(),
+                 "end_time": from_epoch(self.ends[row]).isoformat()}
+        for name, column in (("description", self.descriptions), ("location", self.locations),
+                             ("created_at", self.created_at)):
+            if column[row] is not None:
+                event[name] = column[row]
+        extras = self.extras.get(event_id)
+        if extras:
+            event.update(extras)
+        return event
+
+    def _set_extras(self, event: Dict[str, Any]):
+        """Keep what the columns of event's row cannot reproduce"""
+        extras = {key: value for key, value in event.items()
+                  if key not in _COLUMN_FIELDS or (value is None and key != "id")}
+        # Only whole-second wall-clock times ("2030-01-07T09:00:00") are
+        # rebuilt exactly from epoch seconds
+        for name in ("start_time", "end_time"):
+            value = event[name]
+            if len(value) != 19 or value[10] != "T":
+                extras[name] = value
+        if extras:
+            self.extras[event["id"]] = extras
+        else:
+            self.extras.pop(event["id"], None)
+
+    def _append(self, event: Dict[str, Any]):
+        event_id = event["id"]
+        if self._rows is None and self.ids and event_id <= self.ids[-1]:
+            self._rows = {self.ids[row]: row for row in range(len(self.ids)) if self.alive[row]}
+        if self._rows is not None:
+            self._rows[event_id] = len(self.ids)
+
+        self.ids.append(event_id)
+        self.starts.append(stored_epoch(event["start_time"]))
+        self.ends.append(stored_epoch(event["end_time"]))
+        self.alive.append(1)
+        self.titles.append(event.get("title"))
+        self.descriptions.append(event.get("description"))
+        self.locations.append(event.get("location"))
+        self.created_at.append(event.get("created_at"))
+        self._set_extras(event)
+        self._live += 1
+        if self._blocks is not None:
+            self._blocks.add(self.starts[-1], self.ends[-1])
+
+    def add(self, event: Dict[str, Any]):
+        """Add an event, or overwrite the row of an existing id in place"""
+        row = self._row_of(event["id"])
+        if row is None:
+            self._append(event)
+            return
+
+        if self._blocks is not None:
+            # Out of the blocks while its old span is rebuilt without it
+            self.alive[row] = 0
+            self._blocks.remove(self.starts[row], self.ends[row], self._spans_starting)
+            self.alive[row] = 1
+        self.starts[row] = stored_epoch(event["start_time"])
+        self.ends[row] = stored_epoch(event["end_time"])
+        if self._blocks is not None:
+            self._blocks.add(self.starts[row], self.ends[row])
+        self.titles[row] = event.get("title")
+        self.descriptions[row] = event.get("description")
+        self.locations[row] = event.get("location")
+        self.created_at[row] = event.get("created_at")
+        self._set_extras(event)
+
+    def add_many(self, events: List[Dict[str, Any]]):
+        # A batch larger than the table rebuilds the busy blocks in one sort
+        # rather than merging one event at a time
+        rebuild = self._blocks is None or len(events) > self._live
+        if rebuild:
+            self._blocks = None
+        for event in events:
+            self.add(event)
+        if rebuild:
+            self._blocks = self._build_blocks()
+
+    def remove(self, event_id: int) -> Optional[Dict[str, Any]]:
+        row = self._row_of(event_id)
+        if row is None:
+            return None
+        event = self._event(row)
+        self.alive[row] = 0
+        self._live -= 1
+        self.extras.pop(event_id, None)
+        if self._rows is not None:
+            del self._rows[event_id]
+        if self._blocks is not None:
+            self._blocks.remove(self.starts[row], self.ends[row], self._spans_starting)
+
+        # Reclaim space once tombstones outnumber live rows
+        if len(self.ids) - self._live > max(self._live, 1024):
+            self.compact()
+        return event
+
+    def compact(self):
+        """Drop tombstoned rows"""
+        keep = [row for row in range(len(self.ids)) if self.alive[row]]
+        for name in ("ids", "starts", "ends"):
+            column = getattr(self, name)
+            setattr(self, name, array('q', (column[row] for row in keep)))
+        for name in ("titles", "descriptions", "locations", "created_at"):
+            column = getattr(self, name)
+            setattr(self, name, [column[row] for row in keep])
+        self.alive = bytearray(b"\x01") * len(keep)
+        if self._rows is not None:
+            self._rows = {self.ids[row]: row for row in range(len(self.ids))}
+
+    def get(self, event_id: int) -> Optional[Dict[str, Any]]:
+        row = self._row_of(event_id)
+        return self._event(row) if row is not None else None
+
+    def epoch_span(self, event_id: int) -> Tuple[int, int]:
+        row = self._row_of(event_id)
+        if row is None:
+            raise KeyError(event_id)
+        return self.starts[row], self.ends[row]
+
+    def span(self, event_id: int) -> Tuple[datetime, datetime]:
+        start, end = self.epoch_span(event_id)
+        return from_epoch(start), from_epoch(end)
+
+    # Vectorized row selection
+
+    def _columns(self):
+        return (np.frombuffer(self.ids, dtype=np.int64),
+                np.frombuffer(self.starts, dtype=np.int64),
+                np.frombuffer(self.ends, dtype=np.int64),
+                np.frombuffer(self.alive, dtype=np.bool_))
+
+    def _live_rows(self):
+        if HAS_NUMPY:
+            return np.flatnonzero(self._columns()[3])
+        return [row for row in range(len(self.ids)) if self.alive[row]]
+
+    def _sorted_rows(self, rows):
+        """Order rows by (start, id)"""
+        if HAS_NUMPY:
+            ids, starts, _, _ = self._columns()
+            return rows[np.lexsort((ids[rows], starts[rows]))]
+        return sorted(rows, key=lambda row: (self.starts[row], self.ids[row]))
+
+    def _rows_starting(self, lo: int, hi: int):
+        if HAS_NUMPY:
+            _, starts, _, alive = self._columns()
+            return np.flatnonzero(alive & (starts >= lo) & (starts < hi))
+        return [row for row in range(len(self.ids))
+                if self.alive[row] and lo <= self.starts[row] < hi]
+
+    def _rows_overlapping(self, lo: int, hi: int):
+        if HAS_NUMPY:
+            _, starts, ends, alive = self._columns()
+            return np.flatnonzero(alive & (starts < hi) & ((ends > lo) | (starts >= lo)))
+        return [row for row in range(len(self.ids))
+                if self.alive[row] and self.starts[row] < hi
+                and (self.ends[row] > lo or self.starts[row] >= lo)]
+
+    # EventIndex-compatible queries
+
+    def starting_between(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        rows = self._sorted_rows(self._rows_starting(to_epoch(start), to_epoch(end)))
+        return [self._event(row) for row in rows]
+
+    def on_date(self, day: date) -> List[Dict[str, Any]]:
+        day_start = datetime.combine(day, time.min)
+        return self.starting_between(day_start, day_start + timedelta(days=1))
+
+    def between(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        rows = self._sorted_rows(self._rows_overlapping(to_epoch(start), to_epoch(end)))
+        return [self._event(row) for row in rows]
+
+    def _spans_starting(self, lo: int, hi: int) -> List[Tuple[int, int]]:
+        return sorted((self.starts[row], self.ends[row]) for row in self._rows_starting(lo, hi))
+
+    def _build_blocks(self) -> BusyBlocks:
+        rows = self._sorted_rows(self._live_rows())
+        return BusyBlocks((self.starts[row], self.ends[row]) for row in rows)
+
+    @property
+    def blocks(self) -> BusyBlocks:
+        """Merged busy blocks of the live rows"""
+        if self._blocks is None:
+            self._blocks = self._build_blocks()
+        return self._blocks
+
+    def has_overlap(self, start: datetime, end: datetime) -> bool:
+        """Whether any event overlaps [start, end), in O(log n)"""
+        return self.blocks.overlaps(to_epoch(start), to_epoch(end))
+
+    def busy_between(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        """Merged busy intervals overlapping [start, end).
+
+        Sorting and merging run on the epoch columns; only the merged
+        intervals are turned into datetimes.
+        """
+        rows = self._rows_overlapping(to_epoch(start), to_epoch(end))
+        if HAS_NUMPY:
+            _, starts, ends, _ = self._columns()
+            starts, ends = starts[rows], ends[rows]
+            order = np.argsort(starts, kind="stable")
+            starts, ends = starts[order], ends[order]
+            if len(starts) == 0:
+                return []
+            # A new block starts wherever an interval begins after every earlier one ended
+            reach = np.maximum.accumulate(ends)
+            breaks = np.flatnonzero(starts[1:] > reach[:-1]) + 1
+            block_starts = starts[np.concatenate(([0], breaks))]
+            block_ends = reach[np.concatenate((breaks - 1, [len(starts) - 1]))]
+            return [(from_epoch(int(s)), from_epoch(int(e))) for s, e in zip(block_starts, block_ends)]
+
+        merged: List[List[int]] = []
+        for row in sorted(rows, key=lambda row: self.starts[row]):
+            if merged and self.starts[row] <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], self.ends[row])
+            else:
+                merged.append([self.starts[row], self.ends[row]])
+        return [(from_epoch(s), from_epoch(e)) for s, e in merged]
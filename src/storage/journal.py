@@ -0,0 +1,240 @@
+import json
+import os
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+
+from ..metrics import default_metrics
+from .json_backend import NEXT_IDS, JsonBackend, start_ordered, write_json_atomic
+
+
+def apply_change(schedule: Dict[str, Any], change: Dict[str, Any],
+                 positions: Optional[Dict[str, Dict[int, int]]] = None):
+    """Apply one journal record to a schedule dict.
+
+    Records are idempotent (adds upsert by id, removes ignore missing ids) so
+    replaying a journal that was partly folded into the snapshot is safe.
+
+    positions maps kind -> {id: list index}. A replay passes the same dict
+    to every call so each record is found in O(1); removed records are left
+    as None until drop_removed(). Without positions the change is applied
+    on its own.
+    """
+    if positions is None:
+        positions = {}
+        apply_change(schedule, change, positions)
+        drop_removed(schedule)
+        return
+
+    kind = change["kind"]
+    records = schedule.setdefault(kind, [])
+    if kind not in positions:
+        positions[kind] = {record["id"]: i for i, record in enumerate(records) if record is not None}
+    index = positions[kind]
+    op = change["op"]
+
+    if op in ("add", "add_many"):
+        # Kept even if the record is removed later, so its id is not handed out again
+        next_ids = schedule.setdefault(NEXT_IDS, {})
+        for record in change["records"] if op == "add_many" else [change["record"]]:
+            if record["id"] in index:
+                records[index[record["id"]]] = record
+            else:
+                index[record["id"]] = len(records)
+                records.append(record)
+            next_ids[kind] = max(next_ids.get(kind, 1), record["id"] + 1)
+    elif op == "update":
+        if change["id"] in index:
+            records[index[change["id"]]].update(change["fields"])
+    elif op == "remove":
+        if change["id"] in index:
+            records[index.pop(change["id"])] = None
+    else:
+        raise ValueError(f"Unknown journal operation: {op}")
+
+
+def drop_removed(schedule: Dict[str, Any]):
+    """Drop the records apply_change removed during a replay, in one pass per kind"""
+    for kind, records in schedule.items():
+        if isinstance(records, list) and None in records:
+            schedule[kind] = [record for record in records if record is not None]
+
+
+class JournalBackend(JsonBackend):
+    """Snapshot plus append-only JSONL journal.
+
+    Each commit appends one line to <data_file>.journal, so a write costs
+    O(1) and a crash can at most leave the last line half-written, which is
+    dropped on the next load. Once the journal passes compact_bytes it is
+    rotated and folded into the snapshot on a background thread.
+    """
+
+    def __init__(self, data_file: str = "data/schedule.json", compact_bytes: int = 1 << 20,
+                 fsync: bool = False, event_table: bool = False):
+        self.journal_file = f"{data_file}.journal"
+        self.compacting_file = f"{data_file}.journal.compacting"
+        self.compact_bytes = compact_bytes
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+        self._journal = None
+        self._pending: List[bytes] = []
+        super().__init__(data_file, event_table=event_table)
+
+    def load(self) -> Dict[str, Any]:
+        """Load the snapshot and replay the journal on top of it"""
+        directory = os.path.dirname(self.data_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # A leftover rotated journal means a compaction was interrupted
+        if os.path.exists(self.compacting_file):
+            self._fold(self.compacting_file)
+
+        schedule = super().load()
+        good_bytes = self._replay(schedule, self.journal_file)
+
+        if os.path.exists(self.journal_file) and os.path.getsize(self.journal_file) != good_bytes:
+            # Cut off a torn final record so new appends start on a clean line
+            with open(self.journal_file, 'r+b') as f:
+                f.truncate(good_bytes)
+
+        self._journal = open(self.journal_file, 'ab')
+        self._journal_bytes = good_bytes
+        return schedule
+
+    @staticmethod
+    def _replay(schedule: Dict[str, Any], journal_file: str) -> int:
+        """Apply every complete record in journal_file; return the byte length replayed"""
+        changes, good_bytes = JournalBackend._read(journal_file)
+        positions: Dict[str, Dict[int, int]] = {}
+        for change in changes:
+            apply_change(schedule, change, positions)
+        drop_removed(schedule)
+        return good_bytes
+
+    @staticmethod
+    def _read(journal_file: str) -> Tuple[List[Dict[str, Any]], int]:
+        """The complete records in journal_file and their byte length; a torn last line is left out"""
+        if not os.path.exists(journal_file):
+            return [], 0
+
+        changes, good_bytes = [], 0
+        with open(journal_file, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    changes.append(json.loads(line))
+                except ValueError:
+                    break
+                good_bytes += len(line)
+        return changes, good_bytes
+
+    def commit(self, change: Dict[str, Any]):
+        """Queue a mutation for the journal, serialized as it is now"""
+        line = (json.dumps(change, separators=(",", ":")) + "\n").encode()
+        with self._lock:
+            self._pending.append(line)
+            self.dirty = True
+        if self.autoflush:
+            self.flush()
+
+    def flush(self):
+        """Append queued mutations to the journal in one write"""
+        with self._lock:
+            if not self._pending:
+                return
+            data = b"".join(self._pending)
+            self._pending = []
+            self.dirty = False
+
+            self._journal.write(data)
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+            self._journal_bytes += len(data)
+            metrics = default_metrics()
+            metrics.inc("schedule_bytes_written", len(data))
+            metrics.inc("schedule_writes")
+
+            if self._journal_bytes >= self.compact_bytes and not self._compaction_running():
+                self._rotate()
+                self._compactor = threading.Thread(
+                    target=self._fold, args=(self.compacting_file,), daemon=True
+                )
+                self._compactor.start()
+
+    def compact(self):
+        """Fold the whole journal into the snapshot now"""
+        self.flush()
+        while True:
+            self.wait_for_compaction()
+            with self._lock:
+                if self._compaction_running():
+                    continue
+                if self._journal_bytes == 0:
+                    return
+                self._rotate()
+                break
+        self._fold(self.compacting_file)
+
+    def wait_for_compaction(self):
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+
+    def close(self):
+        self.flush()
+        self.wait_for_compaction()
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    def _compaction_running(self) -> bool:
+        return self._compactor is not None and self._compactor.is_alive()
+
+    def _rotate(self):
+        """Move the live journal aside and start a fresh one (caller holds the lock)"""
+        self._journal.close()
+        os.replace(self.journal_file, self.compacting_file)
+        self._journal = open(self.journal_file, 'ab')
+        self._journal_bytes = 0
+
+    def _fold(self, journal_file: str):
+        """Rebuild the snapshot from disk plus journal_file, then drop journal_file"""
+        snapshot = JsonBackend.load(self)
+        self._replay(snapshot, journal_file)
+        default_metrics().inc("schedule_bytes_written", write_json_atomic(self.data_file, start_ordered(snapshot)))
+        os.remove(journal_file)
+
+
+class JournalSnapshot(JsonBackend):
+    """A journaled schedule opened read-only.
+
+    Loads the snapshot and replays both journals in memory as
+    JournalBackend.load does, but never cuts off a torn record, folds the
+    rotated journal or opens a file for writing, so it can be opened next
+    to a running JournalBackend. Commits are refused.
+    """
+
+    def __init__(self, data_file: str = "data/schedule.json"):
+        self.journal_file = f"{data_file}.journal"
+        self.compacting_file = f"{data_file}.journal.compacting"
+        super().__init__(data_file)
+
+    def load(self) -> Dict[str, Any]:
+        # Newest first: a rotation or fold in the meantime only moves records
+        # towards the snapshot, where the later reads still find them
+        live, _ = JournalBackend._read(self.journal_file)
+        rotated, _ = JournalBackend._read(self.compacting_file)
+        schedule = super().load()
+
+        positions: Dict[str, Dict[int, int]] = {}
+        for change in rotated + live:
+            apply_change(schedule, change, positions)
+        drop_removed(schedule)
+        return schedule
+
+    def commit(self, change: Dict[str, Any]):
+        raise RuntimeError(f"{self.data_file} is open read-only")
@@ -0,0 +1,421 @@
+import io
+import json
+import os
+import re
+import tempfile
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+
+from ..metrics import default_metrics
+from .base import StorageBackend, KINDS, overlapping
+from .event_index import EventIndex, stored_epoch
+from .event_table import EventTable
+from .recurrence import SeriesIndex, is_recurring, merge_events
+from .task_index import TaskIndex
+
+
+def empty_schedule() -> Dict[str, Any]:
+    return {"events": [], "tasks": []}
+
+
+# Top-level key holding the next unused id of each kind
+NEXT_IDS = "next_ids"
+
+# Top-level key marking a schedule.json whose events are laid out for
+# streaming readers: recurring series first, then one-off events by start
+EVENTS_ORDER = "events_order"
+START_ORDER = "series, then start_time"
+
+
+def start_ordered(schedule: Dict[str, Any]) -> Dict[str, Any]:
+    """schedule with its events in the START_ORDER layout, the marker ahead of them"""
+    series = [event for event in schedule["events"] if is_recurring(event)]
+    single = sorted((event for event in schedule["events"] if not is_recurring(event)),
+                    key=lambda event: (stored_epoch(event["start_time"]), event["id"]))
+    return {EVENTS_ORDER: START_ORDER, **schedule, "events": series + single}
+
+
+def write_json_atomic(path: str, data: Dict[str, Any], indent: int = 2, fsync: bool = True) -> int:
+    """Write JSON to a temp file and rename it over path so readers never see a partial file.
+
+    Each write gets its own temp file, so concurrent writers of the same
+    path never share one. fsync=False skips forcing the data to disk, for
+    files that are cheap to lose such as cache entries.
+    Returns the number of bytes written.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory or ".", prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent)
+            size = f.tell()
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        if os.path.exists(path):
+            # mkstemp creates the file owner-only; keep what the old file allowed
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return size
+
+
+# Characters read at a time when streaming a schedule file, and when
+# reading back a single record from its offset
+STREAM_CHUNK = 1 << 16
+RECORD_CHUNK = 1 << 10
+
+_WHITESPACE = re.compile(r"[ \t\r\n]*")
+
+
+class _StreamReader:
+    """Decodes one JSON value at a time from a file, refilling its buffer as needed"""
+
+    def __init__(self, f, chunk: int = STREAM_CHUNK):
+        self.f = f
+        self.chunk = chunk
+        self.buf = ""
+        self.pos = 0
+        # Offset in the file of buf[0]
+        self.base = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        chunk = "" if self.eof else self.f.read(self.chunk)
+        if not chunk:
+            self.eof = True
+            return False
+        self.base += self.pos
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """The next non-whitespace character ("" at the end of the file)"""
+        if self.pos < len(self.buf) and self.buf[self.pos] not in " \t\r\n":
+            return self.buf[self.pos]
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self._fill():
+                return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"expected '{char}' in schedule file")
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number cut off by the end of the buffer (or mid-exponent,
+                # as in "1." or "2e") goes on in the next chunk
+                if self.eof or (end < len(self.buf) and self.buf[end] not in "0123456789.eE+-"):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def items(self) -> Iterator[Tuple[int, Any]]:
+        """(offset, element) of the array that starts here, decoded one by one"""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            self.peek()
+            yield self.base + self.pos, self.value()
+            if self.peek() == "]":
+                self.pos += 1
+                return
+            self.expect(",")
+
+
+def stream_records(data_file: str, kind: str, offsets: bool = False) -> Iterator[Any]:
+    """Yield the records of one kind from a schedule.json, in file order, without loading the file.
+
+    Records are decoded one at a time, so memory stays flat and the first
+    one arrives as soon as its part of the file is read; arrays before
+    the requested one are stepped through the same way.
+
+    With offsets, (byte offset, record) pairs are yielded for
+    records_at() to read back later. The file is then decoded byte for
+    byte, so text outside ASCII comes out garbled; only ASCII fields such
+    as times and ids should be read from those records.
+    """
+    with open(data_file, 'r', encoding="latin-1" if offsets else None) as f:
+        reader = _StreamReader(f)
+        reader.expect("{")
+        while reader.peek() not in ("}", ""):
+            key = reader.value()
+            reader.expect(":")
+            if reader.peek() == "[":
+                for offset, record in reader.items():
+                    if key == kind:
+                        yield (offset, record) if offsets else record
+                if key == kind:
+                    return
+            else:
+                reader.value()
+            if reader.peek() == ",":
+                reader.pos += 1
+
+
+
+def read_header(data_file: str) -> Dict[str, Any]:
+    """The top-level values of a schedule.json that come before its first array"""
+    header = {}
+    with open(data_file, 'r') as f:
+        reader = _StreamReader(f, RECORD_CHUNK)
+        reader.expect("{")
+        while reader.peek() not in ("}", ""):
+            key = reader.value()
+            reader.expect(":")
+            if reader.peek() == "[":
+                break
+            header[key] = reader.value()
+            if reader.peek() == ",":
+                reader.pos += 1
+    return header
+
+
+def records_at(data_file: str, offsets: List[int]) -> Iterator[Dict[str, Any]]:
+    """Read back the records stream_records(..., offsets=True) found at offsets, in the order given"""
+    with open(data_file, 'rb') as f:
+        for offset in offsets:
+            f.seek(offset)
+            text = io.TextIOWrapper(f, encoding="utf-8")
+            try:
+                record = _StreamReader(text, RECORD_CHUNK).value()
+            finally:
+                text.detach()
+            yield record
+
+
+class JsonBackend(StorageBackend):
+    """Whole-file JSON storage: the schedule lives in memory and every commit rewrites data_file.
+
+    Records are held in per-kind id maps, in insertion order, so a delete
+    is a dict pop. With event_table, one-off events are held only in an
+    EventTable's columns and built as dicts when asked for; the events map
+    then holds just the recurring series.
+    """
+
+    def __init__(self, data_file: str = "data/schedule.json", event_table: bool = False):
+        self.data_file = data_file
+        self.event_table = event_table
+        schedule = self.load()
+        # Either index answers the one-off event queries; the table runs them
+        # as vectorized scans over epoch columns. Recurring series are kept
+        # apart and expanded per query.
+        single = [event for event in schedule["events"] if not is_recurring(event)]
+        self.index = EventTable(single) if event_table else EventIndex(single)
+        del single
+        self._by_id = {
+            kind: {record["id"]: record for record in schedule[kind] if not self._in_table(kind, record)}
+            for kind in KINDS
+        }
+        self.series = SeriesIndex([event for event in self._by_id["events"].values() if is_recurring(event)])
+        # Other top-level values of the file, written back as they were
+        self._extra = {key: value for key, value in schedule.items() if key not in KINDS}
+        # Ids are never handed out twice, even after the newest record is deleted
+        stored_ids = self._extra.pop(NEXT_IDS, None) or {}
+        self._next_ids = {
+            kind: max(max(self._by_id[kind], default=0) + 1, stored_ids.get(kind, 1)) for kind in KINDS
+        }
+        if event_table and len(self.index):
+            self._next_ids["events"] = max(self._next_ids["events"], max(self.index.ids) + 1)
+        # Status, urgency and due-date indexes, with due dates parsed once
+        self.task_index = TaskIndex(schedule["tasks"])
+
+    def _index_event(self, event: Dict[str, Any]):
+        """(Re)index an event as a one-off or a series, whichever it now is"""
+        if is_recurring(event):
+            self.index.remove(event["id"])
+            self.series.add(event)
+            if self.event_table:
+                self._by_id["events"][event["id"]] = event
+        else:
+            self.series.remove(event["id"])
+            self.index.add(event)
+            if self.event_table:
+                self._by_id["events"].pop(event["id"], None)
+
+    @property
+    def schedule(self) -> Dict[str, Any]:
+        """The schedule as one dict, built for each call"""
+        events = list(self._by_id["events"].values())
+        if self.event_table:
+            events = sorted(list(self.index) + events, key=lambda event: event["id"])
+        return {**self._extra, NEXT_IDS: dict(self._next_ids), "events": events,
+                "tasks": list(self._by_id["tasks"].values())}
+
+    def resident_records(self) -> int:
+        table_rows = len(self.index) if self.event_table else 0
+        return sum(len(self._by_id[kind]) for kind in KINDS) + table_rows
+
+    def load(self) -> Dict[str, Any]:
+        """Load schedule from JSON file"""
+        if os.path.exists(self.data_file):
+            try:
+                with open(self.data_file, 'r') as f:
+                    schedule = json.load(f)
+                schedule.setdefault("events", [])
+                schedule.setdefault("tasks", [])
+                return schedule
+            except:
+                return empty_schedule()
+        return empty_schedule()
+
+    def commit(self, change: Dict[str, Any]):
+        """Record a mutation that has already been applied in memory"""
+        self.dirty = True
+        if self.autoflush:
+            self.flush()
+
+    def flush(self):
+        if self.dirty:
+            metrics = default_metrics()
+            metrics.inc("schedule_bytes_written", write_json_atomic(self.data_file, self._start_ordered()))
+            metrics.inc("schedule_writes")
+            self.dirty = False
+
+    def _start_ordered(self) -> Dict[str, Any]:
+        """What flush writes: start_ordered(self.schedule), with the order taken from the indexes"""
+        events = list(self.series) + list(self.index)
+        return {EVENTS_ORDER: START_ORDER, **self._extra, NEXT_IDS: dict(self._next_ids), "events": events,
+                "tasks": list(self._by_id["tasks"].values())}
+
+    def get(self, kind: str, record_id: int) -> Optional[Dict[str, Any]]:
+        record = self._by_id[kind].get(record_id)
+        if record is None and kind == "events" and self.event_table:
+            return self.index.get(record_id)
+        return record
+
+    def _in_table(self, kind: str, record: Dict[str, Any]) -> bool:
+        """Whether record is stored in the event table rather than as a dict"""
+        return self.event_table and kind == "events" and not is_recurring(record)
+
+    def insert(self, kind: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        record = {"id": self._next_ids[kind], **{k: v for k, v in record.items() if k != "id"}}
+        self._next_ids[kind] += 1
+
+        if not self._in_table(kind, record):
+            self._by_id[kind][record["id"]] = record
+        if kind == "events":
+            self._index_event(record)
+        else:
+            self.task_index.add(record)
+
+        self.commit({"op": "add", "kind": kind, "record": record})
+        return record
+
+    def insert_many(self, kind: str, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        first_id = self._next_ids[kind]
+        records = [
+            {"id": first_id + i, **{k: v for k, v in record.items() if k != "id"}}
+            for i, record in enumerate(records)
+        ]
+        self._next_ids[kind] += len(records)
+
+        self._by_id[kind].update((record["id"], record) for record in records if not self._in_table(kind, record))
+        if kind == "events":
+            self.index.add_many([record for record in records if not is_recurring(record)])
+            for record in records:
+                if is_recurring(record):
+                    self.series.add(record)
+        else:
+            self.task_index.add_many(records)
+
+        self.commit({"op": "add_many", "kind": kind, "records": records})
+        return records
+
+    def update(self, kind: str, record_id: int, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        record = self.get(kind, record_id)
+        if record is None:
+            return None
+
+        record.update(fields)
+        if kind == "events":
+            self._index_event(record)
+        else:
+            self.task_index.add(record)
+
+        self.commit({"op": "update", "kind": kind, "id": record_id, "fields": fields})
+        return record
+
+    def delete(self, kind: str, record_id: int) -> Optional[Dict[str, Any]]:
+        record = self.get(kind, record_id)
+        if record is None:
+            return None
+
+        if kind == "events":
+            self.index.remove(record_id)
+            self.series.remove(record_id)
+        else:
+            self.task_index.remove(record_id)
+        self._by_id[kind].pop(record_id, None)
+
+        self.commit({"op": "remove", "kind": kind, "id": record_id})
+        return record
+
+    def all_events(self) -> List[Dict[str, Any]]:
+        # A series appears once, as its record, since it may never end
+        return merge_events(list(self.index), list(self.series), self.event_span)
+
+    def events_on(self, day: date) -> List[Dict[str, Any]]:
+        return merge_events(self.index.on_date(day), self.series.on_date(day), self.event_span)
+
+    def events_between(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        return merge_events(self.index.between(start, end), self.series.between(start, end), self.event_span)
+
+    def tasks(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        if status:
+            return self.task_index.with_status(status)
+        return list(self._by_id["tasks"].values())
+
+    def urgent_tasks(self, limit: int, status: str = "pending") -> List[Dict[str, Any]]:
+        return self.task_index.most_urgent(limit, status)
+
+    def overdue_tasks(self, as_of: datetime) -> List[Dict[str, Any]]:
+        return self.task_index.overdue(as_of)
+
+    def event_span(self, event: Dict[str, Any]) -> Tuple[datetime, datetime]:
+        if event["id"] in self.index:
+            return self.index.span(event["id"])
+        return super().event_span(event)
+
+    def busy_intervals(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        busy = self.index.busy_between(start, end)
+        if self.series:
+            busy = sorted(busy + self.series.busy_between(start, end))
+        return busy
+
+    def conflicts(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        # The busy blocks answer the common case, a free slot, without a range scan
+        events = self.index.between(start, end) if self.index.has_overlap(start, end) else []
+        if self.series:
+            events = merge_events(events, self.series.between(start, end), self.event_span)
+        return [event for event in events if overlapping([self.event_span(event)], start, end)]
+
+    def nearest_free(self, start: datetime, end: datetime,
+                     not_before: Optional[datetime] = None) -> Optional[Tuple[datetime, datetime]]:
+        more_busy = self.series.busy_between if self.series else None
+        return self._search_free(self.index.blocks, start, end, not_before, more_busy)
+
+    def task_due(self, task: Dict[str, Any]) -> Optional[datetime]:
+        if task["id"] not in self.task_index:
+            return super().task_due(task)
+        return self.task_index.due(task["id"])
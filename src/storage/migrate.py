@@ -0,0 +1,42 @@
+"""Convert a schedule.json file (plus any journal) into a SQLite database.
+
+Usage: python -m src.storage.migrate [data/schedule.json] [data/schedule.db]
+"""
+import os
+import sys
+
+from .json_backend import NEXT_IDS, JsonBackend
+from .journal import JournalBackend
+from .sqlite_backend import SqliteBackend
+
+
+def migrate_json_to_sqlite(json_file: str = "data/schedule.json",
+                           db_file: str = "data/schedule.db") -> str:
+    """Copy every event and task, keeping their ids"""
+    has_journal = os.path.exists(f"{json_file}.journal")
+    if not os.path.exists(json_file) and not has_journal:
+        return f"No schedule file found at {json_file}."
+
+    if has_journal:
+        source = JournalBackend(json_file)
+    else:
+        source = JsonBackend(json_file)
+
+    try:
+        target = SqliteBackend(db_file)
+        try:
+            schedule = source.schedule
+            for kind in ("events", "tasks"):
+                target.insert_raw(kind, schedule[kind])
+                target.reserve_ids(kind, schedule[NEXT_IDS][kind])
+        finally:
+            target.close()
+    finally:
+        source.close()
+
+    return (f"Migrated {len(schedule['events'])} events and "
+            f"{len(schedule['tasks'])} tasks to {db_file}.")
+
+
+if __name__ == "__main__":
+    print(migrate_json_to_sqlite(*sys.argv[1:3]))
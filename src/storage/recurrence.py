@@ -0,0 +1,213 @@
+import bisect
+import heapq
+import math
+import re
+from array import array
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, Iterator, List, Any, Optional, Tuple
+
+from ..metrics import default_metrics
+from .event_index import from_epoch, parse_stored_time, stored_epoch, to_epoch, wall_clock
+
+# Occurrences cached per series; a series expanded further than this is
+# expanded per query instead
+SERIES_MAX_CACHED = 100_000
+
+# Stored times are wall clock, so a UTC UNTIL is read as wall clock too
+# (dateutil refuses a UTC UNTIL with a naive DTSTART)
+_UTC_UNTIL = re.compile(r"(UNTIL=\d{8}(?:T\d{6})?)Z", re.IGNORECASE)
+
+
+def is_recurring(event: Dict[str, Any]) -> bool:
+    """Whether a stored event is a series (has an RRULE) rather than a one-off"""
+    return bool(event.get("rrule"))
+
+
+def normalize_rrule(rule: str) -> str:
+    """RRULE value without the "RRULE:" prefix, upper-cased"""
+    rule = rule.strip()
+    if rule.upper().startswith("RRULE:"):
+        rule = rule[len("RRULE:"):]
+    return rule.upper()
+
+
+def build_rule(event: Dict[str, Any]):
+    """dateutil rruleset of a series: its RRULE from start_time, minus its exdates"""
+    from dateutil.rrule import rrulestr
+
+    dtstart = wall_clock(parse_stored_time(event["start_time"]))
+    rules = rrulestr(_UTC_UNTIL.sub(r"\1", normalize_rrule(event["rrule"])), dtstart=dtstart, forceset=True)
+    for value in event.get("exdates") or []:
+        rules.exdate(wall_clock(parse_stored_time(value)))
+    return rules
+
+
+def first_occurrence(event: Dict[str, Any]) -> Optional[datetime]:
+    """Start of a series' first occurrence (None if every one is excluded)"""
+    return build_rule(event).after(wall_clock(parse_stored_time(event["start_time"])), inc=True)
+
+
+def merge_events(events: List[Dict[str, Any]], occurrences: List[Dict[str, Any]],
+                 span: Callable[[Dict[str, Any]], Tuple[datetime, datetime]]) -> List[Dict[str, Any]]:
+    """Merge two start-ordered event lists into one"""
+    if not occurrences:
+        return events
+    if not events:
+        return occurrences
+    return list(heapq.merge(events, occurrences, key=lambda event: span(event)[0]))
+
+
+class SeriesIndex:
+    """Recurring events, one record per series, expanded on demand.
+
+    A series is an event with an "rrule" (an RFC 5545 RRULE such as
+    FREQ=WEEKLY;BYDAY=MO) and optional "exdates"; its start_time and
+    end_time are the first occurrence. Each series caches the occurrence
+    starts expanded so far, from its first occurrence up to the end of the
+    latest window queried, and extends them from a live rrule iterator when
+    a later window is asked for; lookups are a bisect into the cache. The
+    cache is dropped when the series is re-added (edited) or removed.
+    Occurrences are copies of the series record with their own times and a
+    recurrence_id, the occurrence's original start.
+    """
+
+    def __init__(self, events: Optional[List[Dict[str, Any]]] = None,
+                 max_cached: int = SERIES_MAX_CACHED):
+        self.max_cached = max_cached
+        self._events: Dict[int, Dict[str, Any]] = {}
+        self._firsts: Dict[int, int] = {}
+        self._durations: Dict[int, int] = {}
+        # Per series: the rule, expanded starts, the iterator that continues
+        # them, and the epoch below which the starts are complete
+        self._rules: Dict[int, Any] = {}
+        self._starts: Dict[int, array] = {}
+        self._iterators: Dict[int, Iterator[datetime]] = {}
+        self._horizons: Dict[int, float] = {}
+
+        for event in events or []:
+            self.add(event)
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __contains__(self, event_id: int) -> bool:
+        return event_id in self._events
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Iterate series records in order of their first occurrence"""
+        for _, event_id in sorted((first, event_id) for event_id, first in self._firsts.items()):
+            yield self._events[event_id]
+
+    def add(self, event: Dict[str, Any]):
+        """Index a new or edited series, dropping its cached expansion"""
+        event_id = event["id"]
+        start = stored_epoch(event["start_time"])
+        self._events[event_id] = event
+        self._firsts[event_id] = start
+        self._durations[event_id] = stored_epoch(event["end_time"]) - start
+        self._forget(event_id)
+
+    def remove(self, event_id: int) -> Optional[Dict[str, Any]]:
+        event = self._events.pop(event_id, None)
+        if event is None:
+            return None
+        del self._firsts[event_id]
+        del self._durations[event_id]
+        self._forget(event_id)
+        return event
+
+    def _forget(self, event_id: int):
+        for cache in (self._rules, self._starts, self._iterators, self._horizons):
+            cache.pop(event_id, None)
+
+    def get(self, event_id: int) -> Optional[Dict[str, Any]]:
+        return self._events.get(event_id)
+
+    def _rule(self, event_id: int):
+        rule = self._rules.get(event_id)
+        if rule is None:
+            rule = self._rules[event_id] = build_rule(self._events[event_id])
+        return rule
+
+    def _expanded_to(self, event_id: int, hi: int) -> Optional[array]:
+        """Cached starts, complete below hi; None if that would pass max_cached"""
+        starts = self._starts.get(event_id)
+        if starts is not None and self._horizons[event_id] >= hi:
+            default_metrics().inc("series_cache_hits")
+            return starts
+
+        default_metrics().inc("series_cache_misses")
+        if starts is None:
+            starts = self._starts[event_id] = array('q')
+            self._iterators[event_id] = iter(self._rule(event_id))
+        iterator = self._iterators.get(event_id)
+        if iterator is None:
+            return None
+        for occurrence in iterator:
+            start = to_epoch(occurrence)
+            starts.append(start)
+            if start >= hi:
+                self._horizons[event_id] = start + 1
+                return starts
+            if len(starts) >= self.max_cached:
+                # Keep what is cached; windows past it are expanded on their own
+                self._horizons[event_id] = start + 1
+                del self._iterators[event_id]
+                return None
+        # The rule has ended (COUNT or UNTIL); nothing is left to expand
+        self._horizons[event_id] = math.inf
+        return starts
+
+    def expand(self, event_id: int, lo: int, hi: int) -> List[int]:
+        """Start epochs of the series' occurrences starting in [lo, hi)"""
+        starts = self._expanded_to(event_id, hi)
+        if starts is None:
+            # Too far out to keep from the first occurrence; expand this window alone
+            occurrences = self._rule(event_id).between(from_epoch(lo), from_epoch(hi), inc=True)
+            return [start for start in map(to_epoch, occurrences) if lo <= start < hi]
+        first = bisect.bisect_left(starts, lo)
+        return starts[first:bisect.bisect_left(starts, hi, first)].tolist()
+
+    def _spans(self, lo: int, hi: int, overlapping: bool) -> List[Tuple[int, int]]:
+        """(start, series id) of occurrences in [lo, hi), in start order.
+
+        With overlapping, occurrences that started earlier but are still
+        running at lo count too.
+        """
+        spans = []
+        for event_id, first in self._firsts.items():
+            if first >= hi:
+                continue
+            duration = self._durations[event_id]
+            earliest = lo - duration if overlapping else lo
+            spans.extend((start, event_id) for start in self.expand(event_id, earliest, hi)
+                         if start >= lo or start + duration > lo)
+        spans.sort()
+        return spans
+
+    def _occurrence(self, event_id: int, start: int) -> Dict[str, Any]:
+        occurrence = {key: value for key, value in self._events[event_id].items() if key != "exdates"}
+        occurrence["start_time"] = from_epoch(start).isoformat()
+        occurrence["end_time"] = from_epoch(start + self._durations[event_id]).isoformat()
+        occurrence["recurrence_id"] = occurrence["start_time"]
+        return occurrence
+
+    def starting_between(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """Occurrences whose start falls in [start, end), in start order"""
+        return [self._occurrence(event_id, begin)
+                for begin, event_id in self._spans(to_epoch(start), to_epoch(end), overlapping=False)]
+
+    def on_date(self, day: date) -> List[Dict[str, Any]]:
+        """Occurrences starting on the given calendar day"""
+        day_start = datetime.combine(day, time.min)
+        return self.starting_between(day_start, day_start + timedelta(days=1))
+
+    def between(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """Occurrences overlapping [start, end), in start order"""
+        return [self._occurrence(event_id, begin)
+                for begin, event_id in self._spans(to_epoch(start), to_epoch(end), overlapping=True)]
+
+    def busy_between(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        """(start, end) of occurrences overlapping [start, end), without building records"""
+        return [(from_epoch(begin), from_epoch(begin + self._durations[event_id]))
+                for begin, event_id in self._spans(to_epoch(start), to_epoch(end), overlapping=True)]
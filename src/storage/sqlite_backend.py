@@ -0,0 +1,368 @@
+import heapq
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterator, List, Any, Optional
+
+from ..metrics import default_metrics
+from .base import StorageBackend
+from .event_index import parse_stored_time, wall_clock
+from .recurrence import SeriesIndex, is_recurring, merge_events
+from .task_index import DONE_STATUSES, PRIORITY_RANK
+
+COLUMNS = {
+    "events": ("id", "title", "start_time", "end_time", "description", "location", "created_at", "rrule"),
+    "tasks": ("id", "title", "due_date", "priority", "description", "status", "created_at"),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    description TEXT,
+    location TEXT,
+    created_at TEXT,
+    rrule TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_events_start_time ON events (start_time);
+CREATE INDEX IF NOT EXISTS idx_events_end_time ON events (end_time);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    due_date TEXT,
+    priority TEXT,
+    description TEXT,
+    status TEXT NOT NULL,
+    created_at TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status);
+CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON tasks (due_date);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+# Urgency order of tasks: priority rank, then due date with undated tasks last
+URGENCY_ORDER = ("CASE priority " + " ".join(f"WHEN '{name}' THEN {rank}" for name, rank in PRIORITY_RANK.items())
+                 + f" ELSE {len(PRIORITY_RANK)} END, due_date IS NULL, due_date")
+URGENCY_INDEX = f"CREATE INDEX IF NOT EXISTS idx_tasks_urgency ON tasks (status, {URGENCY_ORDER}, id)"
+
+# Only series rows, so loading them on open reads those rows and not the whole table
+SERIES_INDEX = "CREATE INDEX IF NOT EXISTS idx_events_series ON events (id) WHERE rrule IS NOT NULL"
+
+
+def _iso_bound(dt: datetime) -> str:
+    """ISO string comparable with stored timestamps.
+
+    Stored times are isoformat() output, so for timestamps of the same
+    shape string order is wall-clock order.
+    """
+    return wall_clock(dt).isoformat()
+
+
+class SqliteBackend(StorageBackend):
+    """SQLite storage in WAL mode with indexed time and status lookups.
+
+    Fields outside the known columns are kept as JSON in an extra column,
+    so records round-trip unchanged. Recurring series (rows with an rrule)
+    are also held in memory and expanded per query; the time-range queries
+    only scan one-off events.
+    """
+
+    def __init__(self, db_file: str = "data/schedule.db"):
+        self.db_file = db_file
+        directory = os.path.dirname(db_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._write_depth = 0
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.execute(URGENCY_INDEX)
+        # Databases created before recurring events lack the rrule column
+        if "rrule" not in {row["name"] for row in self.conn.execute("PRAGMA table_info(events)")}:
+            self.conn.execute("ALTER TABLE events ADD COLUMN rrule TEXT")
+        self.conn.execute(SERIES_INDEX)
+        self.conn.commit()
+
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'max_event_seconds'").fetchone()
+        self._max_event_seconds = int(row["value"]) if row else 0
+        self.series = SeriesIndex(self._select("SELECT * FROM events WHERE rrule IS NOT NULL"))
+
+    def _to_row(self, kind: str, record: Dict[str, Any]) -> List[Any]:
+        columns = COLUMNS[kind]
+        extra = {key: value for key, value in record.items() if key not in columns}
+        return [record.get(column) for column in columns] + [json.dumps(extra) if extra else None]
+
+    @staticmethod
+    def _to_record(row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        extra = record.pop("extra", None)
+        if extra:
+            record.update(json.loads(extra))
+        # One-off events come back without the column, as they were stored
+        if "rrule" in record and record["rrule"] is None:
+            del record["rrule"]
+        return record
+
+    @contextmanager
+    def _write(self):
+        """Run statements in the open transaction; commit now unless writes are deferred.
+
+        Each write runs under its own savepoint, so one that fails is undone
+        on its own and a later flush() never commits half of it.
+        """
+        with self._lock:
+            if not self.conn.in_transaction:
+                self.conn.execute("BEGIN")
+            self.conn.execute("SAVEPOINT write")
+            self._write_depth += 1
+            try:
+                yield
+            except Exception:
+                self.conn.execute("ROLLBACK TO write")
+                self.conn.execute("RELEASE write")
+                if self.autoflush and self._write_depth == 1:
+                    self.conn.rollback()
+                raise
+            finally:
+                self._write_depth -= 1
+            self.conn.execute("RELEASE write")
+            self.dirty = True
+            # Writes nested in another (insert_many -> insert_raw) commit with the outer one
+            if self.autoflush and self._write_depth == 0:
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            if self.dirty:
+                default_metrics().inc("schedule_writes")
+            self.conn.commit()
+            self.dirty = False
+
+    def _note_duration(self, kind: str, record: Dict[str, Any]):
+        """Track the longest event so range queries can bound their start_time scan"""
+        if kind != "events" or is_recurring(record):
+            return
+        start = wall_clock(parse_stored_time(record["start_time"]))
+        end = wall_clock(parse_stored_time(record["end_time"]))
+        seconds = int((end - start).total_seconds()) + 1
+        if seconds > self._max_event_seconds:
+            self._max_event_seconds = seconds
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('max_event_seconds', ?)", (str(seconds),)
+            )
+
+    def _track_series(self, kind: str, record: Dict[str, Any]):
+        """Keep the in-memory series index in step with the events table"""
+        if kind != "events":
+            return
+        if is_recurring(record):
+            self.series.add(record)
+        else:
+            self.series.remove(record["id"])
+
+    def _select(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [self._to_record(row) for row in rows]
+
+    def _stream(self, sql: str, params: tuple = ()) -> Iterator[Dict[str, Any]]:
+        """Records as SQLite produces them, for callers that may stop early"""
+        cursor = self.conn.execute(sql, params)
+        try:
+            for row in cursor:
+                yield self._to_record(row)
+        finally:
+            cursor.close()
+
+    def get(self, kind: str, record_id: int) -> Optional[Dict[str, Any]]:
+        records = self._select(f"SELECT * FROM {kind} WHERE id = ?", (record_id,))
+        return records[0] if records else None
+
+    def _take_ids(self, kind: str, count: int) -> int:
+        """The first of count new ids; like the JSON backends, ids of deleted records are not reused"""
+        key = f"next_id_{kind}"
+        row = self.conn.execute(f"SELECT COALESCE(MAX(id), 0) AS max_id FROM {kind}").fetchone()
+        stored = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        first_id = max(row["max_id"] + 1, int(stored["value"]) if stored else 1)
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(first_id + count)))
+        return first_id
+
+    def reserve_ids(self, kind: str, next_id: int):
+        """Hand out no id below next_id (used by the migration tool to carry the JSON counters over)"""
+        with self._write():
+            first_id = self._take_ids(kind, 0)
+            if next_id > first_id:
+                self.conn.execute("UPDATE meta SET value = ? WHERE key = ?", (str(next_id), f"next_id_{kind}"))
+
+    def insert(self, kind: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        columns = COLUMNS[kind] + ("extra",)
+        placeholders = ", ".join("?" for _ in columns)
+        with self._write():
+            record = {"id": self._take_ids(kind, 1), **{k: v for k, v in record.items() if k != "id"}}
+            self._note_duration(kind, record)
+            self.conn.execute(
+                f"INSERT INTO {kind} ({', '.join(columns)}) VALUES ({placeholders})",
+                self._to_row(kind, record),
+            )
+        self._track_series(kind, record)
+        return record
+
+    def insert_many(self, kind: str, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        with self._write():
+            first_id = self._take_ids(kind, len(records))
+            records = [
+                {"id": first_id + i, **{k: v for k, v in record.items() if k != "id"}}
+                for i, record in enumerate(records)
+            ]
+            self.insert_raw(kind, records)
+        return records
+
+    def insert_raw(self, kind: str, records: List[Dict[str, Any]]):
+        """Insert records keeping their existing ids (used by the migration tool)"""
+        columns = COLUMNS[kind] + ("extra",)
+        placeholders = ", ".join("?" for _ in columns)
+        with self._write():
+            for record in records:
+                self._note_duration(kind, record)
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO {kind} ({', '.join(columns)}) VALUES ({placeholders})",
+                (self._to_row(kind, record) for record in records),
+            )
+        for record in records:
+            self._track_series(kind, record)
+
+    def update(self, kind: str, record_id: int, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self._write():
+            record = self.get(kind, record_id)
+            if record is None:
+                return None
+            record.update(fields)
+            self._note_duration(kind, record)
+            columns = COLUMNS[kind][1:] + ("extra",)
+            assignments = ", ".join(f"{column} = ?" for column in columns)
+            self.conn.execute(
+                f"UPDATE {kind} SET {assignments} WHERE id = ?",
+                self._to_row(kind, record)[1:] + [record_id],
+            )
+        self._track_series(kind, record)
+        return record
+
+    def delete(self, kind: str, record_id: int) -> Optional[Dict[str, Any]]:
+        with self._write():
+            record = self.get(kind, record_id)
+            if record is not None:
+                self.conn.execute(f"DELETE FROM {kind} WHERE id = ?", (record_id,))
+        if kind == "events":
+            self.series.remove(record_id)
+        return record
+
+    def all_events(self) -> List[Dict[str, Any]]:
+        return self._select("SELECT * FROM events ORDER BY start_time, id")
+
+    def events_on(self, day: date) -> List[Dict[str, Any]]:
+        day_start = datetime.combine(day, time.min)
+        events = self._select(
+            "SELECT * FROM events WHERE start_time >= ? AND start_time < ? AND rrule IS NULL "
+            "ORDER BY start_time, id",
+            (_iso_bound(day_start), _iso_bound(day_start + timedelta(days=1))),
+        )
+        return merge_events(events, self.series.on_date(day), self.event_span)
+
+    def events_between(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        # No event is longer than _max_event_seconds, so the start_time index
+        # bounds the scan on both sides.
+        earliest = start - timedelta(seconds=self._max_event_seconds)
+        start_iso = _iso_bound(start)
+        events = self._select(
+            "SELECT * FROM events WHERE start_time >= ? AND start_time < ? "
+            "AND (end_time > ? OR start_time >= ?) AND rrule IS NULL ORDER BY start_time, id",
+            (_iso_bound(earliest), _iso_bound(end), start_iso, start_iso),
+        )
+        return merge_events(events, self.series.between(start, end), self.event_span)
+
+    def iter_events(self, start: Optional[datetime] = None,
+                    end: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        if start is None or end is None:
+            yield from self._stream("SELECT * FROM events ORDER BY start_time, id")
+            return
+        # One-off events stream from the start_time index (bounded as in
+        # events_between); series are merged in at their first occurrence
+        earliest = start - timedelta(seconds=self._max_event_seconds)
+        start_iso = _iso_bound(start)
+        events = self._stream(
+            "SELECT * FROM events WHERE start_time >= ? AND start_time < ? "
+            "AND (end_time > ? OR start_time >= ?) AND rrule IS NULL ORDER BY start_time, id",
+            (_iso_bound(earliest), _iso_bound(end), start_iso, start_iso),
+        )
+        firsts = {}
+        for occurrence in self.series.between(start, end):
+            firsts.setdefault(occurrence["id"], occurrence["start_time"])
+        series = sorted((first, event_id) for event_id, first in firsts.items())
+        merged = heapq.merge(((event["start_time"], event) for event in events),
+                             ((first, self.series.get(event_id)) for first, event_id in series),
+                             key=lambda pair: pair[0])
+        for _, event in merged:
+            yield event
+
+    def iter_tasks(self, status: Optional[str] = None, priority: Optional[str] = None,
+                   due_from: Optional[datetime] = None, due_to: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        clauses, params = [], []
+        for column, value in (("status", status), ("priority", priority)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if due_from is not None:
+            clauses.append("due_date >= ?")
+            params.append(_iso_bound(due_from))
+        if due_to is not None:
+            clauses.append("due_date < ?")
+            params.append(_iso_bound(due_to))
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        yield from self._stream(f"SELECT * FROM tasks {where}ORDER BY id", tuple(params))
+
+    def tasks(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        if status:
+            return self._select("SELECT * FROM tasks WHERE status = ? ORDER BY id", (status,))
+        return self._select("SELECT * FROM tasks ORDER BY id")
+
+    def urgent_tasks(self, limit: int, status: str = "pending") -> List[Dict[str, Any]]:
+        return self._select(f"SELECT * FROM tasks WHERE status = ? ORDER BY {URGENCY_ORDER}, id LIMIT ?",
+                            (status, limit))
+
+    def overdue_tasks(self, as_of: datetime) -> List[Dict[str, Any]]:
+        done = ", ".join("?" for _ in DONE_STATUSES)
+        return self._select(
+            f"SELECT * FROM tasks WHERE due_date IS NOT NULL AND due_date < ? AND status NOT IN ({done}) "
+            "ORDER BY due_date, id",
+            (_iso_bound(as_of),) + DONE_STATUSES,
+        )
+
+    @property
+    def schedule(self) -> Dict[str, Any]:
+        """Materialize the whole database; prefer the query methods for large schedules"""
+        return {
+            "events": self._select("SELECT * FROM events ORDER BY id"),
+            "tasks": self._select("SELECT * FROM tasks ORDER BY id"),
+        }
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self.conn.close()
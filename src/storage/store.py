@@ -0,0 +1,151 @@
+import atexit
+import threading
+import time
+from datetime import date, datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+from .base import StorageBackend
+
+
+class ScheduleStore(StorageBackend):
+    """The one schedule shared by CalendarManager and TaskManager.
+
+    Wraps a storage backend with writes deferred: mutations only set the
+    dirty flag, and the backend is flushed at most once per flush_interval
+    seconds (on the next mutation after the interval), whenever flush() is
+    called, and at interpreter exit. flush_interval=0 writes through.
+
+    Without a backend argument, the backend for data_file is opened (and
+    the schedule loaded) on first access, so a store that is never read
+    costs nothing.
+    """
+
+    def __init__(self, data_file: str = "data/schedule.json",
+                 backend: Optional[StorageBackend] = None, flush_interval: float = 0):
+        self.data_file = data_file
+        self._backend: Optional[StorageBackend] = None
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._last_flush = time.monotonic()
+        self.flush_count = 0
+        if backend is not None:
+            self._attach(backend)
+        atexit.register(self.flush)
+
+    def _attach(self, backend: StorageBackend):
+        backend.autoflush = False
+        self._backend = backend
+
+    @property
+    def loaded(self) -> bool:
+        return self._backend is not None
+
+    @property
+    def backend(self) -> StorageBackend:
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    from . import open_backend
+                    self._attach(open_backend(self.data_file))
+        return self._backend
+
+    @property
+    def dirty(self) -> bool:
+        return self.loaded and self._backend.dirty
+
+    @property
+    def schedule(self) -> Dict[str, Any]:
+        return self.backend.schedule
+
+    def _mutated(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write pending mutations if there are any"""
+        with self._lock:
+            if self.dirty:
+                self._backend.flush()
+                self.flush_count += 1
+            self._last_flush = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            if self.loaded:
+                self._backend.close()
+        atexit.unregister(self.flush)
+
+    def get(self, kind: str, record_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self.backend.get(kind, record_id)
+
+    def insert(self, kind: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            record = self.backend.insert(kind, record)
+            self._mutated()
+            return record
+
+    def insert_many(self, kind: str, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        with self._lock:
+            records = self.backend.insert_many(kind, records)
+            self._mutated()
+            return records
+
+    def update(self, kind: str, record_id: int, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self.backend.update(kind, record_id, fields)
+            self._mutated()
+            return record
+
+    def delete(self, kind: str, record_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self.backend.delete(kind, record_id)
+            self._mutated()
+            return record
+
+    def all_events(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self.backend.all_events()
+
+    def events_on(self, day: date) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self.backend.events_on(day)
+
+    def events_between(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self.backend.events_between(start, end)
+
+    def tasks(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self.backend.tasks(status)
+
+    def urgent_tasks(self, limit: int, status: str = "pending") -> List[Dict[str, Any]]:
+        with self._lock:
+            return self.backend.urgent_tasks(limit, status)
+
+    def overdue_tasks(self, as_of: datetime) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self.backend.overdue_tasks(as_of)
+
+    def event_span(self, event: Dict[str, Any]) -> Tuple[datetime, datetime]:
+        return self.backend.event_span(event)
+
+    def busy_intervals(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        with self._lock:
+            return self.backend.busy_intervals(start, end)
+
+    def conflicts(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self.backend.conflicts(start, end)
+
+    def nearest_free(self, start: datetime, end: datetime,
+                     not_before: Optional[datetime] = None) -> Optional[Tuple[datetime, datetime]]:
+        with self._lock:
+            return self.backend.nearest_free(start, end, not_before)
+
+    def task_due(self, task: Dict[str, Any]) -> Optional[datetime]:
+        return self.backend.task_due(task)
+
+    def resident_records(self) -> int:
+        return self._backend.resident_records() if self.loaded else 0
@@ -0,0 +1,123 @@
+import bisect
+import math
+from datetime import datetime
+from typing import Dict, Iterator, List, Any, Optional, Set, Tuple
+
+from .event_index import from_epoch, stored_epoch, to_epoch
+
+# Most urgent first; unknown priorities sort after low
+PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+
+# Statuses that can no longer be overdue
+DONE_STATUSES = ("completed",)
+
+
+class TaskIndex:
+    """Secondary indexes over tasks.
+
+    Holds id -> task, status -> ids, and per status two sorted key lists:
+    (priority rank, due, id) for urgency and (due, id) for due-date
+    ranges, with due dates parsed once into wall-clock epoch seconds
+    (tasks without one sort last). A status filter returns its id set,
+    the N most urgent tasks are the head of one list, and overdue tasks
+    are a bisect into the others, so each query costs O(log n + k).
+    Like EventIndex it holds references to the task dicts; callers
+    add (or re-add after an edit) and remove alongside schedule["tasks"].
+    """
+
+    def __init__(self, tasks: Optional[List[Dict[str, Any]]] = None):
+        self._tasks: Dict[int, Dict[str, Any]] = {}
+        self._by_status: Dict[str, Set[int]] = {}
+        self._urgency: Dict[str, List[Tuple[int, float, int]]] = {}
+        self._due_order: Dict[str, List[Tuple[float, int]]] = {}
+        # What each task is indexed under, to find its keys again on removal
+        self._keys: Dict[int, Tuple[str, int, float]] = {}
+
+        self.add_many(tasks or [])
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __contains__(self, task_id: int) -> bool:
+        return task_id in self._tasks
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Iterate tasks in id order"""
+        for task_id in sorted(self._tasks):
+            yield self._tasks[task_id]
+
+    def _store(self, task: Dict[str, Any]) -> Tuple[str, int, float]:
+        task_id = task["id"]
+        status = task.get("status")
+        rank = PRIORITY_RANK.get(task.get("priority"), len(PRIORITY_RANK))
+        due = stored_epoch(task["due_date"]) if task.get("due_date") else math.inf
+
+        self._tasks[task_id] = task
+        self._keys[task_id] = (status, rank, due)
+        self._by_status.setdefault(status, set()).add(task_id)
+        self._urgency.setdefault(status, []).append((rank, due, task_id))
+        self._due_order.setdefault(status, []).append((due, task_id))
+        return status, rank, due
+
+    def add(self, task: Dict[str, Any]):
+        """Index a new task, or re-index one whose status, priority or due date changed"""
+        task_id = task["id"]
+        if task_id in self._tasks:
+            self.remove(task_id)
+        status, rank, due = self._store(task)
+        # _store appended the keys; move them into place
+        self._urgency[status].pop()
+        bisect.insort(self._urgency[status], (rank, due, task_id))
+        self._due_order[status].pop()
+        bisect.insort(self._due_order[status], (due, task_id))
+
+    def add_many(self, tasks: List[Dict[str, Any]]):
+        """Index a batch of tasks with one sort per key list instead of an insort per task"""
+        for task in tasks:
+            if task["id"] in self._tasks:
+                self.remove(task["id"])
+            self._store(task)
+        for keys in (self._urgency, self._due_order):
+            for entries in keys.values():
+                entries.sort()
+
+    def remove(self, task_id: int) -> Optional[Dict[str, Any]]:
+        """Drop a task from the index and return it"""
+        task = self._tasks.pop(task_id, None)
+        if task is None:
+            return None
+
+        status, rank, due = self._keys.pop(task_id)
+        self._by_status[status].discard(task_id)
+        urgency = self._urgency[status]
+        del urgency[bisect.bisect_left(urgency, (rank, due, task_id))]
+        due_order = self._due_order[status]
+        del due_order[bisect.bisect_left(due_order, (due, task_id))]
+        return task
+
+    def get(self, task_id: int) -> Optional[Dict[str, Any]]:
+        return self._tasks.get(task_id)
+
+    def due(self, task_id: int) -> Optional[datetime]:
+        """Parsed due date of an indexed task"""
+        due = self._keys[task_id][2]
+        return from_epoch(due) if due != math.inf else None
+
+    def with_status(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Tasks in id order, optionally only those with status"""
+        if status is None:
+            return list(self)
+        return [self._tasks[task_id] for task_id in sorted(self._by_status.get(status, ()))]
+
+    def most_urgent(self, limit: int, status: str = "pending") -> List[Dict[str, Any]]:
+        """Up to limit tasks with status, highest priority then earliest due first"""
+        return [self._tasks[task_id] for _, _, task_id in self._urgency.get(status, [])[:limit]]
+
+    def overdue(self, as_of: datetime) -> List[Dict[str, Any]]:
+        """Unfinished tasks due before as_of, earliest due first"""
+        cutoff = to_epoch(as_of)
+        keys = []
+        for status, due_order in self._due_order.items():
+            if status not in DONE_STATUSES:
+                keys.extend(due_order[:bisect.bisect_left(due_order, (cutoff, -1))])
+        return [self._tasks[task_id] for _, task_id in sorted(keys)]
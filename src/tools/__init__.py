@@ -1,5 +1,6 @@
-from .calendar_tools import CalendarManager
+from .calender_tools import CalendarManager
 from .task_tools import TaskManager, Priority, Status
-from .scheduling_tools import SchedulingTools
+from .scheduling_tools import SchedulingTools, Participant
+from .time_parsing import parse_time, parse_stats
 
-__all__ = ['CalendarManager', 'TaskManager', 'Priority', 'Status', 'SchedulingTools']
\ No newline at end of file
+__all__ = ['CalendarManager', 'TaskManager', 'Priority', 'Status', 'SchedulingTools', 'Participant', 'parse_time', 'parse_stats']
\ No newline at end of file
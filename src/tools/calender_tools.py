@@ -1,91 +1,215 @@
-import json
 import os
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
-import pytz
-from dateutil import parser
+from datetime import datetime, time, timedelta
+from typing import Dict, List, Any, Iterable, Optional
+from ..storage import ScheduleStore
+from ..storage.base import FREE_SEARCH_DAYS
+from ..storage.event_index import parse_stored_time, wall_clock
+from ..storage.recurrence import first_occurrence, is_recurring, normalize_rrule
+from .time_parsing import parse_time
+
+# What add_event does with a booking that overlaps existing events: "allow"
+# it, "reject" it, or reject it and "suggest" the nearest free slot
+CONFLICT_POLICIES = ("allow", "reject", "suggest")
+
+# Settings
+CALENDAR_CONFLICT_POLICY = os.getenv("CALENDAR_CONFLICT_POLICY", "allow").lower()
 
 class CalendarManager:
-    def __init__(self, data_file: str = "data/schedule.json"):
+    def __init__(self, data_file: str = "data/schedule.json", store: Optional[ScheduleStore] = None):
         self.data_file = data_file
-        self.schedule = self._load_schedule()
+        self.store = store or ScheduleStore(data_file)
     
-    def _load_schedule(self) -> Dict[str, Any]:
-        """Load schedule from JSON file"""
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return {"events": [], "tasks": []}
-        return {"events": [], "tasks": []}
+    @property
+    def schedule(self) -> Dict[str, Any]:
+        return self.store.schedule
     
-    def _save_schedule(self):
-        """Save schedule to JSON file"""
-        os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-        with open(self.data_file, 'w') as f:
-            json.dump(self.schedule, f, indent=2)
+    def _build_event(self, title: str, start_time: str, end_time: Optional[str] = None,
+                     description: str = "", location: str = "") -> Dict[str, Any]:
+        """Parse times and build an event record (without an id)"""
+        if not title:
+            raise ValueError("title is required")
+        
+        start_dt = parse_time(start_time)
+        end_dt = parse_time(end_time) if end_time else start_dt + timedelta(hours=1)
+        if end_dt < start_dt:
+            raise ValueError("end_time is before start_time")
+        
+        return {
+            "title": title,
+            "start_time": start_dt.isoformat(),
+            "end_time": end_dt.isoformat(),
+            "description": description,
+            "location": location,
+            "created_at": datetime.now().isoformat()
+        }
     
     def add_event(self, title: str, start_time: str, end_time: Optional[str] = None, 
-                 description: str = "", location: str = "") -> str:
-        """Add a new event to the calendar"""
+                 description: str = "", location: str = "", on_conflict: Optional[str] = None) -> str:
+        """Add a new event to the calendar
+        
+        on_conflict is one of CONFLICT_POLICIES (default
+        CALENDAR_CONFLICT_POLICY) and decides what happens when the event
+        overlaps one already booked.
+        """
         try:
-            start_dt = parser.parse(start_time)
-            end_dt = parser.parse(end_time) if end_time else start_dt + timedelta(hours=1)
+            policy = (on_conflict or CALENDAR_CONFLICT_POLICY).lower()
+            if policy not in CONFLICT_POLICIES:
+                raise ValueError(f"unknown conflict policy '{policy}'")
             
-            event = {
-                "id": len(self.schedule["events"]) + 1,
-                "title": title,
-                "start_time": start_dt.isoformat(),
-                "end_time": end_dt.isoformat(),
-                "description": description,
-                "location": location,
-                "created_at": datetime.now().isoformat()
-            }
+            event = self._build_event(title, start_time, end_time, description, location)
+            if policy != "allow":
+                clash = self._conflict_reply(event, policy)
+                if clash:
+                    return clash
             
-            self.schedule["events"].append(event)
-            self._save_schedule()
+            event = self.store.insert("events", event)
+            start_dt, _ = self.store.event_span(event)
             
             return f"Event '{title}' scheduled for {start_dt.strftime('%Y-%m-%d %H:%M')}"
             
         except Exception as e:
             return f"Error adding event: {str(e)}"
     
+    def _conflict_reply(self, event: Dict[str, Any], policy: str) -> Optional[str]:
+        """Why an unsaved event cannot be booked under policy, or None if it overlaps nothing"""
+        start_dt = wall_clock(parse_stored_time(event["start_time"]))
+        end_dt = wall_clock(parse_stored_time(event["end_time"]))
+        conflicts = self.store.conflicts(start_dt, end_dt)
+        if not conflicts:
+            return None
+        
+        names = ", ".join(f"'{other['title']}'" for other in conflicts[:3])
+        if len(conflicts) > 3:
+            names += f" and {len(conflicts) - 3} more"
+        reply = f"Event '{event['title']}' not scheduled: it overlaps {names}."
+        if policy == "suggest":
+            slot = self.store.nearest_free(start_dt, end_dt, not_before=min(start_dt, datetime.now()))
+            if slot is None:
+                reply += f" No free slot of that length within {FREE_SEARCH_DAYS} days."
+            else:
+                reply += f" Nearest free slot: {slot[0].strftime('%Y-%m-%d %H:%M')} to {slot[1].strftime('%H:%M')}."
+        return reply
+    
+    def add_recurring_event(self, title: str, start_time: str, rrule: str, end_time: Optional[str] = None,
+                            description: str = "", location: str = "",
+                            exdates: Optional[Iterable[str]] = None) -> str:
+        """Add a recurring event, stored once with its RRULE (e.g. FREQ=WEEKLY;BYDAY=MO)
+        
+        start_time and end_time give the time and length of the first
+        occurrence; exdates are occurrence starts to leave out.
+        """
+        try:
+            event = self._build_event(title, start_time, end_time, description, location)
+            event["rrule"] = normalize_rrule(rrule)
+            event["exdates"] = [parse_time(value).isoformat() for value in exdates or []]
+            
+            # Store the first real occurrence, which need not be start_time
+            # (e.g. a Monday rule starting on a Wednesday)
+            first = first_occurrence(event)
+            if first is None:
+                raise ValueError("the recurrence rule has no occurrences")
+            duration = parse_stored_time(event["end_time"]) - parse_stored_time(event["start_time"])
+            event["start_time"] = first.isoformat()
+            event["end_time"] = (first + duration).isoformat()
+            
+            self.store.insert("events", event)
+            return f"Recurring event '{title}' scheduled from {first.strftime('%Y-%m-%d %H:%M')} ({event['rrule']})"
+            
+        except Exception as e:
+            return f"Error adding recurring event: {str(e)}"
+    
+    def cancel_occurrence(self, event_id: int, occurrence: str) -> str:
+        """Leave one occurrence out of a series by adding it to the exdates
+        
+        occurrence is its start, or just its date to cancel that day's.
+        """
+        try:
+            event = self.store.get("events", event_id)
+            if event is None or not is_recurring(event):
+                return f"Recurring event {event_id} not found."
+            
+            when = parse_time(occurrence)
+            matches = [o["recurrence_id"] for o in self.store.events_on(when.date())
+                       if o["id"] == event_id and "recurrence_id" in o]
+            if when.time() != time.min:
+                matches = [value for value in matches if parse_stored_time(value) == when.replace(tzinfo=None)]
+            if not matches:
+                return f"Event {event_id} has no occurrence at {occurrence}."
+            
+            # Updating the series drops its cached expansions
+            self.store.update("events", event_id, {"exdates": list(event.get("exdates") or []) + matches})
+            return f"Cancelled '{event['title']}' on {parse_stored_time(matches[0]).strftime('%Y-%m-%d %H:%M')}"
+            
+        except Exception as e:
+            return f"Error cancelling occurrence: {str(e)}"
+    
+    def add_events_bulk(self, events: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Validate a batch of events and store the valid ones in a single write.
+        
+        Each item takes the add_event keyword arguments. Returns one result
+        per item: {"index", "ok", "id"} or {"index", "ok", "error"}.
+        """
+        results = []
+        valid = []
+        for i, item in enumerate(events):
+            try:
+                valid.append((i, self._build_event(**item)))
+            except Exception as e:
+                results.append({"index": i, "ok": False, "error": str(e)})
+        
+        if valid:
+            try:
+                stored = self.store.insert_many("events", [event for _, event in valid])
+                results.extend({"index": i, "ok": True, "id": event["id"]} for (i, _), event in zip(valid, stored))
+            except Exception as e:
+                results.extend({"index": i, "ok": False, "error": str(e)} for i, _ in valid)
+        
+        return sorted(results, key=lambda result: result["index"])
+    
     def get_events(self, date: Optional[str] = None) -> str:
         """Get events for a specific date or all events"""
         try:
             if date:
-                target_date = parser.parse(date).date()
-                events = [
-                    event for event in self.schedule["events"]
-                    if parser.parse(event["start_time"]).date() == target_date
-                ]
+                target_date = parse_time(date).date()
+                events = self.store.events_on(target_date)
             else:
-                events = self.schedule["events"]
-            
-            if not events:
-                return "No events found."
+                events = self.store.all_events()
             
-            result = []
-            for event in sorted(events, key=lambda x: x["start_time"]):
-                start = parser.parse(event["start_time"])
-                end = parser.parse(event["end_time"])
-                result.append(
-                    f"{event['title']}: {start.strftime('%Y-%m-%d %H:%M')} to {end.strftime('%H:%M')}"
-                )
-            
-            return "\n".join(result)
+            return self._format_events(events)
             
         except Exception as e:
             return f"Error retrieving events: {str(e)}"
     
+    def events_between(self, start: str, end: str) -> List[Dict[str, Any]]:
+        """Events overlapping the [start, end) window, ordered by start time"""
+        return self.store.events_between(parse_time(start), parse_time(end))
+    
+    def get_events_between(self, start: str, end: str) -> str:
+        """Get events overlapping the [start, end) window"""
+        try:
+            return self._format_events(self.events_between(start, end))
+        except Exception as e:
+            return f"Error retrieving events: {str(e)}"
+    
+    def _format_events(self, events: List[Dict[str, Any]]) -> str:
+        """Render events (already in start order) one per line"""
+        if not events:
+            return "No events found."
+        
+        result = []
+        for event in events:
+            start, end = self.store.event_span(event)
+            line = f"{event['title']}: {start.strftime('%Y-%m-%d %H:%M')} to {end.strftime('%H:%M')}"
+            # A series listed as a whole, rather than one of its occurrences
+            if is_recurring(event) and "recurrence_id" not in event:
+                line += f" (repeats {event['rrule']})"
+            result.append(line)
+        
+        return "\n".join(result)
+    
     def remove_event(self, event_id: int) -> str:
         """Remove an event by ID"""
-        original_count = len(self.schedule["events"])
-        self.schedule["events"] = [e for e in self.schedule["events"] if e["id"] != event_id]
-        
-        if len(self.schedule["events"]) < original_count:
-            self._save_schedule()
+        if self.store.delete("events", event_id) is not None:
             return f"Event {event_id} removed successfully."
         else:
             return f"Event {event_id} not found."
\ No newline at end of file
@@ -1,67 +1,283 @@
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
-from dateutil import parser
+import heapq
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
+from ..storage.event_index import parse_stored_time, to_epoch, wall_clock
+from .time_parsing import parse_time
+
+Interval = Tuple[datetime, datetime]
+
+WORKDAYS = (0, 1, 2, 3, 4)  # Monday-Friday
+
+# Weights of the parts of a common slot's preference score, each in [0, 1]:
+# how soon the slot is, how much free time separates it from the nearest
+# meeting (up to BUFFER_MINUTES), and the share of attendees whose
+# preferred hours contain it
+SCORE_WEIGHTS = {"soon": 1.0, "buffer": 0.5, "preferred": 1.0}
+BUFFER_MINUTES = 60
+
+
+@dataclass
+class Participant:
+    """One attendee: their busy time and working hours.
+    
+    busy is a list of (start, end) intervals; otherwise they are read from
+    calendar (anything with busy_intervals(start, end), e.g. a
+    ScheduleStore) for the window searched. preferred is an optional
+    (start, end) of hours they would rather meet in.
+    """
+    name: str
+    busy: Optional[Sequence[Interval]] = None
+    calendar: Any = None
+    work_start: time = time(9)
+    work_end: time = time(17)
+    workdays: Sequence[int] = WORKDAYS
+    preferred: Optional[Tuple[time, time]] = None
+    
+    def busy_between(self, start: datetime, end: datetime) -> List[Interval]:
+        """Busy intervals overlapping [start, end), sorted by start"""
+        if self.busy is not None:
+            return sorted(interval for interval in self.busy if interval[0] < end and interval[1] > start)
+        if self.calendar is not None:
+            return self.calendar.busy_intervals(start, end)
+        return []
+
 
 class SchedulingTools:
     @staticmethod
-    def find_available_time(events: List[Dict[str, Any]], duration_hours: float = 1, 
-                          start_date: str = None, days_ahead: int = 7) -> List[Dict[str, Any]]:
-        """Find available time slots"""
+    def busy_intervals(events: Iterable[Dict[str, Any]]) -> List[Interval]:
+        """Convert stored events to (start, end) datetimes"""
+        return [
+            (wall_clock(parse_stored_time(event["start_time"])),
+             wall_clock(parse_stored_time(event["end_time"])))
+            for event in events
+        ]
+
+    @staticmethod
+    def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+        """Sort intervals and merge any that overlap or touch"""
+        merged: List[Interval] = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1]:
+                if end > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+        return merged
+
+    @staticmethod
+    def free_slots(busy: Sequence[Interval], window_start: datetime, window_end: datetime,
+                   duration: timedelta, slot_minutes: int = 30,
+                   work_start: time = time(9), work_end: time = time(17),
+                   workdays: Sequence[int] = WORKDAYS) -> Iterator[Interval]:
+        """Yield free slots in the window by sweeping the gaps between merged busy intervals.
+
+        busy must already be sorted and merged. Slot starts are aligned to a
+        slot_minutes grid counted from work_start on each working day.
+        """
+        step = timedelta(minutes=slot_minutes)
+        i = 0
+        day = window_start.date()
+
+        while day <= window_end.date():
+            # Jump straight past busy blocks spanning whole days
+            while i < len(busy) and busy[i][1] <= datetime.combine(day, work_start):
+                i += 1
+            if i < len(busy) and busy[i][0] <= datetime.combine(day, work_start) \
+                    and busy[i][1].date() > day:
+                day = busy[i][1].date()
+                continue
+
+            if day.weekday() in workdays:
+                day_open = datetime.combine(day, work_start)
+                open_start = max(day_open, window_start)
+                open_end = min(datetime.combine(day, work_end), window_end)
+
+                # Busy intervals ending before today's working hours are done with
+                while i < len(busy) and busy[i][1] <= open_start:
+                    i += 1
+
+                cursor = open_start
+                j = i
+                while cursor < open_end:
+                    gap_end = open_end
+                    if j < len(busy) and busy[j][0] < open_end:
+                        gap_end = min(busy[j][0], open_end)
+
+                    # Round the gap start up to the next grid point
+                    offset = (cursor - day_open) % step
+                    slot_start = cursor if not offset else cursor + (step - offset)
+                    while slot_start + duration <= gap_end:
+                        yield (slot_start, slot_start + duration)
+                        slot_start += step
+
+                    if gap_end >= open_end:
+                        break
+                    cursor = busy[j][1]
+                    j += 1
+
+            day += timedelta(days=1)
+
+    @staticmethod
+    def find_available_time(events: List[Dict[str, Any]], duration_hours: float = 1,
+                          start_date: str = None, days_ahead: int = 7,
+                          slot_minutes: int = 30, work_start: time = time(9),
+                          work_end: time = time(17), workdays: Sequence[int] = WORKDAYS,
+                          max_slots: Optional[int] = 10,
+                          busy: Optional[List[Interval]] = None) -> List[Dict[str, Any]]:
+        """Find available time slots.
+
+        Pass busy (e.g. ScheduleStore.busy_intervals) instead of events to
+        reuse already-parsed event times.
+        """
         try:
             if start_date:
-                start_dt = parser.parse(start_date)
+                start_dt = wall_clock(parse_time(start_date))
             else:
-                start_dt = datetime.now()
-            
-            end_dt = start_dt + timedelta(days=days_ahead)
+                start_dt = datetime.now().replace(microsecond=0)
+
+            # Cover whole days so the last day of the window is searched too
+            end_dt = datetime.combine((start_dt + timedelta(days=days_ahead)).date(), time.max)
             duration = timedelta(hours=duration_hours)
-            
-            # Convert events to datetime objects
-            busy_slots = []
-            for event in events:
-                busy_start = parser.parse(event["start_time"])
-                busy_end = parser.parse(event["end_time"])
-                busy_slots.append((busy_start, busy_end))
-            
-            # Find available slots
+
+            if busy is None:
+                busy = SchedulingTools.busy_intervals(events)
+            busy = SchedulingTools.merge_intervals(busy)
+
             available_slots = []
-            current_time = start_dt.replace(hour=9, minute=0, second=0)  # Start at 9 AM
+            for slot_start, slot_end in SchedulingTools.free_slots(
+                    busy, start_dt, end_dt, duration, slot_minutes, work_start, work_end, workdays):
+                available_slots.append({
+                    "start": slot_start.isoformat(),
+                    "end": slot_end.isoformat()
+                })
+                if max_slots is not None and len(available_slots) >= max_slots:
+                    break
+
+            return available_slots
+
+        except Exception as e:
+            return f"Error finding available time: {str(e)}"
+
+    @staticmethod
+    def off_hours(window_start: datetime, window_end: datetime, work_start: time = time(9),
+                  work_end: time = time(17), workdays: Sequence[int] = WORKDAYS) -> Iterator[Interval]:
+        """Yield the time outside working hours from the start of window_start's day, in order"""
+        if work_end <= work_start:
+            raise ValueError("working hours must end after they start")
+        closed_from = datetime.combine(window_start.date(), time.min)
+        day = window_start.date()
+        while day <= window_end.date():
+            # Days off leave closed_from where it is, so they merge into one interval
+            if day.weekday() in workdays:
+                day_open = datetime.combine(day, work_start)
+                if day_open > closed_from:
+                    yield (closed_from, day_open)
+                closed_from = datetime.combine(day, work_end)
+            day += timedelta(days=1)
+        yield (closed_from, datetime.combine(day, time.min))
+    
+    @staticmethod
+    def common_free_gaps(participants: Sequence[Participant], window_start: datetime,
+                         window_end: datetime) -> Iterator[Tuple[datetime, datetime, bool, bool]]:
+        """Yield the gaps in which every participant is free and working.
+        
+        Each participant's busy intervals and each distinct set of working
+        hours' off-hours are sorted streams; a k-way heap merge walks them
+        all in start order in one pass. Yields (start, end, after_busy,
+        before_busy), the flags telling whether the gap is bounded by a
+        meeting (rather than the end of someone's working day) on each side.
+        """
+        streams = []
+        for participant in participants:
+            busy = participant.busy_between(window_start, window_end)
+            streams.append((start, end, False) for start, end in busy)
+        # Attendees with the same hours share one off-hours stream
+        for hours in {(p.work_start, p.work_end, tuple(p.workdays)) for p in participants}:
+            off = SchedulingTools.off_hours(window_start, window_end, *hours)
+            streams.append((start, end, True) for start, end in off)
+        
+        cursor, cursor_busy = window_start, False
+        for start, end, off in heapq.merge(*streams):
+            if start >= window_end:
+                break
+            if end <= cursor:
+                continue
+            if start > cursor:
+                yield cursor, start, cursor_busy, not off
+            cursor, cursor_busy = end, not off
+        if cursor < window_end:
+            yield cursor, window_end, cursor_busy, False
+    
+    @staticmethod
+    def find_common_availability(participants: Sequence[Participant], duration_hours: float = 1,
+                                 start_date: str = None, days_ahead: int = 7, slot_minutes: int = 30,
+                                 max_slots: int = 10,
+                                 weights: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+        """Find the best slots in which every participant is free, within their own working hours.
+        
+        Candidate slots start on a slot_minutes grid inside the common free
+        gaps and are ranked by a preference score (see SCORE_WEIGHTS);
+        the top max_slots are returned best first, each as
+        {"start", "end", "score"}.
+        """
+        try:
+            if start_date:
+                start_dt = wall_clock(parse_time(start_date))
+            else:
+                start_dt = datetime.now().replace(microsecond=0)
+            end_dt = datetime.combine((start_dt + timedelta(days=days_ahead)).date(), time.max)
+            duration = timedelta(hours=duration_hours)
+            step = timedelta(minutes=slot_minutes)
+            weights = {**SCORE_WEIGHTS, **(weights or {})}
+            
+            window = (end_dt - start_dt).total_seconds()
+            buffer_cap = timedelta(minutes=BUFFER_MINUTES)
+            preferences = [p.preferred for p in participants if p.preferred]
             
-            while current_time.date() <= end_dt.date():
-                # Check if current day is weekend (optional)
-                if current_time.weekday() < 5:  # Monday-Friday
-                    # Check business hours (9 AM - 5 PM)
-                    if 9 <= current_time.hour < 17:
-                        slot_end = current_time + duration
-                        
-                        # Check if slot overlaps with any busy time
-                        is_available = True
-                        for busy_start, busy_end in busy_slots:
-                            if not (slot_end <= busy_start or current_time >= busy_end):
-                                is_available = False
-                                break
-                        
-                        if is_available and slot_end.hour <= 17:  # Within business hours
-                            available_slots.append({
-                                "start": current_time.isoformat(),
-                                "end": slot_end.isoformat()
-                            })
-                
-                current_time += timedelta(minutes=30)  # Check every 30 minutes
+            def candidates() -> Iterator[Tuple[float, int, datetime]]:
+                for gap_start, gap_end, after_busy, before_busy in SchedulingTools.common_free_gaps(
+                        participants, start_dt, end_dt):
+                    # Round the gap start up to the next grid point of its day
+                    offset = (gap_start - datetime.combine(gap_start.date(), time.min)) % step
+                    slot_start = gap_start if not offset else gap_start + (step - offset)
+                    while slot_start + duration <= gap_end:
+                        slot_end = slot_start + duration
+                        soon = 1 - (slot_start - start_dt).total_seconds() / window
+                        buffer = min(slot_start - gap_start if after_busy else buffer_cap,
+                                     gap_end - slot_end if before_busy else buffer_cap, buffer_cap) / buffer_cap
+                        score = weights["soon"] * soon + weights["buffer"] * buffer
+                        if preferences:
+                            liked = sum(1 for lo, hi in preferences
+                                        if lo <= slot_start.time() and slot_end.time() <= hi
+                                        and slot_start.date() == slot_end.date())
+                            score += weights["preferred"] * liked / len(preferences)
+                        # Earlier slots win ties
+                        yield score, -to_epoch(slot_start), slot_start
+                        slot_start += step
             
-            return available_slots[:10]  # Return first 10 available slots
+            return [
+                {"start": slot_start.isoformat(), "end": (slot_start + duration).isoformat(), "score": round(score, 3)}
+                for score, _, slot_start in heapq.nlargest(max_slots, candidates())
+            ]
             
         except Exception as e:
-            return f"Error finding available time: {str(e)}"
+            return f"Error finding common availability: {str(e)}"
     
     @staticmethod
-    def suggest_meeting_time(events: List[Dict[str, Any]], duration_hours: float = 1) -> str:
+    def suggest_meeting_time(events: List[Dict[str, Any]], duration_hours: float = 1,
+                             start_date: str = None, days_ahead: int = 7) -> str:
         """Suggest the next available meeting time"""
-        available_slots = SchedulingTools.find_available_time(events, duration_hours)
-        
+        available_slots = SchedulingTools.find_available_time(
+            events, duration_hours, start_date, days_ahead, max_slots=1
+        )
+
+        if isinstance(available_slots, str):
+            return available_slots
+
         if available_slots:
             first_slot = available_slots[0]
-            start_time = parser.parse(first_slot["start"])
+            start_time = parse_stored_time(first_slot["start"])
             return f"Next available slot: {start_time.strftime('%Y-%m-%d %H:%M')}"
         else:
-            return "No available slots found in the next 7 days."
\ No newline at end of file
+            return f"No available slots found in the next {days_ahead} days."
@@ -1,8 +1,8 @@
-import json
-import os
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Iterable, Optional
 from enum import Enum
+from .time_parsing import parse_time
+from ..storage import ScheduleStore
 
 class Priority(Enum):
     LOW = "low"
@@ -15,82 +15,117 @@ class Status(Enum):
     COMPLETED = "completed"
 
 class TaskManager:
-    def __init__(self, data_file: str = "data/schedule.json"):
+    def __init__(self, data_file: str = "data/schedule.json", store: Optional[ScheduleStore] = None):
         self.data_file = data_file
-        self.schedule = self._load_schedule()
+        self.store = store or ScheduleStore(data_file)
     
-    def _load_schedule(self) -> Dict[str, Any]:
-        """Load schedule from JSON file"""
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return {"events": [], "tasks": []}
-        return {"events": [], "tasks": []}
+    @property
+    def schedule(self) -> Dict[str, Any]:
+        return self.store.schedule
     
-    def _save_schedule(self):
-        """Save schedule to JSON file"""
-        os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-        with open(self.data_file, 'w') as f:
-            json.dump(self.schedule, f, indent=2)
+    def _build_task(self, title: str, due_date: Optional[str] = None,
+                    priority: str = "medium", description: str = "") -> Dict[str, Any]:
+        """Parse the due date and build a task record (without an id)"""
+        if not title:
+            raise ValueError("title is required")
+        if priority not in {p.value for p in Priority}:
+            raise ValueError(f"unknown priority '{priority}'")
+        
+        due_dt = parse_time(due_date) if due_date else None
+        
+        return {
+            "title": title,
+            "due_date": due_dt.isoformat() if due_dt else None,
+            "priority": priority,
+            "description": description,
+            "status": Status.PENDING.value,
+            "created_at": datetime.now().isoformat()
+        }
     
     def add_task(self, title: str, due_date: Optional[str] = None, 
                 priority: str = "medium", description: str = "") -> str:
         """Add a new task"""
         try:
-            due_dt = parser.parse(due_date) if due_date else None
-            
-            task = {
-                "id": len(self.schedule["tasks"]) + 1,
-                "title": title,
-                "due_date": due_dt.isoformat() if due_dt else None,
-                "priority": priority,
-                "description": description,
-                "status": Status.PENDING.value,
-                "created_at": datetime.now().isoformat()
-            }
-            
-            self.schedule["tasks"].append(task)
-            self._save_schedule()
+            task = self.store.insert("tasks", self._build_task(title, due_date, priority, description))
             
-            due_info = f" due {due_dt.strftime('%Y-%m-%d')}" if due_dt else ""
+            due_info = f" due {task['due_date'][:10]}" if task["due_date"] else ""
             return f"Task '{title}' added{due_info} with {priority} priority."
             
         except Exception as e:
             return f"Error adding task: {str(e)}"
     
+    def add_tasks_bulk(self, tasks: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Validate a batch of tasks and store the valid ones in a single write.
+        
+        Each item takes the add_task keyword arguments. Returns one result
+        per item: {"index", "ok", "id"} or {"index", "ok", "error"}.
+        """
+        results = []
+        valid = []
+        for i, item in enumerate(tasks):
+            try:
+                valid.append((i, self._build_task(**item)))
+            except Exception as e:
+                results.append({"index": i, "ok": False, "error": str(e)})
+        
+        if valid:
+            try:
+                stored = self.store.insert_many("tasks", [task for _, task in valid])
+                results.extend({"index": i, "ok": True, "id": task["id"]} for (i, _), task in zip(valid, stored))
+            except Exception as e:
+                results.extend({"index": i, "ok": False, "error": str(e)} for i, _ in valid)
+        
+        return sorted(results, key=lambda result: result["index"])
+    
     def get_tasks(self, status: Optional[str] = None) -> str:
         """Get tasks with optional status filter"""
         try:
-            if status:
-                tasks = [task for task in self.schedule["tasks"] if task["status"] == status]
-            else:
-                tasks = self.schedule["tasks"]
-            
-            if not tasks:
-                return "No tasks found."
-            
-            result = []
-            for task in tasks:
-                due_info = f" (Due: {parser.parse(task['due_date']).strftime('%Y-%m-%d')})" if task["due_date"] else ""
-                result.append(
-                    f"{task['id']}. {task['title']} [{task['priority']}] - {task['status']}{due_info}"
-                )
-            
-            return "\n".join(result)
-            
+            return self._format_tasks(self.store.tasks(status))
         except Exception as e:
             return f"Error retrieving tasks: {str(e)}"
     
+    def get_urgent_tasks(self, limit: int = 5, status: str = Status.PENDING.value) -> str:
+        """Get the most urgent tasks: highest priority first, then earliest due"""
+        try:
+            return self._format_tasks(self.store.urgent_tasks(limit, status))
+        except Exception as e:
+            return f"Error retrieving tasks: {str(e)}"
+    
+    def get_overdue_tasks(self, as_of: Optional[str] = None) -> str:
+        """Get unfinished tasks due before as_of (default now), earliest due first"""
+        try:
+            as_of_dt = parse_time(as_of) if as_of else datetime.now()
+            return self._format_tasks(self.store.overdue_tasks(as_of_dt))
+        except Exception as e:
+            return f"Error retrieving tasks: {str(e)}"
+    
+    def _format_tasks(self, tasks: List[Dict[str, Any]]) -> str:
+        """Render tasks one per line"""
+        if not tasks:
+            return "No tasks found."
+        
+        result = []
+        for task in tasks:
+            due_dt = self.store.task_due(task)
+            due_info = f" (Due: {due_dt.strftime('%Y-%m-%d')})" if due_dt else ""
+            result.append(
+                f"{task['id']}. {task['title']} [{task['priority']}] - {task['status']}{due_info}"
+            )
+        
+        return "\n".join(result)
+    
     def update_task_status(self, task_id: int, status: str) -> str:
         """Update task status"""
         try:
-            for task in self.schedule["tasks"]:
-                if task["id"] == task_id:
-                    task["status"] = status
-                    self._save_schedule()
-                    return f"Task {task_id} status updated to {status}."
+            if self.store.update("tasks", task_id, {"status": status}) is not None:
+                return f"Task {task_id} status updated to {status}."
             return f"Task {task_id} not found."
         except Exception as e:
-            return f"Error updating task: {str(e)}"
\ No newline at end of file
+            return f"Error updating task: {str(e)}"
+    
+    def remove_task(self, task_id: int) -> str:
+        """Remove a task by ID"""
+        if self.store.delete("tasks", task_id) is not None:
+            return f"Task {task_id} removed successfully."
+        else:
+            return f"Task {task_id} not found."
\ No newline at end of file
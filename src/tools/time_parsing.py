@@ -0,0 +1,83 @@
+import re
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Dict, Any, Optional
+
+from ..metrics import default_metrics
+from ..storage import event_index
+
+PARSE_CACHE_SIZE = 4096
+
+_NAMED_TIMES_VALUES = {"noon": "12:00", "midday": "12:00", "midnight": "00:00"}
+_NAMED_TIMES = re.compile(r"\b(" + "|".join(_NAMED_TIMES_VALUES) + r")\b")
+_NEXT_WEEKDAY = re.compile(r"\bnext ((?:mon|tues|wednes|thurs|fri|satur|sun)day)\b")
+_AM_PM = re.compile(r"\b(\d{1,2}(?::\d{2})?)\s*(am|pm)\b")
+# "at 10" is an hour, not the 10th of the month
+_AT_HOUR = re.compile(r"\bat (\d{1,2})\b(?![:.]\d|\s*(?:am|pm)\b)")
+_HAS_DATE = re.compile(r"\b\d{4}\b|\d{1,2}/\d{1,2}|\b(?:mon|tue|wed|thu|fri|sat|sun|jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\b")
+
+
+def preprocess_time_string(time_str: str, today: date) -> str:
+    """Preprocess natural language time strings for better parsing"""
+    time_str = time_str.lower().strip()
+    
+    # Handle relative days
+    if 'tomorrow' in time_str:
+        tomorrow = (today + timedelta(days=1)).strftime('%Y-%m-%d')
+        time_str = time_str.replace('tomorrow', tomorrow)
+    elif 'today' in time_str:
+        time_str = time_str.replace('today', today.strftime('%Y-%m-%d'))
+    
+    # Words dateutil does not know: "noon", "midnight", "next friday"
+    time_str = _NAMED_TIMES.sub(lambda match: _NAMED_TIMES_VALUES[match.group(1)], time_str)
+    time_str = _NEXT_WEEKDAY.sub(r"\1", time_str)
+    
+    # Handle time formats
+    time_str = _AT_HOUR.sub(r"at \1:00", time_str)
+    time_str = _AM_PM.sub(lambda match: f"{match.group(1)} {match.group(2).upper()}", time_str)
+    
+    # If no date specified, assume today (a weekday or month name is a date;
+    # dateutil resolves it from the default day)
+    if not _HAS_DATE.search(time_str):
+        time_str = today.strftime('%Y-%m-%d ') + time_str
+    
+    return time_str
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_cached(text: str, reference: date, preprocess: bool) -> datetime:
+    # Only misses reach here, so the span times real parses, not cache hits
+    from dateutil import parser
+    with default_metrics().span("date_parse"):
+        if preprocess:
+            text = preprocess_time_string(text, reference)
+        # Missing date parts come from the reference day, so the result depends
+        # only on the cache key
+        return parser.parse(text, default=datetime.combine(reference, time.min))
+
+
+def parse_time(text: str, reference: Optional[date] = None, preprocess: bool = False) -> datetime:
+    """Parse a user-supplied time string through a bounded LRU cache.
+
+    The cache is keyed on the input string and the reference date (today by
+    default), which is what relative phrases resolve against.
+    """
+    return _parse_cached(text, reference or date.today(), preprocess)
+
+
+def parse_stats() -> Dict[str, Any]:
+    """Parse counts and cache hit rate since start-up (or the last clear_parse_cache)"""
+    info = _parse_cached.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "natural_parses": info.misses,
+        "cache_hits": info.hits,
+        "cache_size": info.currsize,
+        "hit_rate": info.hits / lookups if lookups else 0.0,
+        "stored_parses": event_index.stored_parse_count,
+    }
+
+
+def clear_parse_cache():
+    _parse_cached.cache_clear()
+    event_index.stored_parse_count = 0
@@ -0,0 +1,365 @@
+import math
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+if TYPE_CHECKING:
+    # Imported where the hedge pool is created; see ResilientCaller._pool
+    from concurrent.futures import ThreadPoolExecutor
+
+# Settings
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+LLM_RETRY_DEADLINE = float(os.getenv("LLM_RETRY_DEADLINE", "60"))
+LLM_BACKOFF_INITIAL = float(os.getenv("LLM_BACKOFF_INITIAL", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+# Send a second, hedged request once a call runs past this latency percentile
+LLM_HEDGE = os.getenv("LLM_HEDGE", "").lower() in ("1", "true", "yes")
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))
+
+# Statuses worth another attempt: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+def validate_response(response: Any) -> bool:
+    """Whether a chat completion carries a message with content"""
+    try:
+        return bool(response.choices) and response.choices[0].message.content is not None
+    except AttributeError:
+        return False
+
+
+def format_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Messages reduced to the role and string content the chat API expects"""
+    return [{"role": message["role"], "content": str(message.get("content") or "")} for message in messages]
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Transient failures: timeouts, dropped connections, rate limits and 5xx replies"""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    # An asyncio or openai error can only exist once that module has been imported
+    asyncio = sys.modules.get("asyncio")
+    if asyncio is not None and isinstance(error, asyncio.TimeoutError):
+        return True
+    openai = sys.modules.get("openai")
+    if openai is not None and isinstance(error, openai.APIConnectionError):
+        return True
+    status = getattr(error, "status_code", None)
+    return isinstance(status, int) and (status in RETRYABLE_STATUS or status >= 500)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the LLM while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Stops calls to a backend after repeated transient failures.
+
+    After failure_threshold consecutive failures the breaker opens and
+    calls are refused for reset_timeout seconds. It then lets a single
+    trial call through (half-open): success closes it again, failure
+    reopens it for another reset_timeout.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES, reset_timeout: float = LLM_BREAKER_RESET,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being refused"""
+        if self.state == self.OPEN:
+            return self.clock() - self.opened_at < self.reset_timeout
+        return self.state == self.HALF_OPEN and self._trial_running
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead; claims the trial slot when half-open"""
+        with self._lock:
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_running = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+                self._trial_running = False
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies"""
+
+    def __init__(self, window: int = 200, min_samples: int = LLM_HEDGE_MIN_SAMPLES):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Latency at the given percentile, or None until min_samples calls were seen"""
+        with self._lock:
+            if len(self._samples) < max(self.min_samples, 1):
+                return None
+            samples = sorted(self._samples)
+        return samples[min(math.ceil(len(samples) * pct / 100) - 1, len(samples) - 1)]
+
+
+class ResilientCaller:
+    """Retry, timeout, hedging and circuit-breaker policy around LLM calls.
+
+    Each attempt gets a per-request timeout. Transient failures (see
+    is_retryable) are retried with jittered exponential backoff, within
+    max_attempts and an overall deadline. With hedging on, a call still
+    running after the tracked latency percentile gets a second identical
+    request and the first reply wins. Every transient failure counts
+    against the circuit breaker; while it is open calls fail fast with
+    CircuitOpenError so callers can fall back to tool-only replies.
+    """
+
+    def __init__(self, timeout: float = LLM_TIMEOUT, max_attempts: int = LLM_MAX_ATTEMPTS,
+                 deadline: float = LLM_RETRY_DEADLINE, backoff_initial: float = LLM_BACKOFF_INITIAL,
+                 backoff_max: float = LLM_BACKOFF_MAX, hedge: bool = LLM_HEDGE,
+                 hedge_percentile: float = LLM_HEDGE_PERCENTILE,
+                 breaker: Optional[CircuitBreaker] = None, latency: Optional[LatencyTracker] = None):
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.deadline = deadline
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = latency or LatencyTracker()
+        self._executor: Optional["ThreadPoolExecutor"] = None
+        self._executor_lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.rejected = 0
+
+    @property
+    def available(self) -> bool:
+        """False while the breaker is refusing calls"""
+        return not self.breaker.is_open
+
+    def _retry_options(self) -> Dict[str, Any]:
+        from tenacity import retry_if_exception, stop_after_attempt, stop_after_delay, wait_random_exponential
+
+        def should_retry(error: BaseException) -> bool:
+            return is_retryable(error) and not self.breaker.is_open
+
+        def count_retry(retry_state):
+            self.retries += 1
+
+        return {
+            "stop": stop_after_attempt(self.max_attempts) | stop_after_delay(self.deadline),
+            "wait": wait_random_exponential(multiplier=self.backoff_initial, max=self.backoff_max),
+            "retry": retry_if_exception(should_retry),
+            "before_sleep": count_retry,
+            "reraise": True,
+        }
+
+    def _admit(self):
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError("LLM backend unavailable (circuit open)")
+
+    def _record(self, error: Optional[BaseException]):
+        if error is not None and is_retryable(error):
+            self.breaker.record_failure()
+        else:
+            # Non-transient errors (bad request, auth) still mean the backend answered
+            self.breaker.record_success()
+
+    def _hedge_delay(self, hedge: bool) -> Optional[float]:
+        return self.latency.percentile(self.hedge_percentile) if hedge and self.hedge else None
+
+    # Blocking calls
+
+    def call(self, fn: Callable[..., Any], *args, hedge: bool = True, **kwargs) -> Any:
+        """Call fn(*args, **kwargs) under the policy.
+
+        timeout=self.timeout is added to the keyword arguments unless one
+        is given, so fn must accept it (OpenAI create methods do). Pass
+        hedge=False for requests that must not be duplicated or timed,
+        such as streams.
+        """
+        self._admit()
+        self.calls += 1
+        kwargs.setdefault("timeout", self.timeout)
+        from tenacity import Retrying
+        for attempt in Retrying(**self._retry_options()):
+            with attempt:
+                if attempt.retry_state.attempt_number > 1:
+                    self._admit()
+                started = time.perf_counter()
+                try:
+                    delay = self._hedge_delay(hedge)
+                    result = fn(*args, **kwargs) if delay is None else self._hedged_call(fn, args, kwargs, delay)
+                except Exception as e:
+                    self._record(e)
+                    raise
+                self._record(None)
+                if hedge:
+                    self.latency.record(time.perf_counter() - started)
+        return result
+
+    def _pool(self) -> "ThreadPoolExecutor":
+        with self._executor_lock:
+            if self._executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self._executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-hedge")
+            return self._executor
+
+    def _hedged_call(self, fn, args, kwargs, delay: float):
+        from concurrent.futures import FIRST_COMPLETED, wait
+        pool = self._pool()
+        primary = pool.submit(fn, *args, **kwargs)
+        deadline = time.monotonic() + self.timeout
+        done, pending = wait({primary}, timeout=delay)
+        if not done:
+            self.hedged += 1
+            pending.add(pool.submit(fn, *args, **kwargs))
+
+        error: Optional[BaseException] = None
+        while True:
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    if future is not primary:
+                        self.hedge_wins += 1
+                    return future.result()
+                error = future.exception()
+            if not pending:
+                raise error
+            done, pending = wait(pending, timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+            if not done:
+                raise TimeoutError(f"LLM request timed out after {self.timeout:g}s")
+
+    # Coroutine calls
+
+    async def acall(self, fn: Callable[..., Awaitable[Any]], *args, hedge: bool = True, **kwargs) -> Any:
+        """Async counterpart of call; the timeout is also enforced with asyncio.wait_for"""
+        self._admit()
+        self.calls += 1
+        kwargs.setdefault("timeout", self.timeout)
+        import asyncio
+        from tenacity import AsyncRetrying
+        async for attempt in AsyncRetrying(**self._retry_options()):
+            with attempt:
+                if attempt.retry_state.attempt_number > 1:
+                    self._admit()
+                started = time.perf_counter()
+                try:
+                    delay = self._hedge_delay(hedge)
+                    if delay is None:
+                        result = await asyncio.wait_for(fn(*args, **kwargs), self.timeout)
+                    else:
+                        result = await self._ahedged_call(fn, args, kwargs, delay)
+                except Exception as e:
+                    self._record(e)
+                    raise
+                self._record(None)
+                if hedge:
+                    self.latency.record(time.perf_counter() - started)
+        return result
+
+    async def _ahedged_call(self, fn, args, kwargs, delay: float):
+        import asyncio
+        loop = asyncio.get_running_loop()
+        primary = asyncio.ensure_future(fn(*args, **kwargs))
+        deadline = loop.time() + self.timeout
+        tasks = {primary}
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self.hedged += 1
+                hedge = asyncio.ensure_future(fn(*args, **kwargs))
+                tasks.add(hedge)
+                pending.add(hedge)
+
+            error: Optional[BaseException] = None
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, timeout=max(deadline - loop.time(), 0),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise asyncio.TimeoutError(f"LLM request timed out after {self.timeout:g}s")
+        finally:
+            # The losing request is abandoned
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "rejected": self.rejected,
+            "breaker": self.breaker.state,
+            "breaker_trips": self.breaker.trips,
+            "p95": self.latency.percentile(95),
+        }
+
+
+_default_caller: Optional[ResilientCaller] = None
+
+
+def default_caller() -> ResilientCaller:
+    """The process-wide call policy, so every agent shares one breaker and latency window"""
+    global _default_caller
+    if _default_caller is None:
+        _default_caller = ResilientCaller()
+    return _default_caller
+
+
+def retryable_api_call(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Call fn under the default retry, timeout, hedging and circuit-breaker policy"""
+    return default_caller().call(fn, *args, **kwargs)
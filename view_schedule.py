@@ -1,60 +1,303 @@
-import json
+import argparse
+import itertools
 import os
-from datetime import datetime
+import sys
+from datetime import datetime, timedelta
 
-def view_schedule():
-    schedule_file = "data/schedule.json"
+# How far ahead, and how many, upcoming occurrences of a recurring event to list
+UPCOMING_DAYS = 14
+UPCOMING_LIMIT = 3
+
+# Events and tasks per page when paging on a terminal
+PAGE_SIZE = 20
+
+# Days shown after --from when --to is not given
+WINDOW_DAYS = 7
+
+def upcoming_occurrences(events, start=None, end=None):
+    """Next occurrences of each recurring event, keyed by event id, expanded only for the coming days
+    
+    With start and end, the occurrences in that window instead.
+    """
+    series_events = [event for event in events if event.get("rrule")]
+    if not series_events:
+        return {}
+    
+    from src.storage.recurrence import SeriesIndex
+    start = start or datetime.now()
+    end = end or start + timedelta(days=UPCOMING_DAYS)
+    upcoming = {}
+    for occurrence in SeriesIndex(series_events).starting_between(start, end):
+        upcoming.setdefault(occurrence["id"], []).append(datetime.fromisoformat(occurrence["start_time"]))
+    return upcoming
+
+class JsonSchedule:
+    """schedule.json read as a stream: records are decoded and filtered one at a time"""
+    
+    def __init__(self, schedule_file):
+        self.schedule_file = schedule_file
+    
+    def iter_events(self, start=None, end=None):
+        """Events in start order, as the backends list them.
+        
+        A file written by the backends has its series first and its one-off
+        events in start order (see START_ORDER), so events are yielded as
+        they are decoded. Any other file takes one pass keeping only each
+        event's sort key and offset, then reads the events back in order.
+        """
+        from src.storage.json_backend import EVENTS_ORDER, START_ORDER, read_header
+        if read_header(self.schedule_file).get(EVENTS_ORDER) == START_ORDER:
+            yield from self._stream_events(start, end)
+        else:
+            yield from self._sorted_events(start, end)
+    
+    @staticmethod
+    def _sort_key(event, start=None, end=None):
+        """(start, is a series, id) for an event, or None if it is not in [start, end)"""
+        from src.storage.event_index import parse_stored_time, stored_epoch, to_epoch, wall_clock
+        
+        if start is None or end is None:
+            return stored_epoch(event["start_time"]), 0, event["id"]
+        if event.get("rrule"):
+            # A series sorts by its first occurrence in the window, after one-offs starting then
+            from src.storage.recurrence import SeriesIndex
+            occurrences = SeriesIndex([event]).between(start, end)
+            if not occurrences:
+                return None
+            return to_epoch(parse_stored_time(occurrences[0]["start_time"])), 1, event["id"]
+        event_start = wall_clock(parse_stored_time(event["start_time"]))
+        event_end = wall_clock(parse_stored_time(event["end_time"]))
+        if event_start < end and (event_end > start or event_start >= start):
+            return to_epoch(event_start), 0, event["id"]
+        return None
+    
+    def _stream_events(self, start=None, end=None):
+        import heapq
+        from src.storage.event_index import parse_stored_time, to_epoch, wall_clock
+        from src.storage.json_backend import stream_records
+        
+        events = stream_records(self.schedule_file, "events")
+        series = []
+        for event in events:
+            if not event.get("rrule"):
+                events = itertools.chain([event], events)
+                break
+            key = self._sort_key(event, start, end)
+            if key is not None:
+                series.append((key, event))
+        series.sort(key=lambda pair: pair[0])
+        
+        def one_offs():
+            if start is None or end is None:
+                for event in events:
+                    yield self._sort_key(event), event
+                return
+            for event in events:
+                event_start = wall_clock(parse_stored_time(event["start_time"]))
+                # Sorted by start, so nothing after this can be in the window
+                if event_start >= end:
+                    return
+                if event_start >= start or wall_clock(parse_stored_time(event["end_time"])) > start:
+                    yield (to_epoch(event_start), 0, event["id"]), event
+        
+        for _, event in heapq.merge(series, one_offs(), key=lambda pair: pair[0]):
+            yield event
+    
+    def _sorted_events(self, start=None, end=None):
+        from src.storage.json_backend import records_at, stream_records
+        
+        keys = []
+        for offset, event in stream_records(self.schedule_file, "events", offsets=True):
+            key = self._sort_key(event, start, end)
+            if key is not None:
+                keys.append(key + (offset,))
+        keys.sort()
+        yield from records_at(self.schedule_file, [key[-1] for key in keys])
+    
+    def iter_tasks(self, status=None, priority=None, due_from=None, due_to=None):
+        from src.storage.event_index import parse_stored_time, wall_clock
+        from src.storage.json_backend import stream_records
+        
+        for task in stream_records(self.schedule_file, "tasks"):
+            if (status and task.get("status") != status) or (priority and task.get("priority") != priority):
+                continue
+            if due_from is not None or due_to is not None:
+                if not task.get("due_date"):
+                    continue
+                due = wall_clock(parse_stored_time(task["due_date"]))
+                if (due_from is not None and due < due_from) or (due_to is not None and due >= due_to):
+                    continue
+            yield task
+    
+    def close(self):
+        pass
+
+def open_schedule(schedule_file="data/schedule.json", backend=None):
+    """The quickest reader for the schedule, or None if there is none.
+    
+    In sqlite mode the database's indexes answer the filters directly, so
+    the first page costs the same however large the schedule is. Changes
+    still in a journal are replayed read-only (JournalSnapshot), so a
+    running JournalBackend's files are never touched; otherwise
+    schedule.json is streamed.
+    """
+    mode = (backend or os.getenv("SCHEDULE_STORAGE", "json")).lower()
+    db_file = os.path.splitext(schedule_file)[0] + ".db"
+    if mode == "sqlite" and os.path.exists(db_file):
+        from src.storage import SqliteBackend
+        return SqliteBackend(db_file)
+    
+    journals = (f"{schedule_file}.journal", f"{schedule_file}.journal.compacting")
+    if any(os.path.exists(path) and os.path.getsize(path) for path in journals):
+        from src.storage import JournalSnapshot
+        return JournalSnapshot(schedule_file)
     
     if not os.path.exists(schedule_file):
+        return None
+    return JsonSchedule(schedule_file)
+
+def format_event(event, start=None, end=None):
+    start_time = datetime.fromisoformat(event["start_time"])
+    end_time = datetime.fromisoformat(event["end_time"])
+    lines = [
+        f"• {event['title']}",
+        f"  📅 {start_time.strftime('%Y-%m-%d')}",
+        f"  ⏰ {start_time.strftime('%H:%M')} - {end_time.strftime('%H:%M')}",
+    ]
+    if event.get("rrule"):
+        lines.append(f"  🔁 Repeats: {event['rrule']}")
+        next_starts = upcoming_occurrences([event], start, end).get(event["id"], [])[:UPCOMING_LIMIT]
+        if next_starts:
+            lines.append(f"  ⏭️  Next: {', '.join(start.strftime('%a %Y-%m-%d %H:%M') for start in next_starts)}")
+    if event.get("description"):
+        lines.append(f"  📝 {event['description']}")
+    if event.get("location"):
+        lines.append(f"  📍 {event['location']}")
+    return "\n".join(lines) + "\n"
+
+def format_task(task):
+    status_emoji = "🟢" if task["status"] == "completed" else "🟡" if task["status"] == "in_progress" else "⚪"
+    priority_emoji = "🔥" if task["priority"] == "high" else "⚠️" if task["priority"] == "medium" else "📌"
+    
+    lines = [f"{status_emoji} {priority_emoji} {task['title']}", f"   Status: {task['status']}"]
+    if task.get("due_date"):
+        due_date = datetime.fromisoformat(task["due_date"])
+        lines.append(f"   Due: {due_date.strftime('%Y-%m-%d')}")
+    if task.get("description"):
+        lines.append(f"   Notes: {task['description']}")
+    return "\n".join(lines) + "\n"
+
+def schedule_blocks(source, start=None, end=None, status=None, priority=None):
+    """Yield ("header", text) and ("item", text) pairs, reading the schedule only as far as they are consumed"""
+    filtered = start is not None or status or priority
+    
+    yield "header", "\n🎯 EVENTS:\n" + "-" * 30
+    found = False
+    for event in source.iter_events(start, end):
+        found = True
+        yield "item", format_event(event, start, end)
+    if not found:
+        yield "item", "No matching events." if filtered else "No events scheduled yet."
+    
+    yield "header", "\n✅ TASKS:\n" + "-" * 30
+    found = False
+    for task in source.iter_tasks(status, priority, start, end):
+        found = True
+        yield "item", format_task(task)
+    if not found:
+        yield "item", "No matching tasks." if filtered else "No tasks created yet."
+
+def paginate(blocks, page_size=None, page=1, interactive=False):
+    """Print blocks page_size items at a time.
+    
+    Interactively, each page waits for Enter (q stops); otherwise only the
+    requested page is printed. A header is held back until the first item
+    under it is printed.
+    """
+    skip = (page - 1) * page_size if page_size else 0
+    shown = 0
+    header = None
+    for kind, text in blocks:
+        if kind == "header":
+            header = text
+            continue
+        if skip:
+            skip -= 1
+            continue
+        if page_size and shown == page_size:
+            if not interactive:
+                print(f"\n… more on page {page + 1} (--page {page + 1})")
+                return
+            try:
+                if input("-- more: Enter for the next page, q to quit -- ").strip().lower().startswith("q"):
+                    return
+            except EOFError:
+                return
+            shown = 0
+        if header is not None:
+            print(header)
+            header = None
+        print(text)
+        shown += 1
+    if page > 1 and not shown:
+        print(f"\nNothing on page {page}.")
+
+def view_schedule(schedule_file="data/schedule.json", start=None, end=None, status=None, priority=None,
+                  page_size=None, page=1, backend=None):
+    source = open_schedule(schedule_file, backend)
+    if source is None:
         print("No schedule file found. Schedule some events first!")
         return
     
     try:
-        with open(schedule_file, 'r') as f:
-            schedule = json.load(f)
-        
         print("📅 YOUR SCHEDULE")
         print("=" * 50)
         
-        # Display Events
-        print("\n🎯 EVENTS:")
-        print("-" * 30)
-        if schedule.get("events"):
-            for event in schedule["events"]:
-                start_time = datetime.fromisoformat(event["start_time"])
-                end_time = datetime.fromisoformat(event["end_time"])
-                print(f"• {event['title']}")
-                print(f"  📅 {start_time.strftime('%Y-%m-%d')}")
-                print(f"  ⏰ {start_time.strftime('%H:%M')} - {end_time.strftime('%H:%M')}")
-                if event.get("description"):
-                    print(f"  📝 {event['description']}")
-                if event.get("location"):
-                    print(f"  📍 {event['location']}")
-                print()
-        else:
-            print("No events scheduled yet.")
-        
-        # Display Tasks
-        print("\n✅ TASKS:")
-        print("-" * 30)
-        if schedule.get("tasks"):
-            for task in schedule["tasks"]:
-                status_emoji = "🟢" if task["status"] == "completed" else "🟡" if task["status"] == "in_progress" else "⚪"
-                priority_emoji = "🔥" if task["priority"] == "high" else "⚠️" if task["priority"] == "medium" else "📌"
-                
-                print(f"{status_emoji} {priority_emoji} {task['title']}")
-                print(f"   Status: {task['status']}")
-                if task.get("due_date"):
-                    due_date = datetime.fromisoformat(task["due_date"])
-                    print(f"   Due: {due_date.strftime('%Y-%m-%d')}")
-                if task.get("description"):
-                    print(f"   Notes: {task['description']}")
-                print()
-        else:
-            print("No tasks created yet.")
-            
+        interactive = bool(page_size) and sys.stdin.isatty() and sys.stdout.isatty()
+        paginate(schedule_blocks(source, start, end, status, priority), page_size, page, interactive)
+    
     except Exception as e:
         print(f"Error reading schedule: {e}")
+    finally:
+        source.close()
+
+def parse_day(text):
+    """A --from/--to value: today, tomorrow, yesterday or anything dateutil reads"""
+    offsets = {"yesterday": -1, "today": 0, "tomorrow": 1}
+    if text.strip().lower() in offsets:
+        day = datetime.now() + timedelta(days=offsets[text.strip().lower()])
+        return day.replace(hour=0, minute=0, second=0, microsecond=0)
+    
+    from src.storage.event_index import wall_clock
+    from src.tools.time_parsing import parse_time
+    return wall_clock(parse_time(text))
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the schedule, a page at a time")
+    parser.add_argument("--file", default="data/schedule.json", help="schedule file (default: data/schedule.json)")
+    parser.add_argument("--from", dest="start", help="first day to show, e.g. 2030-01-07 or tomorrow")
+    parser.add_argument("--to", dest="end", help="day after the last one to show")
+    parser.add_argument("--days", type=int, default=WINDOW_DAYS, help="days shown from --from without --to")
+    parser.add_argument("--status", choices=("pending", "in_progress", "completed"))
+    parser.add_argument("--priority", choices=("low", "medium", "high"))
+    parser.add_argument("--page-size", type=int, help=f"items per page (default: all, or {PAGE_SIZE} with --page)")
+    parser.add_argument("--page", type=int, default=1)
+    parser.add_argument("--backend", choices=("json", "journal", "sqlite"), help="default: SCHEDULE_STORAGE")
+    args = parser.parse_args()
+    
+    start = end = None
+    if args.start or args.end:
+        try:
+            start = parse_day(args.start) if args.start else datetime.now()
+            start = start.replace(hour=0, minute=0, second=0, microsecond=0)
+            end = parse_day(args.end) if args.end else start + timedelta(days=args.days)
+        except (ValueError, OverflowError) as e:
+            parser.error(f"could not read the date: {e}")
+    
+    page_size = args.page_size
+    if page_size is None:
+        page_size = PAGE_SIZE if args.page > 1 else 0
+    view_schedule(args.file, start, end, args.status, args.priority, page_size, args.page, args.backend)
 
 if __name__ == "__main__":
-    view_schedule()
\ No newline at end of file
+    main()